@@ -3,16 +3,30 @@ Flask application for LLM Leaderboard.
 Provides API endpoints and web interface for comparing LLM results.
 """
 
-from flask import Flask, request, jsonify, render_template, redirect, url_for, flash, session
+from flask import (Flask, Response, request, jsonify, render_template, redirect, url_for, flash, session,
+                   stream_with_context)
+from werkzeug.exceptions import HTTPException
 from werkzeug.utils import secure_filename
+from markupsafe import Markup
 import os
 import json
 from typing import Dict, List, Any, Optional
 import tempfile
 
 from database import DatabaseManager
-from config import SECRET_KEY, DEBUG, ALLOWED_EXTENSIONS, MAX_CONTENT_LENGTH, TASK_GROUPS, MODELS
-from scripts.import_excel import ExcelImporter
+from http_cache import register_compression, register_conditional_requests
+from cache import LRUCache
+from telemetry import telemetry, register_cache, register_request_metrics
+from profiling import register_profiling
+from config import (SECRET_KEY, DEBUG, ALLOWED_EXTENSIONS, MAX_CONTENT_LENGTH, TASK_GROUPS,
+                    BATCH_MAX_QUERIES, FRAGMENT_CACHE_CONFIG, PROFILING_CONFIG, SIGNIFICANCE_CONFIG,
+                    CORRELATION_CONFIG)
+from scripts.export_results import ResultExporter, EXPORT_FORMATS
+from eval.near_duplicates import NearDuplicateIndex
+from eval.score_matrix import get_score_matrix
+from eval.significance import get_significance
+from eval.correlation import get_correlations
+from model_registry import get_model_registry
 
 
 def create_app() -> Flask:
@@ -26,8 +40,23 @@ def create_app() -> Flask:
     app.config['IMPORTS_ENABLED'] = imports_env == 'true'
     print(f"🔧 IMPORTS_ENABLED env: '{os.environ.get('IMPORTS_ENABLED')}' -> parsed: {app.config['IMPORTS_ENABLED']}")
     
-    # Initialize database manager
+    # Initialize database manager (creates any missing tables)
     db = DatabaseManager()
+    db.init_database(verbose=False)
+    near_duplicates = NearDuplicateIndex(db)
+    fragment_cache = LRUCache('leaderboard_fragments', **FRAGMENT_CACHE_CONFIG)
+    
+    # Request metrics come first so that early 304 answers are counted too
+    register_request_metrics(app)
+    register_cache(fragment_cache)
+    if PROFILING_CONFIG['enabled']:
+        register_profiling(app)
+    
+    # Response compression and conditional GET support (ETag / Last-Modified
+    # tied to the data version). Compression is registered first so that it
+    # runs after the ETag has been attached.
+    register_cache(register_compression(app))
+    register_conditional_requests(app, db)
     
     def allowed_file(filename: str) -> bool:
         """Check if file extension is allowed."""
@@ -36,6 +65,50 @@ def create_app() -> Flask:
         file_ext = '.' + filename.rsplit('.', 1)[1].lower()
         return file_ext in ALLOWED_EXTENSIONS
     
+    def parse_page_args():
+        """Parse the `fields`, `limit` and `after` parameters shared by list endpoints."""
+        fields_param = request.args.get('fields')
+        fields = [f.strip() for f in fields_param.split(',') if f.strip()] if fields_param else None
+        limit = request.args.get('limit')
+        if limit is not None:
+            if not limit.isdigit() or int(limit) <= 0:
+                raise ValueError('limit must be a positive integer')
+            limit = int(limit)
+        return fields, limit, request.args.get('after') or None
+    
+    def parse_task_selection() -> Dict[str, Any]:
+        """
+        Parse the leaderboard task selection: weights=task_group:weight,...
+        and comma-separated include_tasks / exclude_tasks.
+        """
+        selection = {}
+        weights_param = request.args.get('weights')
+        if weights_param:
+            weights = {}
+            for item in weights_param.split(','):
+                group, _, value = item.strip().partition(':')
+                try:
+                    weight = float(value)
+                except ValueError:
+                    weight = -1.0
+                if group not in TASK_GROUPS or not 0 <= weight < float('inf'):
+                    raise ValueError('weights must be task_group:weight pairs with a known task group '
+                                     'and a non-negative weight')
+                weights[group] = weight
+            selection['weights'] = tuple(sorted(weights.items()))
+        for param in ['include_tasks', 'exclude_tasks']:
+            value = request.args.get(param)
+            if value:
+                selection[param] = tuple(sorted({t.strip() for t in value.split(',') if t.strip()}))
+        return selection
+    
+    def paginate(items: List[Dict[str, Any]], limit: Optional[int], key: str):
+        """Trim a limit+1 result to the page size and return it with the next cursor."""
+        if limit is None or len(items) <= limit:
+            return items, None
+        items = items[:limit]
+        return items, items[-1][key]
+    
     # Error handlers
     @app.errorhandler(404)
     def not_found(error):
@@ -98,14 +171,23 @@ def create_app() -> Flask:
             if max_val:
                 filters[f'max_{param}'] = max_val
         
-        # Get leaderboard data
-        leaderboard_data = db.get_leaderboard_data(filters)
+        # Cost filters (USD per output, quality points per USD)
+        for param in ['max_cost_per_output', 'min_quality_per_dollar']:
+            value = request.args.get(param)
+            if value:
+                try:
+                    filters[param] = float(value)
+                except ValueError:
+                    pass
         
-        # Get available models and task groups for filters
-        models = db.get_models()
+        # Task-group weights and task subsets (invalid values are ignored)
+        try:
+            filters.update(parse_task_selection())
+        except ValueError:
+            pass
         
-        # Extract unique providers from config
-        providers = sorted(list(set(model['provider'] for model in MODELS.values())))
+        # Provider facet precomputed by the model registry
+        providers = list(get_model_registry(db).providers)
         
         # Get enabled columns from session or use defaults
         from config import LEADERBOARD_COLUMNS, FILTER_SETTINGS
@@ -116,19 +198,33 @@ def create_app() -> Flask:
         enabled_filters = session.get('enabled_filters',
                                     [k for k, v in FILTER_SETTINGS.items() if v['enabled']])
         
-        # Build visible columns data
-        visible_columns = {}
-        for col_key in enabled_columns:
-            if col_key in LEADERBOARD_COLUMNS:
-                visible_columns[col_key] = LEADERBOARD_COLUMNS[col_key]
+        # The table only changes with the data, so identical views reuse the
+        # rendered fragment and skip both the leaderboard query and the render
+        data_version, _ = db.get_data_state()
+        cache_key = (data_version, tuple(sorted(filters.items())), tuple(enabled_columns))
+        leaderboard_table = fragment_cache.get(cache_key)
+        
+        if leaderboard_table is None:
+            leaderboard_data = db.get_leaderboard_data(filters)
+            
+            # Build visible columns data
+            visible_columns = {}
+            for col_key in enabled_columns:
+                if col_key in LEADERBOARD_COLUMNS:
+                    visible_columns[col_key] = LEADERBOARD_COLUMNS[col_key]
+            
+            leaderboard_table = Markup(render_template('_leaderboard_table.html',
+                                                       leaderboard=leaderboard_data,
+                                                       current_filters=filters,
+                                                       visible_columns=visible_columns,
+                                                       enabled_columns=enabled_columns))
+            fragment_cache.set(cache_key, leaderboard_table)
         
         return render_template('index.html', 
-                             leaderboard=leaderboard_data,
-                             models=models,
+                             leaderboard_table=leaderboard_table,
                              task_groups=TASK_GROUPS,
                              providers=providers,
                              current_filters=filters,
-                             visible_columns=visible_columns,
                              enabled_columns=enabled_columns,
                              enabled_filters=enabled_filters)
     
@@ -188,6 +284,17 @@ def create_app() -> Flask:
 
         selected_models = [model for model in [model1_data, model2_data, model3_data] if model]
         comparison_ready = len(selected_models) >= 2
+        
+        # Paired tests over shared tasks for every pair of selected models
+        significance = []
+        if comparison_ready:
+            tests = get_significance(db, db.get_excluded_tasks())
+            for i, model_a in enumerate(selected_models):
+                for model_b in selected_models[i + 1:]:
+                    result = tests.pair(model_a['model_key'], model_b['model_key'])
+                    if result:
+                        result.update(name_a=model_a['name'], name_b=model_b['name'])
+                        significance.append(result)
 
         if len(selected_models) == 3:
             col_class = 'col-lg-4 col-md-6 mb-4'
@@ -202,6 +309,8 @@ def create_app() -> Flask:
                              model2=model2_data,
                              model3=model3_data,
                              comparison_ready=comparison_ready,
+                             significance=significance,
+                             significance_alpha=SIGNIFICANCE_CONFIG['alpha'],
                              col_class=col_class,
                              selected_model1=model1_key,
                              selected_model2=model2_key,
@@ -219,9 +328,13 @@ def create_app() -> Flask:
         # Get task group performance comparison data
         task_group_data = db.get_task_group_performance(model_key=model_key, limit_groups=5)
         
+        # Estimated cost of this model's outputs
+        costs = db.get_cost_summary([model_key])
+        
         return render_template('model.html', 
                              model=model, 
-                             task_group_data=task_group_data)
+                             task_group_data=task_group_data,
+                             costs=costs[0] if costs else None)
     
     # Register import routes only when imports are enabled via env/config
     if app.config.get('IMPORTS_ENABLED', True):
@@ -248,17 +361,38 @@ def create_app() -> Flask:
             if value:
                 filters[param] = value
         
-        models = db.get_models(**filters)
+        try:
+            fields, limit, after = parse_page_args()
+            models = db.get_models(**filters, fields=fields, after=after,
+                                   limit=limit + 1 if limit else None)
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        models, next_after = paginate(models, limit, 'model_key')
         
         return jsonify({
             'success': True,
             'models': models,
-            'count': len(models)
+            'count': len(models),
+            'next_after': next_after
+        })
+    
+    @app.route('/api/models/facets')
+    def api_model_facets():
+        """Get filter options (providers, tags, languages) and numeric ranges across all models."""
+        return jsonify({
+            'success': True,
+            'facets': get_model_registry(db).facets()
         })
     
     @app.route('/api/leaderboard')
     def api_leaderboard():
-        """Get leaderboard data with filtering and sorting."""
+        """
+        Get leaderboard data with filtering and sorting.
+        
+        weights (e.g. programming:2,research:0) and include_tasks/exclude_tasks
+        (comma-separated task ids) recompute the averages over a custom task selection.
+        as_of=<import_id> returns the standings right after that import.
+        """
         filters = {}
         
         # Boolean filters
@@ -282,6 +416,15 @@ def create_app() -> Flask:
                 except ValueError:
                     continue
         
+        # Cost filters
+        for param in ['max_cost_per_output', 'min_quality_per_dollar']:
+            value = request.args.get(param)
+            if value:
+                try:
+                    filters[param] = float(value)
+                except ValueError:
+                    continue
+        
         # Metric filters
         for key, value in request.args.items():
             if key.startswith('metric_') and key.endswith('_min'):
@@ -290,25 +433,45 @@ def create_app() -> Flask:
                 except ValueError:
                     continue
         
-        leaderboard = db.get_leaderboard_data(filters)
+        try:
+            filters.update(parse_task_selection())
+            as_of = request.args.get('as_of')
+            if as_of is not None:
+                if not as_of.isdigit():
+                    raise ValueError('as_of must be an import id')
+                filters['as_of'] = int(as_of)
+            fields, limit, after = parse_page_args()
+            leaderboard = db.get_leaderboard_data(filters, fields=fields, after=after,
+                                                  limit=limit + 1 if limit else None)
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        leaderboard, next_after = paginate(leaderboard, limit, 'model_key')
         
         return jsonify({
             'success': True,
             'leaderboard': leaderboard,
             'count': len(leaderboard),
-            'filters': filters
+            'filters': filters,
+            'next_after': next_after
         })
     
     @app.route('/api/tasks')
     def api_tasks():
         """Get list of tasks with optional filtering."""
         task_group = request.args.get('task_group')
-        tasks = db.get_tasks(task_group)
+        try:
+            fields, limit, after = parse_page_args()
+            tasks = db.get_tasks(task_group, fields=fields, after=after,
+                                 limit=limit + 1 if limit else None)
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        tasks, next_after = paginate(tasks, limit, 'task_id')
         
         return jsonify({
             'success': True,
             'tasks': tasks,
-            'count': len(tasks)
+            'count': len(tasks),
+            'next_after': next_after
         })
     
     @app.route('/api/task/<task_id>/outputs')
@@ -317,7 +480,16 @@ def create_app() -> Flask:
         models_param = request.args.get('models')
         model_keys = models_param.split(',') if models_param else None
         
-        outputs = db.get_task_outputs(task_id, model_keys)
+        try:
+            fields, limit, after = parse_page_args()
+            if after is not None and not after.isdigit():
+                raise ValueError('after must be an output id')
+            outputs = db.get_task_outputs(task_id, model_keys, fields=fields,
+                                          after=int(after) if after else None,
+                                          limit=limit + 1 if limit else None)
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        outputs, next_after = paginate(outputs, limit, 'id')
         
         # Get task info
         tasks = db.get_tasks()
@@ -327,7 +499,8 @@ def create_app() -> Flask:
             'success': True,
             'task': task,
             'outputs': outputs,
-            'count': len(outputs)
+            'count': len(outputs),
+            'next_after': next_after
         })
     
     @app.route('/api/model/<model_key>')
@@ -343,6 +516,24 @@ def create_app() -> Flask:
             'model': model
         })
     
+    @app.route('/api/duplicates')
+    @app.route('/api/task/<task_id>/duplicates')
+    def api_duplicates(task_id: str = None):
+        """List clusters of near-duplicate outputs, per task."""
+        threshold = request.args.get('threshold')
+        try:
+            threshold = float(threshold) if threshold else None
+        except ValueError:
+            return jsonify({'error': 'Invalid threshold'}), 400
+        
+        tasks = near_duplicates.find_clusters(task_id or request.args.get('task_id'), threshold)
+        
+        return jsonify({
+            'success': True,
+            'tasks': tasks,
+            'count': sum(len(t['clusters']) for t in tasks)
+        })
+    
     # API import endpoint - only register if imports enabled
     if app.config.get('IMPORTS_ENABLED', True):
         @app.route('/api/import', methods=['POST'])
@@ -369,7 +560,8 @@ def create_app() -> Flask:
                 compute_metrics = request.form.get('compute_metrics', 'true').lower() == 'true'
                 dry_run = request.form.get('dry_run', 'false').lower() == 'true'
                 
-                # Import data
+                # Import data (pandas and the importer are only loaded on first use)
+                from scripts.import_excel import ExcelImporter
                 importer = ExcelImporter(db)
                 result = importer.import_data(
                     tmp_path,
@@ -430,6 +622,199 @@ def create_app() -> Flask:
             }
         })
 
+    @app.route('/api/scores')
+    def api_scores():
+        """Get the models x tasks score matrix of one metric (null where a model has no output)."""
+        metric = request.args.get('metric', 'quality_score')
+        if metric not in db.OUTPUT_METRIC_FIELDS:
+            return jsonify({'error': f'metric must be one of: {", ".join(db.OUTPUT_METRIC_FIELDS)}'}), 400
+        
+        matrix = get_score_matrix(db, metric)
+        scores = [
+            [None if value != value else round(float(value), 4) for value in row]
+            for row in matrix.scores
+        ]
+        
+        return jsonify({
+            'success': True,
+            'metric': metric,
+            'models': list(matrix.model_keys),
+            'tasks': list(matrix.task_ids),
+            'task_groups': list(matrix.task_groups),
+            'scores': scores
+        })
+    
+    @app.route('/api/significance')
+    def api_significance():
+        """
+        Get pairwise p-values between models (paired permutation test and sign test).
+        
+        Pass models (comma-separated) for a sub-matrix; rows and columns follow
+        the models order. mean_difference[i][j] > 0 means model i scored higher.
+        """
+        models = [m for m in request.args.get('models', '').split(',') if m]
+        tests = get_significance(db, db.get_excluded_tasks())
+        
+        return jsonify({
+            'success': True,
+            'alpha': SIGNIFICANCE_CONFIG['alpha'],
+            'permutations': SIGNIFICANCE_CONFIG['permutations'],
+            'excluded_tasks': list(db.get_excluded_tasks()),
+            **tests.submatrix(models or None)
+        })
+    
+    @app.route('/api/correlations')
+    def api_correlations():
+        """
+        Get the model x model correlation of per-task quality scores, with hierarchical clustering.
+        
+        Models come in dendrogram order, ready for a heatmap. Pass models
+        (comma-separated) for a subset and threshold (in 1 - correlation) to
+        cut the tree into flat clusters. linkage is the SciPy linkage matrix
+        over all_models.
+        """
+        models = [m for m in request.args.get('models', '').split(',') if m]
+        try:
+            threshold = float(request.args.get('threshold', CORRELATION_CONFIG['cluster_threshold']))
+        except ValueError:
+            return jsonify({'error': 'threshold must be a number'}), 400
+        if not 0.0 <= threshold <= 2.0:
+            return jsonify({'error': 'threshold must be between 0 and 2'}), 400
+        correlations = get_correlations(db, db.get_excluded_tasks())
+        
+        return jsonify({
+            'success': True,
+            'method': 'pearson',
+            'linkage_method': CORRELATION_CONFIG['linkage'],
+            'min_shared_tasks': CORRELATION_CONFIG['min_shared_tasks'],
+            'excluded_tasks': list(db.get_excluded_tasks()),
+            **correlations.to_dict(models or None, threshold)
+        })
+    
+    @app.route('/api/exclusions')
+    def api_exclusions():
+        """
+        Get the task exclusion rules and the tasks they currently exclude.
+        
+        Excluded tasks do not count towards any quality score average; manage
+        the rules with scripts/manage_exclusions.py.
+        """
+        return jsonify({
+            'success': True,
+            'rules': db.get_task_exclusion_rules(),
+            'excluded_tasks': list(db.get_excluded_tasks())
+        })
+    
+    @app.route('/api/costs')
+    def api_costs():
+        """
+        Get the estimated cost (USD) of running the task suite per model.
+        
+        Filters: models (comma-separated), task_group. Each model includes a
+        breakdown per task group.
+        """
+        models = [m for m in request.args.get('models', '').split(',') if m]
+        costs = db.get_cost_summary(models or None, request.args.get('task_group'))
+        
+        return jsonify({
+            'success': True,
+            'costs': costs,
+            'count': len(costs)
+        })
+    
+    @app.route('/api/export')
+    def api_export():
+        """
+        Stream all outputs with their metrics as NDJSON (default) or CSV.
+        
+        Filters: models (comma-separated), task_group, import_id.
+        Pass text=false to leave out the output text.
+        """
+        fmt = request.args.get('format', 'ndjson')
+        if fmt not in EXPORT_FORMATS:
+            return jsonify({'error': f'format must be one of: {", ".join(EXPORT_FORMATS)}'}), 400
+        
+        models_param = request.args.get('models')
+        import_id = request.args.get('import_id')
+        if import_id is not None and not import_id.isdigit():
+            return jsonify({'error': 'import_id must be an integer'}), 400
+        
+        chunks = ResultExporter(db).iter_chunks(
+            fmt=fmt,
+            model_keys=models_param.split(',') if models_param else None,
+            task_group=request.args.get('task_group'),
+            import_id=int(import_id) if import_id is not None else None,
+            include_output_text=request.args.get('text', 'true').lower() != 'false'
+        )
+        
+        mimetype = 'text/csv' if fmt == 'csv' else 'application/x-ndjson'
+        response = Response(stream_with_context(chunks), mimetype=mimetype)
+        response.headers['Content-Disposition'] = f'attachment; filename=results.{fmt}'
+        return response
+
+    @app.route('/metrics')
+    def metrics():
+        """Telemetry in the Prometheus text format."""
+        return Response(telemetry.render(), mimetype='text/plain; version=0.0.4')
+
+    # Read-only endpoints that can be combined in a single /api/batch request
+    BATCH_ENDPOINTS = {
+        'api_models', 'api_leaderboard', 'api_tasks', 'api_task_outputs',
+        'api_model_detail', 'api_model_facets', 'api_duplicates', 'api_stats', 'api_scores', 'api_costs',
+        'api_significance', 'api_correlations', 'api_exclusions',
+    }
+    
+    @app.route('/api/batch', methods=['POST'])
+    def api_batch():
+        """
+        Run several GET API queries in one request.
+        
+        Body: {"queries": [{"id": "lb", "path": "/api/leaderboard", "params": {"limit": 5}}, ...]}
+        All sub-queries share one connection inside a single read transaction,
+        so their results come from the same consistent snapshot.
+        """
+        data = request.get_json(silent=True) or {}
+        queries = data.get('queries')
+        if not isinstance(queries, list) or not queries:
+            return jsonify({'error': 'queries must be a non-empty list'}), 400
+        if len(queries) > BATCH_MAX_QUERIES:
+            return jsonify({'error': f'At most {BATCH_MAX_QUERIES} queries per batch'}), 400
+        
+        adapter = app.url_map.bind('localhost')
+        results = []
+        
+        with db.read_snapshot():
+            for i, query in enumerate(queries):
+                query = query if isinstance(query, dict) else {}
+                query_id = query.get('id', i)
+                path, _, query_string = str(query.get('path', '')).partition('?')
+                
+                try:
+                    endpoint, view_args = adapter.match(path, method='GET')
+                except HTTPException:
+                    results.append({'id': query_id, 'status': 404, 'body': {'error': 'Not found'}})
+                    continue
+                
+                if endpoint not in BATCH_ENDPOINTS:
+                    results.append({'id': query_id, 'status': 400,
+                                    'body': {'error': f'{path} is not available in batch requests'}})
+                    continue
+                
+                with app.test_request_context(path, query_string=query.get('params') or query_string):
+                    response = app.make_response(app.view_functions[endpoint](**view_args))
+                
+                results.append({
+                    'id': query_id,
+                    'status': response.status_code,
+                    'body': response.get_json()
+                })
+        
+        return jsonify({
+            'success': True,
+            'results': results,
+            'count': len(results)
+        })
+
     @app.route('/settings')
     def settings():
         """Settings page"""
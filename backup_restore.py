@@ -6,6 +6,7 @@ import shutil
 import os
 from datetime import datetime
 from database import DatabaseManager
+from eval.score_matrix import refresh_snapshot
 
 def create_backup():
     """Create a backup of the current database."""
@@ -47,7 +48,15 @@ def restore_backup(backup_path: str):
     
     if response.lower() in ['igen', 'yes', 'y']:
         try:
+            # The backup carries an older data version; continue past the live one
+            # so caches and ETags keyed by version never see a reused number
+            live_version = DatabaseManager(db_path).get_data_state()[0] if os.path.exists(db_path) else 0
             shutil.copy2(backup_path, db_path)
+            db = DatabaseManager(db_path)
+            db.init_database(verbose=False)
+            restored_version = db.get_data_state()[0]
+            db.set_data_version(max(live_version, restored_version) + 1)
+            refresh_snapshot(db)
             print(f"✅ Adatbázis visszaállítva a backup-ból!")
             return True
         except Exception as e:
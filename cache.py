@@ -0,0 +1,109 @@
+"""
+Small in-process caches shared by the web layer.
+"""
+
+import sys
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, List, Optional, Tuple
+
+
+class LRUCache:
+    """Thread-safe LRU cache bounded by entry count and approximate size in bytes."""
+
+    def __init__(self, name: str, max_entries: int = 256, max_bytes: int = 32 * 1024 * 1024):
+        self.name = name
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._data: 'OrderedDict[Hashable, tuple]' = OrderedDict()
+        self._lock = threading.Lock()
+        self._bytes = 0
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def _sizeof(value: Any) -> int:
+        if isinstance(value, (bytes, bytearray, str)):
+            return len(value)
+        return sys.getsizeof(value)
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        """Return the cached value (marking it recently used) or None."""
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._data.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def set(self, key: Hashable, value: Any) -> None:
+        """Store a value, evicting least recently used entries to stay within bounds."""
+        size = self._sizeof(value)
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            old = self._data.pop(key, None)
+            if old is not None:
+                self._bytes -= old[1]
+            self._data[key] = (value, size)
+            self._bytes += size
+            while self._data and (len(self._data) > self.max_entries or self._bytes > self.max_bytes):
+                _, (_, evicted_size) = self._data.popitem(last=False)
+                self._bytes -= evicted_size
+
+    def items(self) -> List[Tuple[Hashable, Any]]:
+        """Snapshot of the (key, value) pairs, least recently used first; does not count as use."""
+        with self._lock:
+            return [(key, entry[0]) for key, entry in self._data.items()]
+
+    def clear(self) -> None:
+        """Drop all entries."""
+        with self._lock:
+            self._data.clear()
+            self._bytes = 0
+
+    def stats(self) -> Dict[str, Any]:
+        """Return size and hit/miss counters."""
+        with self._lock:
+            return {
+                'name': self.name,
+                'entries': len(self._data),
+                'bytes': self._bytes,
+                'hits': self.hits,
+                'misses': self.misses
+            }
+
+
+class VersionedCache(LRUCache):
+    """
+    LRUCache of values derived from one data version of the database.
+
+    Each key holds the value of the version it was built for; a lookup with
+    a newer version rebuilds it once (under a lock, so concurrent requests
+    wait for the same build) and replaces the old value.
+    """
+
+    def __init__(self, name: str, max_entries: int = 64, max_bytes: int = 32 * 1024 * 1024):
+        super().__init__(name, max_entries, max_bytes)
+        self._build_lock = threading.Lock()
+
+    def get_or_build(self, key: Hashable, data_version: int, build: Callable[[], Any]) -> Any:
+        """Return the value of key for data_version, calling build() if it is missing or outdated."""
+        entry = self.get(key)
+        if entry is not None and entry[0] == data_version:
+            return entry[1]
+
+        with self._build_lock:
+            with self._lock:
+                entry = self._data.get(key)
+            if entry is not None and entry[0][0] == data_version:
+                return entry[0][1]
+            value = build()
+            self.set(key, (data_version, value))
+        return value
+
+    def values(self) -> List[Any]:
+        """Snapshot of the cached values of any version; does not count as use."""
+        return [value for _, (_, value) in self.items()]
@@ -10,6 +10,7 @@ DATA_DIR = 'data'
 DATABASE = 'results.db'
 ALLOWED_EXTENSIONS = ['.xlsx', '.csv']
 MAX_CONTENT_LENGTH = 16 * 1024 * 1024  # 16MB
+BATCH_MAX_QUERIES = 25  # Sub-queries accepted by /api/batch
 
 # Flask settings
 SECRET_KEY = os.environ.get('SECRET_KEY', 'dev-key-change-in-production')
@@ -685,8 +686,13 @@ TASK_GROUPS = [
 ]
 
 # Special task handling
-# Note: research_018 (deep research task) is excluded from quality_score averages
-# as many models lack research capabilities and receive 0 scores, which would skew results
+# Tasks excluded from quality_score averages: (scope, value, reason), where scope
+# is 'task' or 'task_group'. Seeded into the task_exclusions table when the
+# database is created; afterwards manage them with scripts/manage_exclusions.py
+DEFAULT_TASK_EXCLUSIONS = [
+    ('task', 'research_018', 'Deep research task: many models lack research capabilities '
+                             'and receive 0 scores, which would skew results'),
+]
 
 # Supported metrics
 SUPPORTED_METRICS = [
@@ -721,6 +727,88 @@ METRICS_CONFIG = {
     'rouge_metrics': ['rouge1', 'rouge2', 'rougeL'],
 }
 
+# HTTP response compression
+COMPRESSION_CONFIG = {
+    'min_size': 1024,                    # Responses smaller than this are sent uncompressed
+    'gzip_level': 6,
+    'brotli_quality': 5,                 # Used only when the optional `brotli` package is installed
+    'cache_entries': 256,                # Compressed variants kept per worker
+    'cache_bytes': 32 * 1024 * 1024,
+}
+
+# Rendered leaderboard table fragments, keyed by filters, columns and data version
+FRAGMENT_CACHE_CONFIG = {
+    'max_entries': 128,
+    'max_bytes': 16 * 1024 * 1024,
+}
+
+# Token counting used to fill in missing `tokens`/`length` values at import
+TOKENIZER_CONFIG = {
+    'counter': os.environ.get('TOKEN_COUNTER', 'regex'),  # 'regex' or 'bpe'
+    'bpe_vocab_file': os.environ.get('BPE_VOCAB_FILE'),     # vocab.json / tokenizer.json for 'bpe'
+}
+
+# Near-duplicate output detection (MinHash + LSH)
+NEAR_DUPLICATE_CONFIG = {
+    'num_perm': 128,        # MinHash signature length
+    'bands': 16,            # LSH bands (num_perm / bands rows per band)
+    'shingle_size': 3,      # Word n-gram size used for shingling
+    'threshold': 0.8,       # Minimum estimated Jaccard similarity for a match
+    'seed': 1,              # Seed for the MinHash permutations
+}
+
+# Views rendered by wsgi.py before gunicorn forks, so workers start with warm caches
+WARMUP_PATHS = ['/', '/api/leaderboard', '/api/models', '/api/tasks', '/api/scores', '/api/stats',
+                '/api/correlations']
+
+# Bootstrap confidence intervals of the leaderboard averages (resampling tasks)
+BOOTSTRAP_CONFIG = {
+    'resamples': 1000,
+    'confidence': 0.95,
+    'seed': 42,             # Fixed so intervals are reproducible for a data version
+    'cached_selections': 32,  # Task selections (group, excluded tasks) whose intervals are kept
+}
+
+# Bradley-Terry ranking from per-task head-to-head results (sort_by=elo)
+RANKING_CONFIG = {
+    'prior_games': 1.0,     # Drawn games against an average virtual opponent (keeps unbeaten models finite)
+    'max_iterations': 1000,
+    'tolerance': 1e-9,      # Stop when no log-strength moves more than this
+    'elo_base': 1000.0,     # Rating of a model of average strength
+    'cached_selections': 8,  # Task selections (group, excluded tasks) whose rankings are kept
+}
+
+# Paired significance tests between models (compare page, /api/significance)
+SIGNIFICANCE_CONFIG = {
+    'permutations': 5000,   # Random sign flips per pair
+    'seed': 7,
+    'alpha': 0.05,          # Pairs below this permutation p-value are marked significant
+}
+
+# Model x model correlation of per-task quality scores (/api/correlations)
+CORRELATION_CONFIG = {
+    'min_shared_tasks': 3,      # Fewer shared tasks leave the correlation undefined
+    'linkage': 'average',       # scipy.cluster.hierarchy.linkage method
+    'cluster_threshold': 0.5,   # Default cut of the dendrogram, in 1 - correlation
+}
+
+# Score history per import (leaderboard as_of=<import_id>)
+HISTORY_CONFIG = {
+    'snapshot_interval': 10,    # Full snapshot every N imports; other imports store changed cells only
+    'cached_states': 8,         # Reconstructed imports kept in memory
+}
+
+# Opt-in profiling: per-query timing, EXPLAIN QUERY PLAN for slow statements,
+# template timing and a Server-Timing breakdown on every response
+PROFILING_CONFIG = {
+    'enabled': os.environ.get('PROFILING', 'false').lower() == 'true',
+    'slow_query_ms': float(os.environ.get('SLOW_QUERY_MS', '50')),   # Statements slower than this are explained and logged
+    'slow_query_log': os.path.join('logs', 'slow_queries.log'),
+    'log_max_bytes': 5 * 1024 * 1024,
+    'log_backup_count': 3,
+    'log_requests': True,   # Print the per-request breakdown to stdout
+}
+
 # Leaderboard display settings
 LEADERBOARD_COLUMNS = {
     'rank': {'label': 'Rank', 'enabled': True, 'order': 1},
@@ -731,16 +819,20 @@ LEADERBOARD_COLUMNS = {
     'tasks': {'label': 'Tasks', 'enabled': False, 'order': 6},
     'avg_tokens': {'label': 'Avg Tokens', 'enabled': False, 'order': 7},
     'quality_score': {'label': 'Quality Score', 'enabled': True, 'order': 8},
-    'rouge_l': {'label': 'ROUGE-L', 'enabled': False, 'order': 9},
-    'bert_score': {'label': 'BERTScore', 'enabled': False, 'order': 10},
-    'reasoning': {'label': 'Reasoning', 'enabled': True, 'order': 11},
-    'parameters': {'label': 'Parameters', 'enabled': True, 'order': 12},
-    'context_window': {'label': 'Context', 'enabled': True, 'order': 13},
-    'image_input': {'label': 'Image Input', 'enabled': True, 'order': 14},
-    'release_date': {'label': 'Release Date', 'enabled': False, 'order': 15},
-    'input_price': {'label': 'Input Price', 'enabled': False, 'order': 16},
-    'output_price': {'label': 'Output Price', 'enabled': False, 'order': 17},
-    'actions': {'label': 'Actions', 'enabled': True, 'order': 18}
+    'quality_ci': {'label': '95% CI', 'enabled': True, 'order': 9},
+    'rouge_l': {'label': 'ROUGE-L', 'enabled': False, 'order': 10},
+    'bert_score': {'label': 'BERTScore', 'enabled': False, 'order': 11},
+    'reasoning': {'label': 'Reasoning', 'enabled': True, 'order': 12},
+    'parameters': {'label': 'Parameters', 'enabled': True, 'order': 13},
+    'context_window': {'label': 'Context', 'enabled': True, 'order': 14},
+    'image_input': {'label': 'Image Input', 'enabled': True, 'order': 15},
+    'release_date': {'label': 'Release Date', 'enabled': False, 'order': 16},
+    'input_price': {'label': 'Input Price', 'enabled': False, 'order': 17},
+    'output_price': {'label': 'Output Price', 'enabled': False, 'order': 18},
+    'cost_per_output': {'label': 'Cost / Output', 'enabled': False, 'order': 19},
+    'quality_per_dollar': {'label': 'Quality / $', 'enabled': False, 'order': 20},
+    'elo': {'label': 'Elo', 'enabled': False, 'order': 21},
+    'actions': {'label': 'Actions', 'enabled': True, 'order': 22}
 }
 
 # Filter Settings Configuration
@@ -754,5 +846,8 @@ FILTER_SETTINGS = {
     'tag': {'label': 'Tag', 'enabled': False, 'order': 7},
     'parameters': {'label': 'Parameters Range', 'enabled': False, 'order': 8},
     'context_window': {'label': 'Context Window Range', 'enabled': False, 'order': 9},
-    'release_date': {'label': 'Release Date Range', 'enabled': False, 'order': 10}
+    'release_date': {'label': 'Release Date Range', 'enabled': False, 'order': 10},
+    'cost': {'label': 'Cost Efficiency', 'enabled': False, 'order': 11},
+    'sort_by': {'label': 'Sort By', 'enabled': True, 'order': 12},
+    'task_weights': {'label': 'Task Weights', 'enabled': False, 'order': 13}
 }
@@ -6,31 +6,92 @@ Creates SQLite database with required tables and provides utility functions.
 import sqlite3
 import json
 import os
+import threading
+from contextlib import contextmanager
 from datetime import datetime
-from typing import Dict, List, Any, Optional, Tuple
-from config import DATABASE, DATA_DIR, MODELS
+from typing import Dict, List, Any, Iterator, Optional, Tuple
+import numpy as np
+from config import DATABASE, DATA_DIR, MODELS, DEFAULT_TASK_EXCLUSIONS, TASK_GROUPS
+from telemetry import instrument_methods
+from profiling import connection_factory
+from model_registry import get_model_registry
+from task_exclusions import EXCLUSION_SCOPES, get_task_exclusions
+from pricing import quality_per_dollar
+from eval.costs import CostEngine
+from eval.history import HistoricalScores, ScoreHistory, get_scores_as_of
+from eval.statistics import get_score_intervals
+from eval.ranking import get_ranking
+from eval.score_matrix import ScoreMatrix, get_score_matrix
+from eval.weighting import TaskSelection, weighted_means
 
 
+class _SnapshotConnection:
+    """Connection proxy handed out inside read_snapshot(); `with` blocks and commits keep the transaction open."""
+    
+    def __init__(self, conn: sqlite3.Connection):
+        self._conn = conn
+    
+    def __getattr__(self, name):
+        return getattr(self._conn, name)
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, exc_type, exc_value, traceback):
+        return False
+    
+    def commit(self) -> None:
+        pass
+
+
+@instrument_methods(skip=('get_connection', 'read_snapshot'))
 class DatabaseManager:
     """Manages SQLite database operations for LLM results."""
     
     def __init__(self, db_path: str = None):
         self.db_path = db_path or os.path.join(DATA_DIR, DATABASE)
         self.ensure_data_dir()
+        self._local = threading.local()
     
     def ensure_data_dir(self):
         """Ensure data directory exists."""
         os.makedirs(DATA_DIR, exist_ok=True)
     
     def get_connection(self) -> sqlite3.Connection:
-        """Get database connection with JSON support."""
-        conn = sqlite3.connect(self.db_path, timeout=30.0)
+        """Get database connection with JSON support (the pinned one inside read_snapshot())."""
+        snapshot = getattr(self._local, 'snapshot', None)
+        if snapshot is not None:
+            return snapshot
+        
+        conn = sqlite3.connect(self.db_path, timeout=30.0, factory=connection_factory())
         conn.row_factory = sqlite3.Row
         # Enable WAL mode for better concurrency
         conn.execute('PRAGMA journal_mode=WAL')
         return conn
     
-    def init_database(self) -> None:
+    @contextmanager
+    def read_snapshot(self):
+        """
+        Pin one connection to the current thread inside a single read transaction.
+        
+        Every get_connection() call made within the block reuses that connection,
+        so all queries see the same consistent snapshot of the database.
+        """
+        if getattr(self._local, 'snapshot', None) is not None:
+            yield self._local.snapshot
+            return
+        
+        conn = self.get_connection()
+        try:
+            conn.execute("BEGIN")
+            self._local.snapshot = _SnapshotConnection(conn)
+            yield self._local.snapshot
+        finally:
+            self._local.snapshot = None
+            conn.rollback()
+            conn.close()
+    
+    def init_database(self, verbose: bool = True) -> None:
         """Initialize database with required tables."""
         with self.get_connection() as conn:
             cursor = conn.cursor()
@@ -66,6 +127,7 @@ class DatabaseManager:
                     output_text TEXT NOT NULL,
                     tokens INTEGER,
                     length INTEGER,
+                    import_id INTEGER,
                     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
                     FOREIGN KEY (task_id) REFERENCES tasks (task_id),
                     FOREIGN KEY (model_key) REFERENCES models (model_key),
@@ -80,12 +142,18 @@ class DatabaseManager:
                     output_id INTEGER NOT NULL,
                     metric_name TEXT NOT NULL,
                     metric_value REAL NOT NULL,
+                    metric_version INTEGER,
                     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
                     FOREIGN KEY (output_id) REFERENCES outputs (id),
                     UNIQUE(output_id, metric_name)
                 )
             """)
             
+            # Add columns introduced after the initial schema
+            self._ensure_column(cursor, 'metrics', 'metric_version', 'INTEGER')
+            self._ensure_column(cursor, 'outputs', 'import_id', 'INTEGER')
+            self._ensure_column(cursor, 'tasks', 'prompt_tokens', 'INTEGER')
+            
             # Create imports table
             cursor.execute("""
                 CREATE TABLE IF NOT EXISTS imports (
@@ -96,14 +164,145 @@ class DatabaseManager:
                 )
             """)
             
+            # Create application state table (data version used for HTTP caching)
+            cursor.execute("""
+                CREATE TABLE IF NOT EXISTS app_state (
+                    key TEXT PRIMARY KEY,
+                    value TEXT,
+                    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+                )
+            """)
+            
+            # Create cost aggregates table (see eval/costs.py; '' = tasks without a group)
+            cursor.execute("""
+                CREATE TABLE IF NOT EXISTS cost_aggregates (
+                    model_key TEXT NOT NULL,
+                    task_group TEXT NOT NULL,
+                    outputs INTEGER NOT NULL,
+                    priced_outputs INTEGER NOT NULL,
+                    input_tokens INTEGER NOT NULL,
+                    output_tokens INTEGER NOT NULL,
+                    input_cost REAL NOT NULL,
+                    output_cost REAL NOT NULL,
+                    total_cost REAL NOT NULL,
+                    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                    PRIMARY KEY (model_key, task_group)
+                )
+            """)
+            
+            # Create task exclusion rules (see task_exclusions.py) and the view
+            # resolving them to task ids for SQL aggregates
+            cursor.execute("""
+                CREATE TABLE IF NOT EXISTS task_exclusions (
+                    scope TEXT NOT NULL CHECK (scope IN ('task', 'task_group')),
+                    value TEXT NOT NULL,
+                    reason TEXT,
+                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                    PRIMARY KEY (scope, value)
+                )
+            """)
+            
+            cursor.execute("""
+                CREATE VIEW IF NOT EXISTS excluded_tasks AS
+                SELECT DISTINCT t.task_id
+                FROM tasks t
+                JOIN task_exclusions e
+                    ON (e.scope = 'task' AND e.value = t.task_id)
+                    OR (e.scope = 'task_group' AND e.value = t.task_group)
+            """)
+            
+            # Seed the default exclusions once, so later edits are not undone
+            cursor.execute("SELECT 1 FROM app_state WHERE key = 'task_exclusions_seeded'")
+            if cursor.fetchone() is None:
+                cursor.executemany("""
+                    INSERT OR IGNORE INTO task_exclusions (scope, value, reason)
+                    VALUES (?, ?, ?)
+                """, DEFAULT_TASK_EXCLUSIONS)
+                cursor.execute("INSERT INTO app_state (key, value) VALUES ('task_exclusions_seeded', '1')")
+            
+            # Create score history tables (see eval/history.py): cells changed by
+            # each import (present = 0: output removed) and periodic full snapshots
+            cursor.execute("""
+                CREATE TABLE IF NOT EXISTS score_history (
+                    import_id INTEGER NOT NULL,
+                    model_key TEXT NOT NULL,
+                    task_id TEXT NOT NULL,
+                    present INTEGER NOT NULL,
+                    quality_score REAL,
+                    rouge_l REAL,
+                    bert_score REAL,
+                    tokens REAL,
+                    PRIMARY KEY (import_id, model_key, task_id)
+                )
+            """)
+            
+            cursor.execute("""
+                CREATE TABLE IF NOT EXISTS score_snapshots (
+                    import_id INTEGER NOT NULL,
+                    model_key TEXT NOT NULL,
+                    task_id TEXT NOT NULL,
+                    quality_score REAL,
+                    rouge_l REAL,
+                    bert_score REAL,
+                    tokens REAL,
+                    PRIMARY KEY (import_id, model_key, task_id)
+                )
+            """)
+            
+            # Create near-duplicate index tables (MinHash signatures and LSH buckets)
+            cursor.execute("""
+                CREATE TABLE IF NOT EXISTS minhash_signatures (
+                    output_id INTEGER PRIMARY KEY,
+                    task_id TEXT NOT NULL,
+                    model_key TEXT NOT NULL,
+                    signature BLOB NOT NULL,
+                    FOREIGN KEY (output_id) REFERENCES outputs (id)
+                )
+            """)
+            
+            cursor.execute("""
+                CREATE TABLE IF NOT EXISTS lsh_buckets (
+                    task_id TEXT NOT NULL,
+                    band INTEGER NOT NULL,
+                    bucket INTEGER NOT NULL,
+                    output_id INTEGER NOT NULL,
+                    PRIMARY KEY (task_id, band, bucket, output_id)
+                )
+            """)
+            
             # Create indexes for better query performance
             cursor.execute("CREATE INDEX IF NOT EXISTS idx_outputs_task_model ON outputs(task_id, model_key)")
             cursor.execute("CREATE INDEX IF NOT EXISTS idx_metrics_output ON metrics(output_id)")
             cursor.execute("CREATE INDEX IF NOT EXISTS idx_metrics_name ON metrics(metric_name)")
+            cursor.execute("CREATE INDEX IF NOT EXISTS idx_metrics_name_version ON metrics(metric_name, metric_version)")
             cursor.execute("CREATE INDEX IF NOT EXISTS idx_tasks_group ON tasks(task_group)")
+            cursor.execute("CREATE INDEX IF NOT EXISTS idx_lsh_buckets_output ON lsh_buckets(output_id)")
+            cursor.execute("CREATE INDEX IF NOT EXISTS idx_outputs_import ON outputs(import_id)")
             
             conn.commit()
-            print("Database initialized successfully.")
+            
+            # Backfill cost aggregates of databases created before they existed
+            cursor.execute("SELECT EXISTS(SELECT 1 FROM cost_aggregates), EXISTS(SELECT 1 FROM outputs)")
+            has_costs, has_outputs = cursor.fetchone()
+            if has_outputs and not has_costs:
+                CostEngine(self).refresh(cursor)
+                self.bump_data_version(cursor)
+                conn.commit()
+            
+            # Start the score history of databases created before it existed
+            cursor.execute("SELECT EXISTS(SELECT 1 FROM score_snapshots), (SELECT MAX(id) FROM imports)")
+            has_history, last_import = cursor.fetchone()
+            if last_import is not None and not has_history:
+                ScoreHistory(self).record(cursor, last_import)
+                conn.commit()
+            if verbose:
+                print("Database initialized successfully.")
+    
+    def _ensure_column(self, cursor: sqlite3.Cursor, table: str, column: str, definition: str) -> None:
+        """Add a column to an existing table if it is missing (lightweight migration)."""
+        cursor.execute(f"PRAGMA table_info({table})")
+        if column not in [row[1] for row in cursor.fetchall()]:
+            cursor.execute(f"ALTER TABLE {table} ADD COLUMN {column} {definition}")
     
     def populate_models(self) -> None:
         """Populate models table with configuration data."""
@@ -119,70 +318,174 @@ class DatabaseManager:
                 except Exception as e:
                     print(f"Error inserting model {model_key}: {e}")
             
+            self.bump_data_version(cursor)
+            conn.commit()
+            
+            # Prices may have changed: reprice everything with the new model registry
+            CostEngine(self).refresh(cursor)
+            self.bump_data_version(cursor)
             conn.commit()
             print(f"Populated {len(MODELS)} models.")
     
+    def _select_list(self, fields: Optional[List[str]], columns: Dict[str, str],
+                     required: Tuple[str, ...] = ()) -> str:
+        """Build a SELECT list for the requested fields, rejecting unknown names."""
+        unknown = [f for f in fields if f not in columns]
+        if unknown:
+            raise ValueError(f"Unknown fields: {', '.join(unknown)}")
+        selected = list(required) + [f for f in fields if f not in required]
+        return ', '.join(f"{columns[f]} AS {f}" for f in selected)
+    
+    # model_key, name and every metadata key of the configured models
+    MODEL_FIELDS = frozenset(['model_key', 'name', *(key for meta in MODELS.values() for key in meta)])
+    
     def get_models(self, open_source: Optional[bool] = None, 
                    tag: Optional[str] = None, 
                    reasoning: Optional[bool] = None,
-                   language: Optional[str] = None) -> List[Dict[str, Any]]:
-        """Get models with optional filtering."""
+                   language: Optional[str] = None,
+                   fields: Optional[List[str]] = None,
+                   limit: Optional[int] = None,
+                   after: Optional[str] = None) -> List[Dict[str, Any]]:
+        """
+        Get models with optional filtering.
+        
+        `fields` restricts the returned keys (model_key is always included, and the
+        meta column is not read when only model_key/name are requested);
+        `limit`/`after` page through models by model_key.
+        """
+        if fields is not None:
+            unknown = [f for f in fields if f not in self.MODEL_FIELDS]
+            if unknown:
+                raise ValueError(f"Unknown fields: {', '.join(unknown)}")
+        has_filters = any(v is not None for v in (open_source, tag, reasoning, language))
+        needs_meta = has_filters or fields is None or any(f not in ('model_key', 'name') for f in fields)
+        registry = get_model_registry(self) if needs_meta else None
+        
         with self.get_connection() as conn:
             cursor = conn.cursor()
-            cursor.execute("SELECT model_key, name, meta FROM models")
+            query = "SELECT model_key, name FROM models"
+            params = []
+            
+            if after:
+                query += " WHERE model_key > ?"
+                params.append(after)
+            if limit or after:
+                query += " ORDER BY model_key"
+            if limit and not has_filters:
+                query += " LIMIT ?"
+                params.append(limit)
+            
+            cursor.execute(query, params)
             
             models = []
-            for row in cursor.fetchall():
-                meta = json.loads(row['meta'])
+            for row in cursor:
+                record = registry.get(row['model_key']) if registry else None
                 model = {
                     'model_key': row['model_key'],
                     'name': row['name'],
-                    **meta
+                    **(record.meta if record else {})
                 }
                 
                 # Apply filters
-                if open_source is not None and meta.get('open_source') != open_source:
-                    continue
-                if tag and tag not in meta.get('tags', []):
-                    continue
-                if reasoning is not None and meta.get('reasoning') != reasoning:
-                    continue
-                if language and language not in meta.get('languages', []):
-                    continue
+                if has_filters:
+                    if record is None:
+                        continue
+                    if open_source is not None and record.open_source != open_source:
+                        continue
+                    if tag and tag not in record.tags:
+                        continue
+                    if reasoning is not None and record.reasoning != reasoning:
+                        continue
+                    if language and language not in record.languages:
+                        continue
                 
+                if fields is not None:
+                    model = {f: model[f] for f in ['model_key', *fields] if f in model}
                 models.append(model)
+                
+                if limit and len(models) >= limit:
+                    break
             
             return models
     
-    def get_tasks(self, task_group: Optional[str] = None) -> List[Dict[str, Any]]:
-        """Get tasks with optional filtering."""
+    TASK_FIELDS = {
+        'task_id': 'task_id',
+        'task_name': 'task_name',
+        'prompt_text': 'prompt_text',
+        'task_group': 'task_group',
+        'created_at': 'created_at',
+    }
+    
+    def get_tasks(self, task_group: Optional[str] = None,
+                  fields: Optional[List[str]] = None,
+                  limit: Optional[int] = None,
+                  after: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Get tasks ordered by task_id, with optional filtering, projection and keyset paging."""
         with self.get_connection() as conn:
             cursor = conn.cursor()
             
-            query = "SELECT * FROM tasks"
+            select = self._select_list(fields, self.TASK_FIELDS, required=('task_id',)) if fields else "*"
+            query = f"SELECT {select} FROM tasks WHERE 1=1"
             params = []
             
             if task_group:
-                query += " WHERE task_group = ?"
+                query += " AND task_group = ?"
                 params.append(task_group)
+            if after:
+                query += " AND task_id > ?"
+                params.append(after)
+            
+            query += " ORDER BY task_id"
+            if limit:
+                query += " LIMIT ?"
+                params.append(limit)
             
             cursor.execute(query, params)
             return [dict(row) for row in cursor.fetchall()]
     
-    def get_task_outputs(self, task_id: str, model_keys: List[str] = None) -> List[Dict[str, Any]]:
-        """Get outputs for a specific task, optionally filtered by models."""
+    OUTPUT_FIELDS = {
+        'id': 'o.id',
+        'task_id': 'o.task_id',
+        'model_key': 'o.model_key',
+        'output_text': 'o.output_text',
+        'tokens': 'o.tokens',
+        'length': 'o.length',
+        'created_at': 'o.created_at',
+        'model_name': 'm.name',
+        'model_meta': 'm.meta',
+    }
+    OUTPUT_METRIC_FIELDS = ('quality_score', 'rouge_l', 'bert_score', 'semantic_similarity', 'exact_match')
+    
+    def get_task_outputs(self, task_id: str, model_keys: List[str] = None,
+                         fields: Optional[List[str]] = None,
+                         limit: Optional[int] = None,
+                         after: Optional[int] = None) -> List[Dict[str, Any]]:
+        """
+        Get outputs for a specific task, optionally filtered by models.
+        
+        `fields` is pushed down into the SELECT list, so large columns such as
+        output_text and model_meta are only read when requested (the output id is
+        always included); `limit`/`after` page through outputs by output id.
+        """
         with self.get_connection() as conn:
             cursor = conn.cursor()
             
-            query = """
-                SELECT 
-                    o.*, 
-                    m.name as model_name, 
-                    m.meta as model_meta,
-                    GROUP_CONCAT(met.metric_name || ':' || met.metric_value) as metrics
+            if fields is None:
+                select = "o.*, m.name as model_name, m.meta as model_meta"
+                metric_fields = list(self.OUTPUT_METRIC_FIELDS)
+            else:
+                metric_fields = [f for f in fields if f in self.OUTPUT_METRIC_FIELDS]
+                column_fields = [f for f in fields if f not in self.OUTPUT_METRIC_FIELDS]
+                select = self._select_list(column_fields, self.OUTPUT_FIELDS, required=('id',))
+            
+            if metric_fields:
+                select += ", GROUP_CONCAT(met.metric_name || ':' || met.metric_value) as metrics"
+            
+            query = f"""
+                SELECT {select}
                 FROM outputs o
                 JOIN models m ON o.model_key = m.model_key
-                LEFT JOIN metrics met ON o.id = met.output_id
+                {'LEFT JOIN metrics met ON o.id = met.output_id' if metric_fields else ''}
                 WHERE o.task_id = ?
             """
             params = [task_id]
@@ -191,24 +494,35 @@ class DatabaseManager:
                 placeholders = ','.join('?' * len(model_keys))
                 query += f" AND o.model_key IN ({placeholders})"
                 params.extend(model_keys)
+            if after is not None:
+                query += " AND o.id > ?"
+                params.append(after)
                 
-            query += " GROUP BY o.id, m.name, m.meta"
+            query += " GROUP BY o.id ORDER BY o.id"
+            if limit:
+                query += " LIMIT ?"
+                params.append(limit)
             
             cursor.execute(query, params)
             results = []
+            registry = get_model_registry(self) if fields is None or 'model_meta' in fields else None
             
             for row in cursor.fetchall():
                 result = dict(row)
-                result['model_meta'] = json.loads(row['model_meta'])
+                metrics = result.pop('metrics', None)
+                if 'model_meta' in result:
+                    record = registry.get(result.get('model_key'))
+                    result['model_meta'] = record.meta if record else json.loads(result['model_meta'])
                 
                 # Parse metrics and add them directly to result object
-                if row['metrics']:
-                    for metric_pair in row['metrics'].split(','):
+                if metrics:
+                    for metric_pair in metrics.split(','):
                         name, value = metric_pair.split(':')
-                        result[name] = float(value)
+                        if fields is None or name in metric_fields:
+                            result[name] = float(value)
                 
                 # Ensure all metric fields exist (set to None if missing)
-                for metric in ['quality_score', 'rouge_l', 'bert_score', 'semantic_similarity', 'exact_match']:
+                for metric in metric_fields:
                     if metric not in result:
                         result[metric] = None
                         
@@ -216,133 +530,357 @@ class DatabaseManager:
             
             return results
     
-    def get_leaderboard_data(self, filters: Dict[str, Any] = None) -> List[Dict[str, Any]]:
-        """Get aggregated leaderboard data with filtering."""
+    LEADERBOARD_FIELDS = {
+        'name': 'm.name',
+        'meta': 'm.meta',
+        'task_count': 'COUNT(DISTINCT o.task_id)',
+        'avg_tokens': 'AVG(o.tokens)',
+        # Excluded tasks (see task_exclusions.py) do not count towards quality score averages
+        'avg_quality_score': """AVG(CASE 
+                        WHEN met.metric_name = 'quality_score'
+                            AND o.task_id NOT IN (SELECT task_id FROM excluded_tasks)
+                        THEN met.metric_value 
+                    END)""",
+        'avg_rouge_l': "AVG(CASE WHEN met.metric_name = 'rouge_l' THEN met.metric_value END)",
+        'avg_bert_score': "AVG(CASE WHEN met.metric_name = 'bert_score' THEN met.metric_value END)",
+    }
+    # Computed after aggregation from the stored cost aggregates (see
+    # eval/costs.py); cheaper is better for cost, so it sorts ascending
+    LEADERBOARD_DERIVED_FIELDS = ('cost_per_output', 'quality_per_dollar')
+    LEADERBOARD_COST_FILTERS = ('max_cost_per_output', 'min_quality_per_dollar')
+    # Bootstrap interval of avg_quality_score (see eval/statistics.py)
+    LEADERBOARD_CI_FIELDS = ('quality_ci_low', 'quality_ci_high')
+    # Bradley-Terry rating from head-to-head results on shared tasks (see eval/ranking.py)
+    LEADERBOARD_RANKING_FIELDS = ('elo',)
+    # Custom task selection (see eval/weighting.py): weights is a tuple of
+    # (task_group, weight) pairs, include_tasks/exclude_tasks tuples of task ids
+    LEADERBOARD_TASK_FILTERS = ('weights', 'include_tasks', 'exclude_tasks')
+    # Averages recomputed from the score matrices for a custom task selection: (metric, matrix field)
+    LEADERBOARD_WEIGHTED_FIELDS = {
+        'avg_quality_score': ('quality_score', 'scores'),
+        'avg_rouge_l': ('rouge_l', 'scores'),
+        'avg_bert_score': ('bert_score', 'scores'),
+        'avg_tokens': ('quality_score', 'tokens'),
+    }
+    LEADERBOARD_META_FILTERS = (
+        'open_source', 'reasoning', 'image_input', 'provider', 'tag', 'language',
+        'min_parameters', 'max_parameters', 'min_context', 'max_context', 'min_date', 'max_date',
+    )
+    
+    def get_leaderboard_data(self, filters: Dict[str, Any] = None,
+                             fields: Optional[List[str]] = None,
+                             limit: Optional[int] = None,
+                             after: Optional[str] = None) -> List[Dict[str, Any]]:
+        """
+        Get aggregated leaderboard data with filtering.
+        
+        `fields` is pushed down into the SELECT list (model_key is always returned);
+        `after` is the model_key of the last row of the previous page and `limit`
+        the page size, applied to the ranked and filtered result.
+        """
         filters = filters or {}
         
+        sort_by = filters.get('sort_by', 'avg_quality_score')
+        derived_sort = sort_by if sort_by in self.LEADERBOARD_DERIVED_FIELDS + self.LEADERBOARD_RANKING_FIELDS else None
+        if sort_by not in ['avg_quality_score', 'avg_rouge_l', 'avg_bert_score', 'avg_tokens', 'task_count']:
+            sort_by = None
+        needs_meta = any(filters.get(k) is not None for k in self.LEADERBOARD_META_FILTERS)
+        needs_cost = (fields is None or derived_sort in self.LEADERBOARD_DERIVED_FIELDS
+                      or any(f in self.LEADERBOARD_DERIVED_FIELDS for f in fields)
+                      or any(filters.get(k) is not None for k in self.LEADERBOARD_COST_FILTERS))
+        needs_ci = fields is None or any(f in self.LEADERBOARD_CI_FIELDS for f in fields)
+        needs_elo = fields is None or derived_sort == 'elo' or 'elo' in fields
+        excluded_tasks = self.get_excluded_tasks()
+        
+        # Past standings (see eval/history.py) are computed from the score
+        # history instead of the current aggregates; costs are only known for now
+        history = past_matrix = None
+        if filters.get('as_of') is not None:
+            history = get_scores_as_of(self, filters['as_of'])
+            past_matrix = history.matrix('quality_score')
+            if (derived_sort in self.LEADERBOARD_DERIVED_FIELDS
+                    or any(filters.get(k) is not None for k in self.LEADERBOARD_COST_FILTERS)
+                    or (fields is not None and any(f in self.LEADERBOARD_DERIVED_FIELDS for f in fields))):
+                raise ValueError("Cost fields are not available with as_of")
+            needs_cost = False
+        custom_tasks = history is not None or any(filters.get(k) for k in self.LEADERBOARD_TASK_FILTERS)
+        
+        if fields is None:
+            selected = list(self.LEADERBOARD_FIELDS)
+        else:
+            unknown = [f for f in fields if f != 'model_key' and f not in self.LEADERBOARD_FIELDS
+                       and f not in self.LEADERBOARD_DERIVED_FIELDS and f not in self.LEADERBOARD_CI_FIELDS
+                       and f not in self.LEADERBOARD_RANKING_FIELDS]
+            if unknown:
+                raise ValueError(f"Unknown fields: {', '.join(unknown)}")
+            cost_inputs = ('avg_quality_score',) if needs_cost else ()
+            selected = [f for f in self.LEADERBOARD_FIELDS
+                        if f in fields or f == sort_by or f in cost_inputs or (f == 'meta' and needs_meta)]
+        
         with self.get_connection() as conn:
             cursor = conn.cursor()
             
-            # Base query with model metadata filtering
-            # Exclude research_018 from quality score averages as many models lack research capabilities
-            query = """
-                SELECT 
-                    m.model_key,
-                    m.name,
-                    m.meta,
-                    COUNT(DISTINCT o.task_id) as task_count,
-                    AVG(o.tokens) as avg_tokens,
-                    AVG(CASE 
-                        WHEN met.metric_name = 'quality_score' AND o.task_id != 'research_018' 
-                        THEN met.metric_value 
-                    END) as avg_quality_score,
-                    AVG(CASE WHEN met.metric_name = 'rouge_l' THEN met.metric_value END) as avg_rouge_l,
-                    AVG(CASE WHEN met.metric_name = 'bert_score' THEN met.metric_value END) as avg_bert_score
-                FROM models m
-                LEFT JOIN outputs o ON m.model_key = o.model_key
-                LEFT JOIN metrics met ON o.id = met.output_id
-                LEFT JOIN tasks t ON o.task_id = t.task_id
-                WHERE 1=1
-            """
+            # Base query; metadata comes from the model registry, not the meta JSON column.
+            # A custom task selection takes every aggregate from the score matrices,
+            # so only the model columns are read
+            columns = [f for f in selected if f != 'meta' and (f == 'name' or not custom_tasks)]
+            select = ',\n                    '.join(
+                ['m.model_key'] + [f"{self.LEADERBOARD_FIELDS[f]} as {f}" for f in columns]
+            )
             params = []
-            
-            # Apply task group filter
-            if filters.get('task_group'):
-                query += " AND t.task_group = ?"
-                params.append(filters['task_group'])
-            
-            query += " GROUP BY m.model_key, m.name, m.meta"
-            
-            # Apply sorting
-            sort_by = filters.get('sort_by', 'avg_quality_score')
-            if sort_by in ['avg_quality_score', 'avg_rouge_l', 'avg_bert_score', 'avg_tokens', 'task_count']:
-                query += f" ORDER BY {sort_by} DESC NULLS LAST"
+            if custom_tasks:
+                query = f"SELECT {select} FROM models m ORDER BY m.model_key"
+            else:
+                query = f"""
+                    SELECT 
+                        {select}
+                    FROM models m
+                    LEFT JOIN outputs o ON m.model_key = o.model_key
+                    LEFT JOIN metrics met ON o.id = met.output_id
+                    LEFT JOIN tasks t ON o.task_id = t.task_id
+                    WHERE 1=1
+                """
+                
+                # Apply task group filter
+                if filters.get('task_group'):
+                    query += " AND t.task_group = ?"
+                    params.append(filters['task_group'])
+                
+                query += " GROUP BY m.model_key"
+                
+                # Apply sorting
+                if sort_by:
+                    query += f" ORDER BY {sort_by} DESC NULLS LAST, m.model_key"
             
             cursor.execute(query, params)
             results = []
+            registry = get_model_registry(self)
+            min_date = filters.get('min_date')
+            max_date = filters.get('max_date')
             
             for row in cursor.fetchall():
-                meta = json.loads(row['meta'])
                 result = dict(row)
-                result['meta'] = meta
-                
-                # Apply metadata-based filters
-                if filters.get('open_source') is not None and meta.get('open_source') != filters['open_source']:
-                    continue
-                if filters.get('reasoning') is not None and meta.get('reasoning') != filters['reasoning']:
-                    continue
-                if filters.get('image_input') is not None and meta.get('image_input') != filters['image_input']:
-                    continue
-                if filters.get('provider') and meta.get('provider') != filters['provider']:
-                    continue
-                if filters.get('tag') and filters['tag'] not in meta.get('tags', []):
-                    continue
-                if filters.get('language') and filters['language'] not in meta.get('languages', []):
-                    continue
+                record = registry.get(row['model_key'])
+                if 'meta' in selected:
+                    result['meta'] = record.meta if record else {}
                 
-                # Apply numeric range filters with type conversion
-                def safe_int(value, default=0):
-                    """Safely convert value to int, handling strings like '1000B'."""
-                    if isinstance(value, int):
-                        return value
-                    if isinstance(value, str):
-                        # Remove 'B' suffix if present and convert
-                        cleaned = value.rstrip('B').rstrip('b')
-                        try:
-                            return int(cleaned)
-                        except ValueError:
-                            return default
-                    return default
-                
-                def safe_context_int(value, default=0):
-                    """Safely convert context window value to int, handling strings like '128K'."""
-                    if isinstance(value, int):
-                        return value
-                    if isinstance(value, str):
-                        # Remove 'K' suffix if present and convert
-                        cleaned = value.rstrip('K').rstrip('k')
-                        try:
-                            return int(cleaned)
-                        except ValueError:
-                            return default
-                    return default
-                
-                # Parameters filtering
-                if filters.get('min_parameters'):
-                    params_value = safe_int(meta.get('parameters', 0))
-                    if params_value < filters['min_parameters']:
+                if needs_meta:
+                    if record is None:
+                        continue
+                    
+                    # Apply metadata-based filters
+                    if filters.get('open_source') is not None and record.open_source != filters['open_source']:
                         continue
-                if filters.get('max_parameters'):
-                    params_value = safe_int(meta.get('parameters', 0))
-                    if params_value > filters['max_parameters']:
+                    if filters.get('reasoning') is not None and record.reasoning != filters['reasoning']:
                         continue
-                        
-                # Context window filtering
-                if filters.get('min_context'):
-                    context_value = safe_context_int(meta.get('context_window', 0))
-                    if context_value < filters['min_context']:
+                    if filters.get('image_input') is not None and record.image_input != filters['image_input']:
                         continue
-                if filters.get('max_context'):
-                    context_value = safe_context_int(meta.get('context_window', 0))
-                    if context_value > filters['max_context']:
+                    if filters.get('provider') and record.provider != filters['provider']:
+                        continue
+                    if filters.get('tag') and filters['tag'] not in record.tags:
+                        continue
+                    if filters.get('language') and filters['language'] not in record.languages:
+                        continue
+                    
+                    # Numeric range filters (parameters in billions, context in thousands of tokens)
+                    parameters = record.parameters or 0
+                    if filters.get('min_parameters') and parameters < filters['min_parameters']:
+                        continue
+                    if filters.get('max_parameters') and parameters > filters['max_parameters']:
+                        continue
+                    context = (record.context_tokens or 0) // 1000
+                    if filters.get('min_context') and context < filters['min_context']:
+                        continue
+                    if filters.get('max_context') and context > filters['max_context']:
+                        continue
+                    
+                    # Date range filters (models without a release date only pass max_date)
+                    release_date = record.release_date.isoformat() if record.release_date else ''
+                    if min_date and release_date < min_date:
+                        continue
+                    if max_date and release_date > max_date:
                         continue
-                
-                # Apply date range filters
-                if filters.get('min_date') and meta.get('release_date', '') < filters['min_date']:
-                    continue
-                if filters.get('max_date') and meta.get('release_date', '') > filters['max_date']:
-                    continue
                 
                 results.append(result)
             
+            if custom_tasks:
+                results, excluded_tasks = self._apply_task_weights(results, filters, selected, sort_by, history)
+            if needs_cost:
+                results = self._apply_cost_efficiency(
+                    cursor, results, filters,
+                    derived_sort if derived_sort in self.LEADERBOARD_DERIVED_FIELDS else None)
+            if needs_ci:
+                intervals = get_score_intervals(self, filters.get('task_group'), excluded_tasks, past_matrix)
+                for result in results:
+                    low, high = intervals.get(result['model_key'])
+                    result['quality_ci_low'] = round(low, 2) if low is not None else None
+                    result['quality_ci_high'] = round(high, 2) if high is not None else None
+            if needs_elo:
+                ranking = get_ranking(self, filters.get('task_group'), excluded_tasks, past_matrix)
+                for result in results:
+                    elo = ranking.get(result['model_key'])
+                    result['elo'] = round(elo, 1) if elo is not None else None
+                if derived_sort == 'elo':
+                    # Stable: ties keep the model_key order; models without games go last
+                    results.sort(key=lambda r: -r['elo'] if r['elo'] is not None else float('inf'))
+            if fields is not None:
+                results = [{f: r[f] for f in ['model_key', *fields] if f in r} for r in results]
+            
+            # Keyset pagination over the ranked result
+            if after:
+                keys = [r['model_key'] for r in results]
+                results = results[keys.index(after) + 1:] if after in keys else []
+            if limit:
+                results = results[:limit]
+            
             return results
     
-    def get_tasks(self) -> List[Dict[str, Any]]:
-        """Get all available tasks."""
+    def _apply_task_weights(self, results: List[Dict[str, Any]], filters: Dict[str, Any],
+                            selected: List[str], sort_by: Optional[str],
+                            history: Optional[HistoricalScores] = None) -> Tuple[List[Dict[str, Any]], Tuple[str, ...]]:
+        """
+        Recompute the averages of leaderboard rows over a weighted task selection, then re-sort.
+        
+        Each average is one matrix-vector product over the cached score matrix
+        instead of a new aggregate query. With `history` the matrices of that
+        past import are used, and models without outputs at the time are dropped.
+        
+        Returns:
+            (rows, excluded): the rows and the tasks that do not count towards
+            the quality score, so the interval and ranking fields use the same selection
+        """
+        weights = dict(filters.get('weights') or ())
+        include = filters.get('include_tasks') or None
+        excluded = filters.get('exclude_tasks') or ()
+        selection = TaskSelection(weights, include, excluded, filters.get('task_group'))
+        # Exclusion rules only apply to quality scores; explicitly included tasks override them
+        rule_excluded = [t for t in self.get_excluded_tasks() if include is None or t not in include]
+        quality_selection = TaskSelection(weights, include, [*rule_excluded, *excluded], filters.get('task_group'))
+        
+        def matrix_of(metric: str) -> Optional[ScoreMatrix]:
+            return history.matrix(metric) if history is not None else None
+        
+        quality = matrix_of('quality_score') or get_score_matrix(self, 'quality_score')
+        counts = quality.coverage.astype(np.int64) @ (selection.weights(quality) > 0)
+        if history is not None:
+            results = [r for r in results
+                       if r['model_key'] in quality.model_index and counts[quality.model_index[r['model_key']]]]
+        
+        for field in selected:
+            if field in self.LEADERBOARD_WEIGHTED_FIELDS:
+                metric, matrix_field = self.LEADERBOARD_WEIGHTED_FIELDS[field]
+                field_selection = quality_selection if field == 'avg_quality_score' else selection
+                matrix, means = weighted_means(self, field_selection, metric, matrix_field, matrix_of(metric))
+                for result in results:
+                    i = matrix.model_index.get(result['model_key'])
+                    result[field] = None if i is None or np.isnan(means[i]) else float(means[i])
+            elif field == 'task_count':
+                for result in results:
+                    i = quality.model_index.get(result['model_key'])
+                    result[field] = 0 if i is None else int(counts[i])
+        
+        if sort_by:
+            # Same order as the SQL: descending, missing values last, then model_key
+            results.sort(key=lambda r: (r[sort_by] is None, -(r[sort_by] or 0), r['model_key']))
+        
+        weights = quality_selection.weights(quality)
+        return results, tuple(task_id for task_id, weight in zip(quality.task_ids, weights) if weight == 0)
+    
+    def _apply_cost_efficiency(self, cursor: sqlite3.Cursor, results: List[Dict[str, Any]],
+                               filters: Dict[str, Any], sort_by: Optional[str]) -> List[Dict[str, Any]]:
+        """Add cost_per_output and quality_per_dollar to leaderboard rows, then filter and sort on them."""
+        if not results:
+            return results
+        
+        # Mean cost of a priced output (input and output tokens) from the stored aggregates
+        query = "SELECT model_key, SUM(total_cost), SUM(priced_outputs) FROM cost_aggregates"
+        params = []
+        if filters.get('task_group'):
+            query += " WHERE task_group = ?"
+            params.append(filters['task_group'])
+        cursor.execute(query + " GROUP BY model_key", params)
+        per_output = {model_key: total / priced for model_key, total, priced in cursor.fetchall() if priced}
+        cost = np.array([per_output.get(r['model_key']) for r in results], dtype=np.float64)
+        value = quality_per_dollar(cost, [r.get('avg_quality_score') for r in results])
+        
+        # Free models have no finite quality per dollar but beat every paid one
+        quality = np.array([r.get('avg_quality_score') for r in results], dtype=np.float64)
+        free = (cost == 0) & ~np.isnan(quality)
+        
+        keep = np.ones(len(results), dtype=bool)
+        if filters.get('max_cost_per_output') is not None:
+            keep &= cost <= filters['max_cost_per_output']
+        if filters.get('min_quality_per_dollar') is not None:
+            keep &= (value >= filters['min_quality_per_dollar']) | free
+        
+        order = np.flatnonzero(keep)
+        if sort_by is not None:
+            # Ties are broken by quality, then by model_key order; unknown values go last
+            key = cost if sort_by == 'cost_per_output' else np.where(free, -np.inf, -value)
+            key = np.where(np.isnan(key), np.inf, key)[order]
+            tiebreak = np.where(np.isnan(quality), np.inf, -quality)[order]
+            order = order[np.lexsort((tiebreak, key))]
+        
+        rounded_cost = np.round(cost, 6)
+        rounded_value = np.round(value, 1)
+        rows = []
+        for i in order:
+            row = results[i]
+            row['cost_per_output'] = None if np.isnan(cost[i]) else float(rounded_cost[i])
+            row['quality_per_dollar'] = None if np.isnan(value[i]) else float(rounded_value[i])
+            rows.append(row)
+        return rows
+    
+    COST_FIELDS = ('outputs', 'priced_outputs', 'input_tokens', 'output_tokens',
+                   'input_cost', 'output_cost', 'total_cost')
+    
+    def get_cost_summary(self, model_keys: Optional[List[str]] = None,
+                         task_group: Optional[str] = None) -> List[Dict[str, Any]]:
+        """
+        Estimated cost of running the task suite, per model with a per-task-group breakdown.
+        
+        Costs are in USD; cost_per_output is the mean cost of an output whose
+        tokens and prices are known.
+        """
+        query = """
+            SELECT c.*, m.name
+            FROM cost_aggregates c
+            JOIN models m ON m.model_key = c.model_key
+            WHERE 1=1
+        """
+        params = []
+        if model_keys:
+            query += f" AND c.model_key IN ({','.join('?' * len(model_keys))})"
+            params.extend(model_keys)
+        if task_group:
+            query += " AND c.task_group = ?"
+            params.append(task_group)
+        query += " ORDER BY c.model_key, c.task_group"
+        
         with self.get_connection() as conn:
             cursor = conn.cursor()
-            cursor.execute("SELECT * FROM tasks ORDER BY task_id")
-            return [dict(row) for row in cursor.fetchall()]
+            cursor.execute(query, params)
+            
+            summaries: Dict[str, Dict[str, Any]] = {}
+            for row in cursor.fetchall():
+                summary = summaries.get(row['model_key'])
+                if summary is None:
+                    summary = summaries[row['model_key']] = {
+                        'model_key': row['model_key'], 'name': row['name'],
+                        **{field: 0 for field in self.COST_FIELDS}, 'task_groups': []
+                    }
+                group = {'task_group': row['task_group'] or None,
+                         **{field: row[field] for field in self.COST_FIELDS}}
+                group['cost_per_output'] = (row['total_cost'] / row['priced_outputs']
+                                            if row['priced_outputs'] else None)
+                summary['task_groups'].append(group)
+                for field in self.COST_FIELDS:
+                    summary[field] += row[field]
+            
+            for summary in summaries.values():
+                summary['cost_per_output'] = (summary['total_cost'] / summary['priced_outputs']
+                                              if summary['priced_outputs'] else None)
+            return list(summaries.values())
     
     def get_model_details(self, model_key: str) -> Optional[Dict[str, Any]]:
         """Get detailed information about a specific model."""
@@ -357,7 +895,8 @@ class DatabaseManager:
                 return None
             
             model = dict(model_row)
-            model['meta'] = json.loads(model['meta'])
+            record = get_model_registry(self).get(model_key)
+            model['meta'] = record.meta if record else json.loads(model['meta'])
             
             # Get per-task metrics
             cursor.execute("""
@@ -375,8 +914,10 @@ class DatabaseManager:
             """, (model_key,))
             
             tasks = []
+            exclusions = get_task_exclusions(self)
             for row in cursor.fetchall():
                 task = dict(row)
+                task['excluded'] = task['task_id'] in exclusions
                 # Parse metrics and add them directly to task object
                 if row['metrics']:
                     for metric_pair in row['metrics'].split(','):
@@ -393,6 +934,72 @@ class DatabaseManager:
             model['tasks'] = tasks
             return model
     
+    def iter_export_rows(self, model_keys: Optional[List[str]] = None,
+                         task_group: Optional[str] = None,
+                         import_id: Optional[int] = None,
+                         include_output_text: bool = True) -> Iterator[Dict[str, Any]]:
+        """
+        Stream one row per output (task x model) with its metrics.
+        
+        Rows are read straight from the cursor in output id order, so memory use
+        stays constant regardless of how many outputs are exported.
+        """
+        query = f"""
+            SELECT
+                o.id AS output_id,
+                o.task_id,
+                t.task_name,
+                t.task_group,
+                o.model_key,
+                m.name AS model_name,
+                o.import_id,
+                o.tokens,
+                o.length,
+                {'o.output_text,' if include_output_text else ''}
+                GROUP_CONCAT(met.metric_name || ':' || met.metric_value) AS metrics
+            FROM outputs o
+            JOIN tasks t ON o.task_id = t.task_id
+            JOIN models m ON o.model_key = m.model_key
+            LEFT JOIN metrics met ON o.id = met.output_id
+            WHERE 1=1
+        """
+        params = []
+        
+        if model_keys:
+            placeholders = ','.join('?' * len(model_keys))
+            query += f" AND o.model_key IN ({placeholders})"
+            params.extend(model_keys)
+        if task_group:
+            query += " AND t.task_group = ?"
+            params.append(task_group)
+        if import_id is not None:
+            query += " AND o.import_id = ?"
+            params.append(import_id)
+        
+        query += " GROUP BY o.id ORDER BY o.id"
+        
+        conn = self.get_connection()
+        try:
+            cursor = conn.execute(query, params)
+            for row in cursor:
+                result = dict(row)
+                metrics = result.pop('metrics')
+                if metrics:
+                    for metric_pair in metrics.split(','):
+                        name, value = metric_pair.split(':', 1)
+                        result[name] = float(value)
+                yield result
+        finally:
+            if not isinstance(conn, _SnapshotConnection):
+                conn.close()
+    
+    def get_metric_names(self) -> List[str]:
+        """Get the names of all stored metrics."""
+        with self.get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute("SELECT DISTINCT metric_name FROM metrics ORDER BY metric_name")
+            return [row[0] for row in cursor.fetchall()]
+    
     def insert_import_record(self, source_file: str, notes: str = None) -> int:
         """Insert import record and return its ID."""
         with self.get_connection() as conn:
@@ -404,9 +1011,102 @@ class DatabaseManager:
             conn.commit()
             return cursor.lastrowid
 
+    def bump_data_version(self, cursor: sqlite3.Cursor = None) -> None:
+        """Increment the data version; call after any change to stored results."""
+        query = """
+            INSERT INTO app_state (key, value, updated_at)
+            VALUES ('data_version', '1', CURRENT_TIMESTAMP)
+            ON CONFLICT(key) DO UPDATE SET
+                value = CAST(value AS INTEGER) + 1,
+                updated_at = CURRENT_TIMESTAMP
+        """
+        if cursor is not None:
+            cursor.execute(query)
+            return
+        with self.get_connection() as conn:
+            conn.execute(query)
+            conn.commit()
+    
+    def set_data_version(self, version: int) -> None:
+        """Set the data version, e.g. past every version used before a backup was restored."""
+        with self.get_connection() as conn:
+            conn.execute("""
+                INSERT INTO app_state (key, value, updated_at)
+                VALUES ('data_version', ?, CURRENT_TIMESTAMP)
+                ON CONFLICT(key) DO UPDATE SET
+                    value = excluded.value,
+                    updated_at = CURRENT_TIMESTAMP
+            """, (str(version),))
+            conn.commit()
+    
+    def get_data_state(self) -> Tuple[int, Optional[str]]:
+        """Return (data_version, last_modified) describing the current stored data."""
+        with self.get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute("""
+                SELECT
+                    COALESCE((SELECT CAST(value AS INTEGER) FROM app_state
+                              WHERE key = 'data_version'), 0) AS version,
+                    MAX(COALESCE((SELECT MAX(imported_at) FROM imports), ''),
+                        COALESCE((SELECT updated_at FROM app_state
+                                  WHERE key = 'data_version'), '')) AS last_modified
+            """)
+            row = cursor.fetchone()
+            return row['version'], row['last_modified'] or None
+    
+    def get_excluded_tasks(self) -> Tuple[str, ...]:
+        """Task ids left out of quality score averages by the exclusion rules."""
+        return get_task_exclusions(self).task_ids
+    
+    def get_task_exclusion_rules(self) -> List[Dict[str, Any]]:
+        """The stored exclusion rules (scope, value, reason, created_at)."""
+        return get_task_exclusions(self).rules
+    
+    def add_task_exclusion(self, scope: str, value: str, reason: Optional[str] = None) -> bool:
+        """
+        Exclude a task ('task') or a whole task group ('task_group') from quality score averages.
+        
+        Returns False if the rule already existed (its reason is updated).
+        
+        Raises:
+            ValueError: for an unknown scope, task or task group
+        """
+        if scope not in EXCLUSION_SCOPES:
+            raise ValueError(f"scope must be one of: {', '.join(EXCLUSION_SCOPES)}")
+        with self.get_connection() as conn:
+            cursor = conn.cursor()
+            if scope == 'task':
+                cursor.execute("SELECT EXISTS(SELECT 1 FROM tasks WHERE task_id = ?)", (value,))
+            else:
+                cursor.execute("SELECT ? IN (SELECT task_group FROM tasks)", (value,))
+            if not cursor.fetchone()[0] and not (scope == 'task_group' and value in TASK_GROUPS):
+                raise ValueError(f"Unknown {scope.replace('_', ' ')}: {value}")
+            cursor.execute("SELECT 1 FROM task_exclusions WHERE scope = ? AND value = ?", (scope, value))
+            exists = cursor.fetchone() is not None
+            cursor.execute("""
+                INSERT INTO task_exclusions (scope, value, reason)
+                VALUES (?, ?, ?)
+                ON CONFLICT(scope, value) DO UPDATE SET reason = excluded.reason
+            """, (scope, value, reason))
+            # Every cached aggregate is keyed by the data version
+            self.bump_data_version(cursor)
+            conn.commit()
+            return not exists
+    
+    def remove_task_exclusion(self, scope: str, value: str) -> bool:
+        """Remove an exclusion rule; returns False if there was none."""
+        with self.get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute("DELETE FROM task_exclusions WHERE scope = ? AND value = ?", (scope, value))
+            if cursor.rowcount == 0:
+                return False
+            self.bump_data_version(cursor)
+            conn.commit()
+            return True
+    
     def get_task_group_performance(self, model_key=None, limit_groups=5):
         """Get task group performance statistics for comparison charts."""
-        with sqlite3.connect(self.db_path) as conn:
+        with self.get_connection() as conn:
             cursor = conn.cursor()
             
             # Get task group performance for all models
@@ -423,7 +1123,7 @@ class DatabaseManager:
                 LEFT JOIN tasks t ON o.task_id = t.task_id
                 LEFT JOIN metrics me ON o.id = me.output_id AND me.metric_name = 'quality_score'
                 WHERE t.task_group IS NOT NULL
-                    AND t.task_id != 'research_018'  -- Exclude research task from comparison
+                    AND t.task_id NOT IN (SELECT task_id FROM excluded_tasks)
                 GROUP BY m.model_key, m.name, t.task_group
                 HAVING task_count > 0
                 ORDER BY t.task_group, avg_score DESC
@@ -444,7 +1144,6 @@ class DatabaseManager:
                 })
             
             # Limit to specified number of task groups
-            from config import TASK_GROUPS
             limited_groups = TASK_GROUPS[:limit_groups]
             
             # Filter and prepare comparison data
@@ -495,7 +1194,7 @@ class DatabaseManager:
 
     def get_task_performance(self, task_id, selected_model_keys=None, limit=12):
         """Get performance data for a specific task across all models."""
-        with sqlite3.connect(self.db_path) as conn:
+        with self.get_connection() as conn:
             cursor = conn.cursor()
             
             # Get task performance for all models
@@ -552,13 +1251,14 @@ class DatabaseManager:
             
             return {
                 'task_id': task_id,
+                'excluded': task_id in get_task_exclusions(self),
                 'all_models': models_data,
                 'selected_models': selected_models_data
             }
 
     def get_model_comparison_data(self, model_key):
         """Get comprehensive model data for comparison including config and all test results."""
-        with sqlite3.connect(self.db_path) as conn:
+        with self.get_connection() as conn:
             cursor = conn.cursor()
             
             # Get model basic info and metadata
@@ -572,10 +1272,11 @@ class DatabaseManager:
             if not model_row:
                 return None
             
+            record = get_model_registry(self).get(model_key)
             model_data = {
                 'model_key': model_row[0],
                 'name': model_row[1],
-                'meta': json.loads(model_row[2])
+                'meta': record.meta if record else json.loads(model_row[2])
             }
             
             # Get all task results for this model
@@ -597,6 +1298,7 @@ class DatabaseManager:
             
             task_results = []
             task_groups = {}
+            exclusions = get_task_exclusions(self)
             
             for row in cursor.fetchall():
                 task_result = {
@@ -606,6 +1308,7 @@ class DatabaseManager:
                     'output_text': row[3],
                     'tokens': row[4],
                     'length': row[5],
+                    'excluded': row[0] in exclusions,
                     'metrics': {}
                 }
                 
@@ -629,7 +1332,8 @@ class DatabaseManager:
                         'avg_quality_score': 0,
                         'avg_rouge_l': 0,
                         'avg_bert_score': 0,
-                        'total_tasks': 0
+                        'total_tasks': 0,
+                        'quality_excluded': False
                     }
                 
                 if task_result['metrics']:
@@ -638,7 +1342,9 @@ class DatabaseManager:
             # Calculate group averages
             for group_name, group_data in task_groups.items():
                 if group_data['tasks']:
-                    quality_scores = [t['metrics'].get('quality_score', 0) for t in group_data['tasks'] if t['metrics'].get('quality_score') is not None]
+                    # Excluded tasks do not count towards quality score averages, as on the leaderboard
+                    quality_scores = [t['metrics'].get('quality_score', 0) for t in group_data['tasks']
+                                      if t['metrics'].get('quality_score') is not None and not t['excluded']]
                     rouge_scores = [t['metrics'].get('rouge_l', 0) for t in group_data['tasks'] if t['metrics'].get('rouge_l') is not None]
                     bert_scores = [t['metrics'].get('bert_score', 0) for t in group_data['tasks'] if t['metrics'].get('bert_score') is not None]
                     
@@ -646,6 +1352,7 @@ class DatabaseManager:
                     group_data['avg_rouge_l'] = sum(rouge_scores) / len(rouge_scores) if rouge_scores else 0
                     group_data['avg_bert_score'] = sum(bert_scores) / len(bert_scores) if bert_scores else 0
                     group_data['total_tasks'] = len(group_data['tasks'])
+                    group_data['quality_excluded'] = all(t['excluded'] for t in group_data['tasks'])
             
             model_data['task_results'] = task_results
             model_data['task_groups'] = task_groups
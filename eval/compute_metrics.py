@@ -13,6 +13,13 @@ from collections import Counter
 class MetricsCalculator:
     """Mock implementation of common NLP metrics for LLM evaluation."""
     
+    # Version of each metric definition. Bump a metric's version whenever the way
+    # it is computed changes; stored values with an older version are considered
+    # stale and can be refreshed with scripts/recompute_metrics.py.
+    METRIC_VERSIONS = {
+        'quality_score': 1,
+    }
+    
     def __init__(self, enable_real_metrics: bool = False):
         """
         Initialize metrics calculator.
@@ -24,6 +31,10 @@ class MetricsCalculator:
         self.random_seed = 42
         random.seed(self.random_seed)
     
+    def get_metric_version(self, metric_name: str) -> Optional[int]:
+        """Return the current definition version of a metric (None if unversioned)."""
+        return self.METRIC_VERSIONS.get(metric_name)
+    
     def compute_all_metrics(self, reference: str, candidate: str) -> Dict[str, float]:
         """
         Compute all available metrics for a reference-candidate pair.
@@ -0,0 +1,142 @@
+"""
+Which models behave alike across tasks.
+Pearson correlation of per-task quality scores for every pair of models,
+using only the tasks both answered (pairwise-complete), computed for all
+pairs at once from masked matrix products. The models are then clustered
+hierarchically on 1 - correlation, and the leaf order is used to lay out
+the heatmap so similar models sit next to each other.
+"""
+
+import os
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+from cache import VersionedCache
+from config import CORRELATION_CONFIG
+from eval.score_matrix import get_score_matrix
+
+
+def pairwise_correlation(scores: np.ndarray, min_shared: int = 3) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Pairwise-complete Pearson correlation between the rows of a matrix with missing values.
+
+    Args:
+        scores: (models, tasks) matrix, NaN where a model has no score
+        min_shared: pairs sharing fewer tasks get NaN
+
+    Returns:
+        (correlation, shared): (models, models) correlations (NaN where
+        undefined, e.g. a constant model) and the number of shared tasks
+    """
+    observed = (~np.isnan(scores)).astype(np.float64)
+    values = np.where(observed > 0, scores, 0.0)
+
+    # Sums over the tasks each pair shares: [i, j] restricts row i to j's tasks
+    shared = observed @ observed.T
+    sum_x = values @ observed.T
+    sum_xx = (values * values) @ observed.T
+    sum_xy = values @ values.T
+
+    covariance = shared * sum_xy - sum_x * sum_x.T
+    variance_x = shared * sum_xx - sum_x * sum_x
+    variance_y = variance_x.T
+    with np.errstate(invalid='ignore', divide='ignore'):
+        correlation = covariance / np.sqrt(variance_x * variance_y)
+    defined = (shared >= min_shared) & (variance_x > 1e-12) & (variance_y > 1e-12)
+    correlation = np.where(defined, np.clip(correlation, -1.0, 1.0), np.nan)
+    np.fill_diagonal(correlation, np.where(np.diag(defined), 1.0, np.nan))
+    return correlation, shared.astype(np.int64)
+
+
+def cluster(correlation: np.ndarray, method: str = 'average') -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Hierarchical clustering on the distance 1 - correlation.
+
+    Undefined correlations are treated as 0 (distance 1).
+
+    Returns:
+        (linkage, order): SciPy linkage matrix and the dendrogram leaf order
+    """
+    # SciPy is only needed here, so it is not loaded at application startup
+    from scipy.cluster.hierarchy import leaves_list, linkage, optimal_leaf_ordering
+    from scipy.spatial.distance import squareform
+
+    if len(correlation) < 2:
+        return np.zeros((0, 4)), np.arange(len(correlation))
+    distance = 1.0 - np.nan_to_num(correlation, nan=0.0)
+    distance = (distance + distance.T) / 2.0
+    np.fill_diagonal(distance, 0.0)
+    condensed = squareform(np.clip(distance, 0.0, 2.0), checks=False)
+    tree = linkage(condensed, method=method)
+    tree = optimal_leaf_ordering(tree, condensed)
+    return tree, leaves_list(tree)
+
+
+class ModelCorrelations:
+    """Correlation matrix and clustering of all models for one data version."""
+
+    __slots__ = ('data_version', 'model_keys', 'model_names', 'model_index',
+                 'correlation', 'shared', 'linkage', 'order')
+
+    def __init__(self, data_version: int, model_keys: Tuple[str, ...], model_names: Tuple[str, ...],
+                 scores: np.ndarray):
+        self.data_version = data_version
+        self.model_keys = model_keys
+        self.model_names = model_names
+        self.model_index = {key: i for i, key in enumerate(model_keys)}
+        self.correlation, self.shared = pairwise_correlation(scores, CORRELATION_CONFIG['min_shared_tasks'])
+        self.linkage, self.order = cluster(self.correlation, CORRELATION_CONFIG['linkage'])
+
+    def clusters(self, threshold: float) -> np.ndarray:
+        """Flat cluster label per model, cutting the tree at distance 1 - correlation = threshold."""
+        from scipy.cluster.hierarchy import fcluster
+
+        if len(self.linkage) == 0:
+            return np.ones(len(self.model_keys), dtype=np.int64)
+        return fcluster(self.linkage, t=threshold, criterion='distance')
+
+    def to_dict(self, model_keys: Optional[Iterable[str]] = None,
+                threshold: Optional[float] = None) -> Dict[str, Any]:
+        """
+        Heatmap-ready view: models in dendrogram order with their correlations.
+
+        With model_keys, only those models are returned (still in dendrogram order).
+        """
+        threshold = CORRELATION_CONFIG['cluster_threshold'] if threshold is None else threshold
+        wanted = set(model_keys) if model_keys else None
+        rows = np.array([i for i in self.order if wanted is None or self.model_keys[i] in wanted], dtype=np.intp)
+        labels = self.clusters(threshold)
+
+        def matrix(array: np.ndarray, digits: int) -> List[list]:
+            block = array[np.ix_(rows, rows)]
+            return [[None if np.isnan(v) else round(float(v), digits) for v in row] for row in block]
+
+        return {
+            'models': [self.model_keys[i] for i in rows],
+            'names': [self.model_names[i] for i in rows],
+            'correlation': matrix(self.correlation, 4),
+            'shared_tasks': self.shared[np.ix_(rows, rows)].tolist(),
+            'clusters': [int(labels[i]) for i in rows],
+            'cluster_threshold': threshold,
+            # Rows refer to the full model list (all_models), as returned by SciPy
+            'linkage': [[int(a), int(b), round(float(d), 6), int(n)] for a, b, d, n in self.linkage],
+            'all_models': list(self.model_keys),
+        }
+
+
+_results = VersionedCache('correlations', max_entries=8)
+
+
+def get_correlations(db_manager, exclude_tasks: Iterable[str] = ()) -> ModelCorrelations:
+    """Return the correlations for the current data version, computing them on first use."""
+    matrix = get_score_matrix(db_manager, 'quality_score')
+    exclude_tasks = tuple(sorted(exclude_tasks))
+
+    def build() -> ModelCorrelations:
+        mask = matrix.selection_mask(exclude_tasks=exclude_tasks)
+        return ModelCorrelations(matrix.data_version, matrix.model_keys, matrix.model_names,
+                                 np.ascontiguousarray(matrix.scores[:, mask]))
+
+    key = (os.path.abspath(db_manager.db_path), exclude_tasks)
+    return _results.get_or_build(key, matrix.data_version, build)
@@ -0,0 +1,118 @@
+"""
+Cost estimation for running the task suite.
+Every output is priced with its model's tiered input and output prices: the
+task prompt (token count estimated once per task) is billed as input and the
+stored output tokens as output, with the tier chosen by the prompt size. The
+pricing runs over all selected outputs at once with numpy and the sums are
+stored per (model, task group) in the cost_aggregates table.
+"""
+
+import sqlite3
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+from eval.tokenizer import TokenCounter, get_token_counter
+from pricing import PriceTable, get_price_table
+
+# Stored for tasks without a task group
+UNGROUPED = ''
+
+
+class CostEngine:
+    """Computes and stores cost aggregates from outputs.tokens and the model price tiers."""
+
+    def __init__(self, db_manager, token_counter: Optional[TokenCounter] = None):
+        self.db = db_manager
+        self.token_counter = token_counter or get_token_counter()
+
+    def estimate_prompt_tokens(self, cursor: sqlite3.Cursor) -> int:
+        """Fill in tasks.prompt_tokens for tasks that have no estimate yet."""
+        cursor.execute("SELECT task_id, prompt_text FROM tasks WHERE prompt_tokens IS NULL")
+        rows = cursor.fetchall()
+        if not rows:
+            return 0
+        counts = self.token_counter.count_many([row[1] for row in rows])
+        cursor.executemany("UPDATE tasks SET prompt_tokens = ? WHERE task_id = ?",
+                           [(int(count), row[0]) for count, row in zip(counts, rows)])
+        return len(rows)
+
+    def refresh(self, cursor: sqlite3.Cursor, model_keys: Optional[Iterable[str]] = None,
+                price_table: Optional[PriceTable] = None) -> int:
+        """
+        Recompute the aggregates of the given models (all models if None).
+
+        Runs on the caller's cursor and does not commit, so it can be part of
+        an import transaction.
+
+        Returns:
+            Number of (model, task group) rows written
+        """
+        price_table = price_table or get_price_table(self.db)
+        self.estimate_prompt_tokens(cursor)
+
+        query = """
+            SELECT o.model_key, t.task_group, t.prompt_tokens, o.tokens
+            FROM outputs o
+            JOIN tasks t ON t.task_id = o.task_id
+        """
+        params: List[str] = []
+        if model_keys is not None:
+            model_keys = sorted(set(model_keys))
+            if not model_keys:
+                return 0
+            query += f" WHERE o.model_key IN ({','.join('?' * len(model_keys))})"
+            params = model_keys
+            cursor.execute(f"DELETE FROM cost_aggregates WHERE model_key IN ({','.join('?' * len(model_keys))})",
+                           model_keys)
+        else:
+            cursor.execute("DELETE FROM cost_aggregates")
+
+        cursor.execute(query, params)
+        rows = cursor.fetchall()
+        if not rows:
+            return 0
+
+        aggregates = self.aggregate(price_table, rows)
+        cursor.executemany("""
+            INSERT INTO cost_aggregates (model_key, task_group, outputs, priced_outputs, input_tokens,
+                                         output_tokens, input_cost, output_cost, total_cost)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+        """, aggregates)
+        return len(aggregates)
+
+    @staticmethod
+    def aggregate(price_table: PriceTable, rows: List[Tuple]) -> List[Tuple]:
+        """
+        Price (model_key, task_group, prompt_tokens, tokens) rows and sum them per model and task group.
+
+        Only outputs with a known token count and known prices count towards
+        the token and cost sums; `outputs` counts all of them.
+        """
+        model_keys = [row[0] for row in rows]
+        prompt = np.array([row[2] for row in rows], dtype=np.float64)
+        output = np.array([row[3] for row in rows], dtype=np.float64)
+        input_cost, output_cost = price_table.costs(model_keys, prompt, output)
+        priced = ~np.isnan(input_cost) & ~np.isnan(output_cost)
+
+        group_index: Dict[Tuple[str, str], int] = {}
+        groups = np.array([group_index.setdefault((row[0], row[1] or UNGROUPED), len(group_index))
+                           for row in rows], dtype=np.intp)
+        size = len(group_index)
+
+        def total(values: np.ndarray) -> np.ndarray:
+            return np.bincount(groups, weights=np.where(priced, values, 0.0), minlength=size)
+
+        outputs = np.bincount(groups, minlength=size)
+        priced_outputs = np.bincount(groups, weights=priced, minlength=size)
+        input_tokens = total(prompt)
+        output_tokens = total(output)
+        input_costs = total(input_cost)
+        output_costs = total(output_cost)
+
+        return [
+            (model_key, task_group, int(outputs[i]), int(priced_outputs[i]), int(input_tokens[i]),
+             int(output_tokens[i]), float(input_costs[i]), float(output_costs[i]),
+             float(input_costs[i] + output_costs[i]))
+            for (model_key, task_group), i in group_index.items()
+        ]
@@ -0,0 +1,201 @@
+"""
+Score history per import.
+Imports overwrite outputs and metrics in place, so each import also records
+the (model, task) cells it changed in score_history: the new values of the
+cell, or its removal. Every HISTORY_CONFIG['snapshot_interval'] imports the
+full state is stored in score_snapshots. The state as of any import is the
+nearest snapshot at or before it plus the deltas recorded since.
+
+Recomputing metrics (scripts/recompute_metrics.py) adds its own entry to
+imports and is recorded the same way. Other changes made between imports are
+recorded with the next import. Imports from before the first snapshot cannot
+be reconstructed.
+"""
+
+import os
+from typing import Dict, Iterable, Optional, Tuple
+
+import numpy as np
+
+from cache import VersionedCache
+from config import HISTORY_CONFIG
+from eval.score_matrix import ScoreMatrix
+
+# Values kept per cell; tokens also gives avg_tokens on the leaderboard
+HISTORY_METRICS = ('quality_score', 'rouge_l', 'bert_score')
+HISTORY_FIELDS = HISTORY_METRICS + ('tokens',)
+
+Cell = Tuple[Optional[float], ...]
+
+_METRIC_COLUMNS = ',\n        '.join(
+    "MAX(CASE WHEN met.metric_name = '%s' THEN met.metric_value END)" % metric for metric in HISTORY_METRICS
+)
+_CURRENT_CELLS = f"""
+    SELECT o.model_key, o.task_id,
+        {_METRIC_COLUMNS},
+        o.tokens
+    FROM outputs o
+    LEFT JOIN metrics met ON met.output_id = o.id
+    GROUP BY o.id
+"""
+
+
+def current_cells(cursor) -> Dict[Tuple[str, str], Cell]:
+    """Current value of every (model_key, task_id) cell that has an output."""
+    cursor.execute(_CURRENT_CELLS)
+    return {(row[0], row[1]): tuple(row[2:]) for row in cursor.fetchall()}
+
+
+class ScoreHistory:
+    """Records and reconstructs the score cells of every import."""
+
+    def __init__(self, db_manager):
+        self.db = db_manager
+
+    def first_import(self, cursor) -> Optional[int]:
+        """Earliest import that can be reconstructed (the first snapshot)."""
+        cursor.execute("SELECT MIN(import_id) FROM score_snapshots")
+        return cursor.fetchone()[0]
+
+    def state_at(self, cursor, import_id: int) -> Optional[Dict[Tuple[str, str], Cell]]:
+        """Cells as of an import: nearest snapshot plus later deltas; None before the first snapshot."""
+        cursor.execute("SELECT MAX(import_id) FROM score_snapshots WHERE import_id <= ?", (import_id,))
+        base = cursor.fetchone()[0]
+        if base is None:
+            return None
+
+        columns = ', '.join(HISTORY_FIELDS)
+        cursor.execute(f"SELECT model_key, task_id, {columns} FROM score_snapshots WHERE import_id = ?", (base,))
+        cells = {(row[0], row[1]): tuple(row[2:]) for row in cursor.fetchall()}
+        cursor.execute(f"""
+            SELECT model_key, task_id, present, {columns}
+            FROM score_history
+            WHERE import_id > ? AND import_id <= ?
+            ORDER BY import_id
+        """, (base, import_id))
+        for row in cursor.fetchall():
+            if row[2]:
+                cells[(row[0], row[1])] = tuple(row[3:])
+            else:
+                cells.pop((row[0], row[1]), None)
+        return cells
+
+    def _write_snapshot(self, cursor, import_id: int, cells: Dict[Tuple[str, str], Cell]) -> None:
+        placeholders = ', '.join('?' * (len(HISTORY_FIELDS) + 3))
+        cursor.executemany(f"""
+            INSERT OR REPLACE INTO score_snapshots (import_id, model_key, task_id, {', '.join(HISTORY_FIELDS)})
+            VALUES ({placeholders})
+        """, [(import_id, model_key, task_id, *cell) for (model_key, task_id), cell in cells.items()])
+
+    def record(self, cursor, import_id: int) -> int:
+        """
+        Record the cells changed since the previous import; does not commit.
+
+        Returns:
+            Number of delta rows written (all cells when a first snapshot is taken)
+        """
+        current = current_cells(cursor)
+        cursor.execute("SELECT MAX(import_id) FROM score_snapshots WHERE import_id < ?", (import_id,))
+        last_snapshot = cursor.fetchone()[0]
+        if last_snapshot is None:
+            self._write_snapshot(cursor, import_id, current)
+            return len(current)
+
+        cursor.execute("SELECT MAX(id) FROM imports WHERE id < ?", (import_id,))
+        previous = self.state_at(cursor, cursor.fetchone()[0])
+        changes = [(key, 1, cell) for key, cell in current.items() if previous.get(key) != cell]
+        changes += [(key, 0, (None,) * len(HISTORY_FIELDS)) for key in previous if key not in current]
+        placeholders = ', '.join('?' * (len(HISTORY_FIELDS) + 4))
+        cursor.executemany(f"""
+            INSERT OR REPLACE INTO score_history (import_id, model_key, task_id, present, {', '.join(HISTORY_FIELDS)})
+            VALUES ({placeholders})
+        """, [(import_id, model_key, task_id, present, *cell) for (model_key, task_id), present, cell in changes])
+
+        cursor.execute("SELECT COUNT(*) FROM imports WHERE id > ? AND id <= ?", (last_snapshot, import_id))
+        if cursor.fetchone()[0] >= HISTORY_CONFIG['snapshot_interval']:
+            self._write_snapshot(cursor, import_id, current)
+        return len(changes)
+
+
+class HistoricalScores:
+    """Score matrices (quality with tokens, ROUGE-L, BERTScore) as of one import."""
+
+    __slots__ = ('import_id', 'matrices')
+
+    def __init__(self, import_id: int, matrices: Dict[str, ScoreMatrix]):
+        self.import_id = import_id
+        self.matrices = matrices
+
+    def matrix(self, metric: str) -> ScoreMatrix:
+        return self.matrices[metric]
+
+    @classmethod
+    def from_cells(cls, import_id: int, cells: Dict[Tuple[str, str], Cell],
+                   models: Iterable[Tuple[str, str]], tasks: Iterable[Tuple[str, Optional[str]]]) -> 'HistoricalScores':
+        """
+        Build the matrices from reconstructed cells.
+
+        models and tasks are the current (key, name) and (task_id, group)
+        rows; models and tasks only present in the history are added.
+        """
+        names = dict(models)
+        groups = dict(tasks)
+        for model_key, task_id in cells:
+            names.setdefault(model_key, model_key)
+            groups.setdefault(task_id, None)
+        model_keys = sorted(names)
+        task_ids = sorted(groups)
+        model_index = {key: i for i, key in enumerate(model_keys)}
+        task_index = {task_id: j for j, task_id in enumerate(task_ids)}
+
+        values = np.full((len(HISTORY_FIELDS), len(model_keys), len(task_ids)), np.nan)
+        coverage = np.zeros((len(model_keys), len(task_ids)), dtype=bool)
+        if cells:
+            rows = np.array([model_index[m] for m, _ in cells], dtype=np.intp)
+            columns = np.array([task_index[t] for _, t in cells], dtype=np.intp)
+            values[:, rows, columns] = np.array(list(cells.values()), dtype=np.float64).T
+            coverage[rows, columns] = True
+
+        # History states are not tied to a data version (and are never cached by one)
+        labels = dict(model_keys=model_keys, model_names=[names[k] for k in model_keys],
+                      task_ids=task_ids, task_groups=[groups[t] for t in task_ids], data_version=0)
+        tokens = values[HISTORY_FIELDS.index('tokens')]
+        matrices = {
+            metric: ScoreMatrix(metric=metric, scores=values[k], tokens=tokens, coverage=coverage, **labels)
+            for k, metric in enumerate(HISTORY_METRICS)
+        }
+        return cls(import_id, matrices)
+
+
+# Versioned too: an import's row is committed before its deltas
+_states = VersionedCache('score_history', max_entries=HISTORY_CONFIG['cached_states'])
+
+
+def _load_state(db_manager, import_id: int) -> HistoricalScores:
+    with db_manager.get_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute("SELECT EXISTS(SELECT 1 FROM imports WHERE id = ?)", (import_id,))
+        if not cursor.fetchone()[0]:
+            raise ValueError(f"Unknown import: {import_id}")
+        cells = ScoreHistory(db_manager).state_at(cursor, import_id)
+        if cells is None:
+            first = ScoreHistory(db_manager).first_import(cursor)
+            raise ValueError(f"No score history for import {import_id}"
+                             + (f" (history starts at import {first})" if first is not None else ""))
+        cursor.execute("SELECT model_key, name FROM models")
+        models = [tuple(row) for row in cursor.fetchall()]
+        cursor.execute("SELECT task_id, task_group FROM tasks")
+        tasks = [tuple(row) for row in cursor.fetchall()]
+    return HistoricalScores.from_cells(import_id, cells, models, tasks)
+
+
+def get_scores_as_of(db_manager, import_id: int) -> HistoricalScores:
+    """
+    Reconstruct the score matrices as of an import.
+
+    Raises:
+        ValueError: if the import does not exist or predates the recorded history
+    """
+    data_version, _ = db_manager.get_data_state()
+    key = (os.path.abspath(db_manager.db_path), import_id)
+    return _states.get_or_build(key, data_version, lambda: _load_state(db_manager, import_id))
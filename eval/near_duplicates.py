@@ -0,0 +1,268 @@
+"""
+Near-duplicate output detection using MinHash signatures and LSH banding.
+Signatures are computed once per output at import time and stored in the
+database, so clustering only compares outputs that share an LSH bucket.
+"""
+
+import hashlib
+import re
+import zlib
+from typing import Dict, List, Any, Optional, Iterable, Tuple
+
+import numpy as np
+
+from config import NEAR_DUPLICATE_CONFIG
+
+# Universal hashing parameters (same construction as the classic MinHash papers)
+_MERSENNE_PRIME = np.uint64((1 << 61) - 1)
+_MAX_HASH = np.uint64((1 << 32) - 1)
+_SHINGLE_CHUNK = 2048
+
+
+class MinHasher:
+    """Computes fixed-length MinHash signatures for text using word shingles."""
+
+    def __init__(self, num_perm: int = 128, shingle_size: int = 3, seed: int = 1):
+        self.num_perm = num_perm
+        self.shingle_size = shingle_size
+        generator = np.random.RandomState(seed)
+        self.a = generator.randint(1, _MERSENNE_PRIME, size=num_perm, dtype=np.uint64)
+        self.b = generator.randint(0, _MERSENNE_PRIME, size=num_perm, dtype=np.uint64)
+
+    def shingles(self, text: str) -> set:
+        """Split text into a set of word n-gram shingles."""
+        tokens = re.findall(r'\w+|[^\w\s]', (text or '').lower())
+        k = self.shingle_size
+        if len(tokens) < k:
+            return {' '.join(tokens)} if tokens else set()
+        return {' '.join(tokens[i:i + k]) for i in range(len(tokens) - k + 1)}
+
+    def signature(self, text: str) -> np.ndarray:
+        """Compute the MinHash signature of a text."""
+        return self.shingle_signature(self.shingles(text))
+
+    def shingle_signature(self, shingles: set) -> np.ndarray:
+        """Compute the MinHash signature of a shingle set (all _MAX_HASH when empty)."""
+        signature = np.full(self.num_perm, _MAX_HASH, dtype=np.uint64)
+        if not shingles:
+            return signature
+
+        hashes = np.fromiter((zlib.crc32(s.encode('utf-8')) for s in shingles),
+                             dtype=np.uint64, count=len(shingles))
+
+        # Permute all shingle hashes at once, chunked to bound memory on long outputs
+        for start in range(0, len(hashes), _SHINGLE_CHUNK):
+            block = hashes[start:start + _SHINGLE_CHUNK]
+            permuted = (np.outer(self.a, block) + self.b[:, None]) % _MERSENNE_PRIME & _MAX_HASH
+            np.minimum(signature, permuted.min(axis=1), out=signature)
+
+        return signature
+
+    @staticmethod
+    def to_bytes(signature: np.ndarray) -> bytes:
+        """Serialize a signature to a compact BLOB."""
+        return signature.astype('<u4').tobytes()
+
+    @staticmethod
+    def from_bytes(blob: bytes) -> np.ndarray:
+        """Deserialize a signature BLOB."""
+        return np.frombuffer(blob, dtype='<u4')
+
+
+class NearDuplicateIndex:
+    """MinHash/LSH index over outputs.output_text, grouped per task."""
+
+    def __init__(self, db_manager, config: Dict[str, Any] = None):
+        self.db = db_manager
+        self.config = {**NEAR_DUPLICATE_CONFIG, **(config or {})}
+        self.bands = self.config['bands']
+        self.rows_per_band = self.config['num_perm'] // self.bands
+        self.hasher = MinHasher(
+            num_perm=self.bands * self.rows_per_band,
+            shingle_size=self.config['shingle_size'],
+            seed=self.config['seed']
+        )
+
+    def _band_keys(self, signature: np.ndarray) -> List[int]:
+        """Hash each band of a signature to a signed 64-bit bucket key."""
+        keys = []
+        packed = signature.astype('<u4')
+        for band in range(self.bands):
+            start = band * self.rows_per_band
+            digest = hashlib.blake2b(packed[start:start + self.rows_per_band].tobytes(),
+                                     digest_size=8).digest()
+            keys.append(int.from_bytes(digest, 'little', signed=True))
+        return keys
+
+    def index_outputs(self, cursor, outputs: Iterable[Tuple[int, str, str, str]]) -> int:
+        """
+        Add outputs to the index.
+
+        Outputs without any text are left out (and dropped from the index):
+        they would all share one signature and cluster together.
+
+        Args:
+            cursor: Open database cursor (caller commits)
+            outputs: Iterable of (output_id, task_id, model_key, output_text)
+
+        Returns:
+            Number of outputs indexed
+        """
+        output_ids = []
+        signature_rows = []
+        bucket_rows = []
+
+        for output_id, task_id, model_key, output_text in outputs:
+            output_ids.append(output_id)
+            shingles = self.hasher.shingles(output_text)
+            if not shingles:
+                continue
+            signature = self.hasher.shingle_signature(shingles)
+            signature_rows.append((output_id, task_id, model_key, self.hasher.to_bytes(signature)))
+            for band, key in enumerate(self._band_keys(signature)):
+                bucket_rows.append((task_id, band, key, output_id))
+
+        self.remove_outputs(cursor, output_ids)
+        if not signature_rows:
+            return 0
+
+        cursor.executemany("""
+            INSERT OR REPLACE INTO minhash_signatures (output_id, task_id, model_key, signature)
+            VALUES (?, ?, ?, ?)
+        """, signature_rows)
+        cursor.executemany("""
+            INSERT OR IGNORE INTO lsh_buckets (task_id, band, bucket, output_id)
+            VALUES (?, ?, ?, ?)
+        """, bucket_rows)
+
+        return len(signature_rows)
+
+    def remove_outputs(self, cursor, output_ids: List[int]) -> None:
+        """Remove outputs from the index."""
+        if not output_ids:
+            return
+        params = [(output_id,) for output_id in output_ids]
+        cursor.executemany("DELETE FROM lsh_buckets WHERE output_id = ?", params)
+        cursor.executemany("DELETE FROM minhash_signatures WHERE output_id = ?", params)
+
+    def rebuild(self, task_id: Optional[str] = None) -> int:
+        """Rebuild the index from the outputs table (e.g. for data imported before indexing)."""
+        with self.db.get_connection() as conn:
+            cursor = conn.cursor()
+
+            if task_id:
+                cursor.execute("DELETE FROM lsh_buckets WHERE task_id = ?", (task_id,))
+                cursor.execute("DELETE FROM minhash_signatures WHERE task_id = ?", (task_id,))
+                cursor.execute("""
+                    SELECT id, task_id, model_key, output_text FROM outputs WHERE task_id = ?
+                """, (task_id,))
+            else:
+                cursor.execute("DELETE FROM lsh_buckets")
+                cursor.execute("DELETE FROM minhash_signatures")
+                cursor.execute("SELECT id, task_id, model_key, output_text FROM outputs")
+
+            rows = [tuple(row) for row in cursor.fetchall()]
+            indexed = self.index_outputs(cursor, rows)
+            self.db.bump_data_version(cursor)
+            conn.commit()
+
+        return indexed
+
+    def find_clusters(self, task_id: Optional[str] = None,
+                      threshold: Optional[float] = None) -> List[Dict[str, Any]]:
+        """
+        List clusters of near-duplicate outputs per task.
+
+        Only outputs sharing at least one LSH bucket are compared, and each
+        candidate pair is verified against the estimated Jaccard similarity.
+        """
+        threshold = self.config['threshold'] if threshold is None else threshold
+
+        with self.db.get_connection() as conn:
+            cursor = conn.cursor()
+
+            query = """
+                SELECT b.task_id, GROUP_CONCAT(b.output_id) AS output_ids
+                FROM lsh_buckets b
+                JOIN outputs o ON o.id = b.output_id
+            """
+            params = []
+            if task_id:
+                query += " WHERE b.task_id = ?"
+                params.append(task_id)
+            query += " GROUP BY b.task_id, b.band, b.bucket HAVING COUNT(*) > 1"
+            cursor.execute(query, params)
+
+            candidate_pairs = set()
+            for row in cursor.fetchall():
+                ids = sorted(int(i) for i in row['output_ids'].split(','))
+                for i, first in enumerate(ids):
+                    for second in ids[i + 1:]:
+                        candidate_pairs.add((row['task_id'], first, second))
+
+            if not candidate_pairs:
+                return []
+
+            candidate_ids = sorted({i for _, a, b in candidate_pairs for i in (a, b)})
+            placeholders = ','.join('?' * len(candidate_ids))
+            cursor.execute(f"""
+                SELECT s.output_id, s.signature, o.model_key, m.name AS model_name
+                FROM minhash_signatures s
+                JOIN outputs o ON o.id = s.output_id
+                JOIN models m ON m.model_key = o.model_key
+                WHERE s.output_id IN ({placeholders})
+            """, candidate_ids)
+            # Signatures of empty outputs indexed before they were skipped
+            info = {row['output_id']: row for row in cursor.fetchall()
+                    if not np.all(self.hasher.from_bytes(row['signature']) == _MAX_HASH)}
+
+        # Verify candidates and union them into clusters
+        parent = {}
+
+        def find(x):
+            while parent.setdefault(x, x) != x:
+                parent[x] = parent[parent[x]]
+                x = parent[x]
+            return x
+
+        edges = []
+        for task, first, second in candidate_pairs:
+            if first not in info or second not in info:
+                continue
+            similarity = float(np.mean(
+                self.hasher.from_bytes(info[first]['signature']) ==
+                self.hasher.from_bytes(info[second]['signature'])
+            ))
+            if similarity >= threshold:
+                edges.append((task, first, second, similarity))
+                parent[find(first)] = find(second)
+
+        clusters = {}
+        for task, first, second, similarity in edges:
+            cluster = clusters.setdefault(find(first), {'task_id': task, 'members': set(), 'similarities': []})
+            cluster['members'].update((first, second))
+            cluster['similarities'].append(similarity)
+
+        by_task = {}
+        for cluster in clusters.values():
+            by_task.setdefault(cluster['task_id'], []).append({
+                'size': len(cluster['members']),
+                'min_similarity': round(min(cluster['similarities']), 4),
+                'avg_similarity': round(sum(cluster['similarities']) / len(cluster['similarities']), 4),
+                'outputs': [
+                    {
+                        'output_id': output_id,
+                        'model_key': info[output_id]['model_key'],
+                        'model_name': info[output_id]['model_name']
+                    }
+                    for output_id in sorted(cluster['members'])
+                ]
+            })
+
+        return [
+            {
+                'task_id': task,
+                'clusters': sorted(task_clusters, key=lambda c: (-c['size'], -c['avg_similarity']))
+            }
+            for task, task_clusters in sorted(by_task.items())
+        ]
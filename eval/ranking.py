@@ -0,0 +1,220 @@
+"""
+Head-to-head ranking of models.
+Every task two models both answered is a game: the higher quality score wins,
+equal scores tie. Bradley-Terry strengths are fitted to the win/tie counts
+with the vectorized MM iteration and reported on the Elo scale, so a model is
+only compared with others on the tasks they actually share.
+
+Rankings are cached per data version and task selection. After an import
+only the rows and columns of the models whose scores changed are recounted;
+a new task selection (e.g. an exclusion rule) starts from the closest cached
+one, subtracting or adding the games on the tasks that left or joined it.
+The solver starts from the previous strengths.
+"""
+
+import os
+from typing import Iterable, Optional, Tuple
+
+import numpy as np
+
+from cache import VersionedCache
+from config import RANKING_CONFIG
+from eval.score_matrix import ScoreMatrix, get_score_matrix
+
+ELO_SCALE = 400.0 / np.log(10.0)
+
+
+def pairwise_counts(scores: np.ndarray,
+                    rows: Optional[np.ndarray] = None) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Count head-to-head results between models over shared tasks.
+
+    Args:
+        scores: (models, tasks) matrix, NaN where a model has no score
+        rows: only count the games of these models (default all)
+
+    Returns:
+        (wins, losses, ties), each (len(rows), models): wins[r, j] is how
+        often model rows[r] beat model j
+    """
+    rows = np.arange(scores.shape[0]) if rows is None else rows
+    left = scores[rows][:, None, :]
+    right = scores[None, :, :]
+    shared = ~np.isnan(left) & ~np.isnan(right)
+    wins = np.sum(shared & (left > right), axis=2).astype(np.float64)
+    losses = np.sum(shared & (left < right), axis=2).astype(np.float64)
+    ties = np.sum(shared & (left == right), axis=2).astype(np.float64)
+    ties[np.arange(len(rows)), rows] = 0
+    return wins, losses, ties
+
+
+def fit_bradley_terry(wins: np.ndarray, ties: np.ndarray, prior: float = 1.0,
+                      initial: Optional[np.ndarray] = None, max_iter: int = 1000,
+                      tol: float = 1e-9) -> Tuple[np.ndarray, int]:
+    """
+    Fit Bradley-Terry strengths with the MM algorithm (Hunter, 2004).
+
+    A tie counts as half a win for each side. Each model also plays `prior`
+    drawn games against a virtual opponent of average strength, which keeps
+    the fit finite for unbeaten models and models without games.
+
+    Returns:
+        (strengths, iterations): positive strengths with geometric mean 1
+    """
+    games = wins + wins.T + ties
+    score = wins.sum(axis=1) + ties.sum(axis=1) / 2.0 + prior / 2.0
+    strengths = np.ones(len(wins)) if initial is None else np.array(initial, dtype=np.float64)
+
+    for iteration in range(1, max_iter + 1):
+        pair_sums = strengths[:, None] + strengths[None, :]
+        denominator = np.sum(games / pair_sums, axis=1) + prior / (strengths + 1.0)
+        updated = score / denominator
+        updated /= np.exp(np.mean(np.log(updated)))
+        change = np.max(np.abs(np.log(updated) - np.log(strengths)))
+        strengths = updated
+        if change < tol:
+            break
+    return strengths, iteration
+
+
+class Ranking:
+    """Bradley-Terry ranking of all models for one data version."""
+
+    __slots__ = ('data_version', 'task_group', 'exclude_tasks', 'model_keys', 'task_ids', 'scores',
+                 'wins', 'ties', 'strengths', 'elo', 'games', 'iterations', 'model_index')
+
+    def __init__(self, data_version: int, task_group: Optional[str], exclude_tasks: Tuple[str, ...],
+                 model_keys: Tuple[str, ...], task_ids: Tuple[str, ...], scores: np.ndarray,
+                 wins: np.ndarray, ties: np.ndarray, initial: Optional[np.ndarray] = None):
+        self.data_version = data_version
+        self.task_group = task_group
+        self.exclude_tasks = exclude_tasks
+        self.model_keys = model_keys
+        self.task_ids = task_ids
+        self.scores = scores
+        self.wins = wins
+        self.ties = ties
+        self.strengths, self.iterations = fit_bradley_terry(
+            wins, ties, RANKING_CONFIG['prior_games'], initial,
+            RANKING_CONFIG['max_iterations'], RANKING_CONFIG['tolerance'])
+        self.games = (wins + wins.T + ties).sum(axis=1)
+        self.elo = RANKING_CONFIG['elo_base'] + ELO_SCALE * np.log(self.strengths)
+        self.model_index = {key: i for i, key in enumerate(model_keys)}
+
+    def get(self, model_key: str) -> Optional[float]:
+        """Elo rating of one model; None if it played no games."""
+        i = self.model_index.get(model_key)
+        if i is None or self.games[i] == 0:
+            return None
+        return float(self.elo[i])
+
+
+def _changed_rows(kept: np.ndarray, scores: np.ndarray, previous_scores: np.ndarray) -> np.ndarray:
+    """
+    Rows whose scores differ from the previous ranking, or that are new.
+
+    Args:
+        kept: previous row of each model (-1 for new models)
+        scores, previous_scores: both restricted to the tasks they share
+    """
+    same = np.zeros(len(kept), dtype=bool)
+    known = np.flatnonzero(kept >= 0)
+    current = scores[known]
+    previous = previous_scores[kept[known]]
+    same[known] = np.all((current == previous) | (np.isnan(current) & np.isnan(previous)), axis=1)
+    return np.flatnonzero(~same)
+
+
+def build_ranking(matrix: ScoreMatrix, task_group: Optional[str] = None,
+                  exclude_tasks: Iterable[str] = (), previous: Optional[Ranking] = None) -> Ranking:
+    """
+    Rank the models of a score matrix, reusing a previous ranking where possible.
+
+    The pairwise counts of models whose scores did not change are copied
+    from `previous`, minus the games on tasks no longer selected and plus
+    those on newly selected tasks; only the changed rows and columns are
+    recounted over all tasks. When more task columns would change than are
+    selected, everything is recounted and `previous` only seeds the solver.
+    """
+    exclude_tasks = tuple(sorted(exclude_tasks))
+    mask = matrix.selection_mask(task_group, exclude_tasks)
+    task_ids = tuple(t for t, keep in zip(matrix.task_ids, mask) if keep)
+    scores = np.ascontiguousarray(matrix.scores[:, mask])
+    model_keys = matrix.model_keys
+
+    initial = wins = ties = None
+    if previous is not None and previous.task_group == task_group:
+        previous_columns = {task_id: j for j, task_id in enumerate(previous.task_ids)}
+        shared = np.array([j for j, task_id in enumerate(task_ids) if task_id in previous_columns], dtype=np.intp)
+        shared_previous = np.array([previous_columns[task_ids[j]] for j in shared], dtype=np.intp)
+        added = np.setdiff1d(np.arange(len(task_ids)), shared)
+        removed = np.setdiff1d(np.arange(len(previous.task_ids)), shared_previous)
+        kept = np.array([previous.model_index.get(key, -1) for key in model_keys], dtype=np.intp)
+        initial = np.where(kept >= 0, previous.strengths[np.maximum(kept, 0)], 1.0)
+
+        # Updating is only cheaper while fewer columns change than are selected
+        if len(added) + len(removed) < len(task_ids):
+            changed = _changed_rows(kept, scores[:, shared], previous.scores[:, shared_previous])
+            wins = np.zeros((len(model_keys), len(model_keys)))
+            ties = np.zeros_like(wins)
+            unchanged = np.setdiff1d(np.arange(len(model_keys)), changed)
+            old = kept[unchanged]
+            block = np.ix_(unchanged, unchanged)
+            wins[block] = previous.wins[np.ix_(old, old)]
+            ties[block] = previous.ties[np.ix_(old, old)]
+            if len(removed):
+                removed_wins, _, removed_ties = pairwise_counts(previous.scores[np.ix_(old, removed)])
+                wins[block] -= removed_wins
+                ties[block] -= removed_ties
+            if len(added):
+                added_wins, _, added_ties = pairwise_counts(scores[np.ix_(unchanged, added)])
+                wins[block] += added_wins
+                ties[block] += added_ties
+            if len(changed):
+                changed_wins, changed_losses, changed_ties = pairwise_counts(scores, changed)
+                wins[changed] = changed_wins
+                wins[:, changed] = changed_losses.T
+                ties[changed] = changed_ties
+                ties[:, changed] = changed_ties.T
+    if wins is None:
+        wins, _, ties = pairwise_counts(scores)
+
+    return Ranking(matrix.data_version, task_group, exclude_tasks, model_keys, task_ids,
+                   scores, wins, ties, initial)
+
+
+# One ranking per task selection; the default one stays cached next to custom selections
+_rankings = VersionedCache('rankings', max_entries=RANKING_CONFIG['cached_selections'])
+
+
+def _nearest_ranking(path: str, task_group: Optional[str], exclude_tasks: Tuple[str, ...]) -> Optional[Ranking]:
+    """The cached ranking (of any version) of the same task group whose excluded tasks differ least."""
+    excluded = set(exclude_tasks)
+    candidates = [ranking for (ranking_path, group, _), (_, ranking) in _rankings.items()
+                  if ranking_path == path and group == task_group]
+    if not candidates:
+        return None
+    return min(candidates, key=lambda ranking: len(excluded.symmetric_difference(ranking.exclude_tasks)))
+
+
+def get_ranking(db_manager, task_group: Optional[str] = None, exclude_tasks: Iterable[str] = (),
+                matrix: Optional[ScoreMatrix] = None) -> Ranking:
+    """
+    Return the ranking for the current data version, updating a cached one on first use.
+
+    Rankings are kept per task group and excluded tasks. A new data version
+    updates the ranking of the same selection; a new selection starts from
+    the cached one with the closest excluded tasks. A given matrix (e.g. a
+    past state, see eval/history.py) is ranked from scratch and not cached.
+    """
+    if matrix is not None:
+        return build_ranking(matrix, task_group, exclude_tasks)
+    matrix = get_score_matrix(db_manager, 'quality_score')
+    exclude_tasks = tuple(sorted(exclude_tasks))
+    path = os.path.abspath(db_manager.db_path)
+
+    def build() -> Ranking:
+        previous = _nearest_ranking(path, task_group, exclude_tasks)
+        return build_ranking(matrix, task_group, exclude_tasks, previous=previous)
+
+    return _rankings.get_or_build((path, task_group, exclude_tasks), matrix.data_version, build)
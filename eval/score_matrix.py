@@ -0,0 +1,298 @@
+"""
+Dense models x tasks score matrix.
+Built once per data version from the metrics table and kept in compact,
+read-only structures (numpy arrays plus tuples), so it can be loaded before
+gunicorn forks and shared by all workers without being copied.
+
+After each import the matrix is also written to a binary snapshot next to the
+database (see write_snapshot). Workers memory-map that file read-only, so all
+processes on a host share one physical copy of the page cache.
+"""
+
+import json
+import mmap
+import os
+import struct
+import threading
+from types import MappingProxyType
+from typing import Any, Dict, Iterable, Optional, Sequence, Tuple
+
+import numpy as np
+
+SNAPSHOT_MAGIC = b'LLMSNAP1'
+SNAPSHOT_METRIC = 'quality_score'
+_SNAPSHOT_ALIGN = 64
+
+
+class ScoreMatrix:
+    """Immutable matrix of one metric per (model, task); NaN where a model has no score."""
+
+    __slots__ = ('metric', 'data_version', 'model_keys', 'model_names', 'task_ids', 'task_groups',
+                 'scores', 'tokens', 'coverage', 'model_index', 'task_index')
+
+    def __init__(self, metric: str, data_version: int, model_keys: Sequence[str],
+                 model_names: Sequence[str], task_ids: Sequence[str],
+                 task_groups: Sequence[Optional[str]], scores: np.ndarray,
+                 tokens: Optional[np.ndarray] = None, coverage: Optional[np.ndarray] = None):
+        scores = np.ascontiguousarray(scores, dtype=np.float64)
+        tokens = np.full(scores.shape, np.nan) if tokens is None else np.ascontiguousarray(tokens, dtype=np.float64)
+        coverage = ~np.isnan(scores) if coverage is None else np.ascontiguousarray(coverage, dtype=bool)
+        for array in (scores, tokens, coverage):
+            array.setflags(write=False)
+
+        self.metric = metric
+        self.data_version = data_version
+        self.model_keys = tuple(model_keys)
+        self.model_names = tuple(model_names)
+        self.task_ids = tuple(task_ids)
+        self.task_groups = tuple(task_groups)
+        self.scores = scores
+        self.tokens = tokens
+        self.coverage = coverage
+        self.model_index = MappingProxyType({key: i for i, key in enumerate(self.model_keys)})
+        self.task_index = MappingProxyType({task_id: j for j, task_id in enumerate(self.task_ids)})
+
+    @classmethod
+    def from_database(cls, db_manager, metric: str = 'quality_score',
+                      data_version: int = 0) -> 'ScoreMatrix':
+        """Build the matrix from the stored metrics (averaging duplicate outputs)."""
+        with db_manager.get_connection() as conn:
+            cursor = conn.cursor()
+
+            cursor.execute("SELECT model_key, name FROM models ORDER BY model_key")
+            models = cursor.fetchall()
+            cursor.execute("SELECT task_id, task_group FROM tasks ORDER BY task_id")
+            tasks = cursor.fetchall()
+
+            model_index = {row['model_key']: i for i, row in enumerate(models)}
+            task_index = {row['task_id']: j for j, row in enumerate(tasks)}
+            scores = np.full((len(models), len(tasks)), np.nan)
+            tokens = np.full((len(models), len(tasks)), np.nan)
+            coverage = np.zeros((len(models), len(tasks)), dtype=bool)
+
+            cursor.execute("""
+                SELECT model_key, task_id, AVG(tokens) AS tokens
+                FROM outputs
+                GROUP BY model_key, task_id
+            """)
+            for model_key, task_id, value in cursor:
+                i = model_index.get(model_key)
+                j = task_index.get(task_id)
+                if i is not None and j is not None:
+                    coverage[i, j] = True
+                    if value is not None:
+                        tokens[i, j] = value
+
+            cursor.execute("""
+                SELECT o.model_key, o.task_id, AVG(met.metric_value) AS value
+                FROM outputs o
+                JOIN metrics met ON met.output_id = o.id AND met.metric_name = ?
+                GROUP BY o.model_key, o.task_id
+            """, (metric,))
+            for model_key, task_id, value in cursor:
+                i = model_index.get(model_key)
+                j = task_index.get(task_id)
+                if i is not None and j is not None and value is not None:
+                    scores[i, j] = value
+
+        return cls(
+            metric=metric,
+            data_version=data_version,
+            model_keys=[row['model_key'] for row in models],
+            model_names=[row['name'] for row in models],
+            task_ids=[row['task_id'] for row in tasks],
+            task_groups=[row['task_group'] for row in tasks],
+            scores=scores,
+            tokens=tokens,
+            coverage=coverage
+        )
+
+    @property
+    def shape(self) -> Tuple[int, int]:
+        return self.scores.shape
+
+    def model_row(self, model_key: str) -> np.ndarray:
+        """Scores of one model across all tasks."""
+        return self.scores[self.model_index[model_key]]
+
+    def task_column(self, task_id: str) -> np.ndarray:
+        """Scores of all models on one task."""
+        return self.scores[:, self.task_index[task_id]]
+
+    def group_mask(self, task_group: str) -> np.ndarray:
+        """Boolean mask over tasks selecting one task group."""
+        return np.array([group == task_group for group in self.task_groups], dtype=bool)
+
+    def selection_mask(self, task_group: Optional[str] = None, exclude_tasks: Iterable[str] = ()) -> np.ndarray:
+        """Boolean mask over tasks: one task group (or all), minus exclude_tasks."""
+        excluded = set(exclude_tasks)
+        return np.array([task_id not in excluded and (task_group is None or group == task_group)
+                         for task_id, group in zip(self.task_ids, self.task_groups)], dtype=bool)
+
+    def model_means(self, task_mask: Optional[np.ndarray] = None) -> np.ndarray:
+        """Mean score per model over the selected tasks, ignoring missing scores."""
+        scores = self.scores if task_mask is None else self.scores[:, task_mask]
+        counts = np.sum(~np.isnan(scores), axis=1)
+        totals = np.nansum(scores, axis=1)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            return np.where(counts > 0, totals / counts, np.nan)
+
+
+def snapshot_path(db_manager) -> str:
+    """Location of the binary score snapshot: next to the database file."""
+    return os.path.splitext(db_manager.db_path)[0] + '.snapshot'
+
+
+def write_snapshot(matrix: ScoreMatrix, path: str) -> str:
+    """
+    Write a matrix to a binary snapshot, replacing any previous one atomically.
+
+    Layout: magic, header length, JSON index header (labels, data version and
+    array offsets), then the 64-byte aligned score matrix, token matrix and
+    packed coverage bitmap.
+    """
+    arrays = {
+        'scores': matrix.scores,
+        'tokens': matrix.tokens,
+        'coverage': np.packbits(matrix.coverage, axis=None),
+    }
+    header = {
+        'metric': matrix.metric,
+        'data_version': matrix.data_version,
+        'shape': list(matrix.shape),
+        'model_keys': list(matrix.model_keys),
+        'model_names': list(matrix.model_names),
+        'task_ids': list(matrix.task_ids),
+        'task_groups': list(matrix.task_groups),
+        'arrays': {},
+    }
+
+    def layout(header_size: int) -> bytes:
+        offset = len(SNAPSHOT_MAGIC) + 8 + header_size
+        for name, array in arrays.items():
+            offset += -offset % _SNAPSHOT_ALIGN
+            header['arrays'][name] = {'offset': offset, 'dtype': array.dtype.str, 'shape': list(array.shape)}
+            offset += array.nbytes
+        return json.dumps(header).encode('utf-8')
+
+    # Offsets depend on the header length and vice versa; reserving slack for
+    # the offset digits makes the second layout fit the reserved size
+    header_size = len(layout(0)) + 256
+    encoded = layout(header_size)
+
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'wb') as f:
+        f.write(SNAPSHOT_MAGIC)
+        f.write(struct.pack('<Q', header_size))
+        f.write(encoded.ljust(header_size, b' '))
+        for name, array in arrays.items():
+            f.seek(header['arrays'][name]['offset'])
+            f.write(np.ascontiguousarray(array).tobytes())
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+    return path
+
+
+def load_snapshot(path: str) -> Optional[ScoreMatrix]:
+    """Memory-map a snapshot read-only; returns None if it is missing or invalid."""
+    try:
+        with open(path, 'rb') as f:
+            mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    except (OSError, ValueError):
+        return None
+
+    try:
+        if mapped[:len(SNAPSHOT_MAGIC)] != SNAPSHOT_MAGIC:
+            return None
+        header_size, = struct.unpack_from('<Q', mapped, len(SNAPSHOT_MAGIC))
+        start = len(SNAPSHOT_MAGIC) + 8
+        header: Dict[str, Any] = json.loads(mapped[start:start + header_size].decode('utf-8'))
+
+        def array(name: str) -> np.ndarray:
+            spec = header['arrays'][name]
+            dtype = np.dtype(spec['dtype'])
+            count = int(np.prod(spec['shape']))
+            return np.frombuffer(mapped, dtype=dtype, count=count, offset=spec['offset']).reshape(spec['shape'])
+
+        shape = tuple(header['shape'])
+        coverage = np.unpackbits(array('coverage'), count=shape[0] * shape[1]).reshape(shape).astype(bool)
+        return ScoreMatrix(
+            metric=header['metric'],
+            data_version=header['data_version'],
+            model_keys=header['model_keys'],
+            model_names=header['model_names'],
+            task_ids=header['task_ids'],
+            task_groups=header['task_groups'],
+            scores=array('scores'),
+            tokens=array('tokens'),
+            coverage=coverage
+        )
+    except (KeyError, ValueError, struct.error):
+        return None
+
+
+def refresh_snapshot(db_manager) -> Optional[str]:
+    """Rebuild the snapshot from the database (called after every import)."""
+    with db_manager.read_snapshot():
+        data_version, _ = db_manager.get_data_state()
+        matrix = ScoreMatrix.from_database(db_manager, SNAPSHOT_METRIC, data_version)
+    return write_snapshot(matrix, snapshot_path(db_manager))
+
+
+_matrices: Dict[Tuple[str, str], ScoreMatrix] = {}
+_matrices_lock = threading.Lock()
+_mapped: Dict[str, Tuple[Tuple[int, int, int], Optional[ScoreMatrix]]] = {}
+
+
+def _mapped_snapshot(path: str) -> Optional[ScoreMatrix]:
+    """
+    Return the memory-mapped snapshot at path, remapping it when the file was replaced.
+
+    The old mapping stays valid for readers still holding it and is released
+    once the last reference goes away.
+    """
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    identity = (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+    cached = _mapped.get(path)
+    if cached is not None and cached[0] == identity:
+        return cached[1]
+    matrix = load_snapshot(path)
+    _mapped[path] = (identity, matrix)
+    return matrix
+
+
+def get_score_matrix(db_manager, metric: str = 'quality_score') -> ScoreMatrix:
+    """
+    Return the score matrix for the current data version, building it on first use.
+
+    The memory-mapped snapshot is used when it matches the current data
+    version. Otherwise the matrix is built from the database and shared
+    process-wide, so a matrix built before fork is reused by every worker
+    until the data changes.
+    """
+    key = (os.path.abspath(db_manager.db_path), metric)
+    data_version, _ = db_manager.get_data_state()
+
+    # Prefer the shared memory-mapped snapshot when it is current
+    if metric == SNAPSHOT_METRIC:
+        with _matrices_lock:
+            snapshot = _mapped_snapshot(snapshot_path(db_manager))
+        if snapshot is not None and snapshot.data_version == data_version:
+            return snapshot
+
+    matrix = _matrices.get(key)
+    if matrix is not None and matrix.data_version == data_version:
+        return matrix
+
+    with _matrices_lock:
+        matrix = _matrices.get(key)
+        if matrix is None or matrix.data_version != data_version:
+            with db_manager.read_snapshot():
+                data_version, _ = db_manager.get_data_state()
+                matrix = ScoreMatrix.from_database(db_manager, metric, data_version)
+            _matrices[key] = matrix
+    return matrix
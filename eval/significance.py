@@ -0,0 +1,174 @@
+"""
+Paired significance tests between models over the tasks both answered.
+
+- Sign test: wins vs losses on shared tasks (ties dropped), exact binomial.
+- Permutation test: the mean score difference against random sign flips of
+  the per-task differences.
+
+One seeded flip matrix (permutations x tasks) is shared by every pair, so
+the permutation statistics of all model pairs come from one matrix product
+(computed in chunks of pairs) and a single pair's p-value always matches the
+leaderboard-wide matrix.
+"""
+
+import os
+from functools import lru_cache
+from typing import Any, Dict, Iterable, Optional, Tuple
+
+import numpy as np
+
+from cache import VersionedCache
+from config import SIGNIFICANCE_CONFIG
+from eval.ranking import pairwise_counts
+from eval.score_matrix import get_score_matrix
+
+_PAIR_CHUNK = 256
+
+
+@lru_cache(maxsize=8)
+def flip_matrix(n_tasks: int, permutations: int, seed: int) -> np.ndarray:
+    """Read-only (permutations, n_tasks) matrix of random +1/-1 signs."""
+    rng = np.random.default_rng([seed, n_tasks])
+    signs = rng.choice(np.array([-1.0, 1.0]), size=(permutations, n_tasks))
+    signs.setflags(write=False)
+    return signs
+
+
+def permutation_p_values(differences: np.ndarray, permutations: int, seed: int) -> np.ndarray:
+    """
+    Two-sided paired permutation test of the mean difference, for many pairs at once.
+
+    Args:
+        differences: (pairs, tasks) per-task score differences, NaN where
+            the two models do not share a task
+
+    Returns:
+        p-value per pair (NaN for pairs without shared tasks)
+    """
+    shared = ~np.isnan(differences)
+    counts = shared.sum(axis=1)
+    filled = np.where(shared, differences, 0.0)
+    signs = flip_matrix(differences.shape[1], permutations, seed)
+    # A tiny tolerance keeps the observed statistic's own sign pattern counted
+    observed = np.abs(filled.sum(axis=1)) - 1e-9
+
+    extreme = np.zeros(len(filled))
+    for start in range(0, len(filled), _PAIR_CHUNK):
+        chunk = filled[start:start + _PAIR_CHUNK]
+        permuted = np.abs(chunk @ signs.T)
+        extreme[start:start + _PAIR_CHUNK] = np.sum(permuted >= observed[start:start + _PAIR_CHUNK, None], axis=1)
+
+    p_values = (extreme + 1.0) / (permutations + 1.0)
+    return np.where(counts > 0, p_values, np.nan)
+
+
+def _half_binomial_cdf(max_n: int) -> np.ndarray:
+    """Table of P(X <= k) for X ~ Binomial(n, 1/2), indexed [n, k], built row by row from Pascal's triangle."""
+    table = np.ones((max_n + 1, max_n + 1))
+    row = np.ones(1)
+    for n in range(max_n + 1):
+        table[n, :n + 1] = np.cumsum(row)
+        row = (np.append(row, 0.0) + np.insert(row, 0, 0.0)) / 2.0
+    return table
+
+
+def sign_test_p_values(wins: np.ndarray, losses: np.ndarray) -> np.ndarray:
+    """Exact two-sided sign test p-values (element-wise); NaN where no task was decided."""
+    decided = (wins + losses).astype(np.intp)
+    cdf = _half_binomial_cdf(int(decided.max(initial=0)))
+    tail = cdf[decided, np.minimum(wins, losses).astype(np.intp)]
+    return np.where(decided > 0, np.minimum(1.0, 2.0 * tail), np.nan)
+
+
+class PairwiseSignificance:
+    """Sign-test and permutation-test p-values for every pair of models of one data version."""
+
+    __slots__ = ('data_version', 'model_keys', 'model_names', 'model_index', 'task_ids',
+                 'wins', 'losses', 'ties', 'mean_difference', 'sign_p', 'permutation_p')
+
+    def __init__(self, data_version: int, model_keys: Tuple[str, ...], model_names: Tuple[str, ...],
+                 task_ids: Tuple[str, ...], scores: np.ndarray):
+        self.data_version = data_version
+        self.model_keys = model_keys
+        self.model_names = model_names
+        self.model_index = {key: i for i, key in enumerate(model_keys)}
+        self.task_ids = task_ids
+
+        self.wins, self.losses, self.ties = pairwise_counts(scores)
+        self.sign_p = sign_test_p_values(self.wins, self.losses)
+
+        n = len(model_keys)
+        upper_i, upper_j = np.triu_indices(n, k=1)
+        differences = scores[upper_i] - scores[upper_j]
+        shared = np.sum(~np.isnan(differences), axis=1)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            means = np.where(shared > 0, np.nansum(differences, axis=1) / shared, np.nan)
+        p_values = permutation_p_values(differences, SIGNIFICANCE_CONFIG['permutations'],
+                                        SIGNIFICANCE_CONFIG['seed'])
+
+        self.mean_difference = np.full((n, n), np.nan)
+        self.permutation_p = np.full((n, n), np.nan)
+        self.mean_difference[upper_i, upper_j] = means
+        self.mean_difference[upper_j, upper_i] = -means
+        self.permutation_p[upper_i, upper_j] = p_values
+        self.permutation_p[upper_j, upper_i] = p_values
+
+    def pair(self, model_a: str, model_b: str) -> Optional[Dict[str, Any]]:
+        """Test results for one pair; positive mean_difference means model_a scored higher."""
+        i = self.model_index.get(model_a)
+        j = self.model_index.get(model_b)
+        if i is None or j is None or i == j:
+            return None
+
+        def value(array: np.ndarray) -> Optional[float]:
+            return None if np.isnan(array[i, j]) else float(array[i, j])
+
+        return {
+            'model_a': model_a,
+            'model_b': model_b,
+            'shared_tasks': int(self.wins[i, j] + self.losses[i, j] + self.ties[i, j]),
+            'wins': int(self.wins[i, j]),
+            'losses': int(self.losses[i, j]),
+            'ties': int(self.ties[i, j]),
+            'mean_difference': value(self.mean_difference),
+            'sign_p': value(self.sign_p),
+            'permutation_p': value(self.permutation_p),
+            'significant': bool(self.permutation_p[i, j] < SIGNIFICANCE_CONFIG['alpha']),
+        }
+
+    def submatrix(self, model_keys: Optional[Iterable[str]] = None) -> Dict[str, Any]:
+        """p-value matrices (null on the diagonal and for pairs without shared tasks)."""
+        keys = [k for k in model_keys if k in self.model_index] if model_keys else list(self.model_keys)
+        rows = np.array([self.model_index[k] for k in keys], dtype=np.intp)
+
+        def matrix(array: np.ndarray, digits: int) -> list:
+            block = array[np.ix_(rows, rows)]
+            return [[None if np.isnan(v) or i == j else round(float(v), digits) for j, v in enumerate(row)]
+                    for i, row in enumerate(block)]
+
+        return {
+            'models': keys,
+            'permutation_p': matrix(self.permutation_p, 4),
+            'sign_p': matrix(self.sign_p, 4),
+            'mean_difference': matrix(self.mean_difference, 3),
+        }
+
+
+_results = VersionedCache('significance', max_entries=8)
+
+
+def get_significance(db_manager, exclude_tasks: Iterable[str] = ()) -> PairwiseSignificance:
+    """Return the pairwise tests for the current data version, computing them on first use."""
+    matrix = get_score_matrix(db_manager, 'quality_score')
+    exclude_tasks = tuple(sorted(exclude_tasks))
+
+    def build() -> PairwiseSignificance:
+        mask = matrix.selection_mask(exclude_tasks=exclude_tasks)
+        return PairwiseSignificance(
+            matrix.data_version, matrix.model_keys, matrix.model_names,
+            tuple(t for t, keep in zip(matrix.task_ids, mask) if keep),
+            np.ascontiguousarray(matrix.scores[:, mask])
+        )
+
+    key = (os.path.abspath(db_manager.db_path), exclude_tasks)
+    return _results.get_or_build(key, matrix.data_version, build)
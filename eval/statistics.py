@@ -0,0 +1,136 @@
+"""
+Uncertainty of leaderboard averages.
+A model's average quality score is a mean over a handful of tasks, so the
+tasks are resampled with replacement to get a bootstrap confidence interval.
+All models share one seeded resampling matrix (resamples x tasks, holding how
+often each task is drawn), so every interval is computed by a single matrix
+product and the results are reproducible for a given data version.
+"""
+
+import os
+from functools import lru_cache
+from typing import Iterable, Optional, Tuple
+
+import numpy as np
+
+from cache import VersionedCache
+from config import BOOTSTRAP_CONFIG
+from eval.score_matrix import ScoreMatrix, get_score_matrix
+
+
+@lru_cache(maxsize=32)
+def resampling_matrix(n_tasks: int, resamples: int, seed: int) -> np.ndarray:
+    """
+    Draw counts for `resamples` bootstrap samples of n_tasks tasks.
+
+    Returns:
+        Read-only (resamples, n_tasks) array; row b says how often each task
+        appears in sample b (each row sums to n_tasks)
+    """
+    rng = np.random.default_rng([seed, n_tasks])
+    counts = rng.multinomial(n_tasks, np.full(n_tasks, 1.0 / n_tasks), size=resamples).astype(np.float64)
+    counts.setflags(write=False)
+    return counts
+
+
+def bootstrap_means(scores: np.ndarray, resamples: int, seed: int) -> np.ndarray:
+    """
+    Bootstrap distribution of each row's mean, ignoring NaN (missing) cells.
+
+    Args:
+        scores: (models, tasks) matrix
+
+    Returns:
+        (models, resamples) matrix; NaN where a sample drew none of the
+        model's scored tasks
+    """
+    observed = ~np.isnan(scores)
+    weights = resampling_matrix(scores.shape[1], resamples, seed)
+    totals = np.where(observed, scores, 0.0) @ weights.T
+    counts = observed.astype(np.float64) @ weights.T
+    with np.errstate(invalid='ignore', divide='ignore'):
+        return np.where(counts > 0, totals / counts, np.nan)
+
+
+def confidence_intervals(scores: np.ndarray, confidence: float = 0.95, resamples: int = 1000,
+                         seed: int = 0) -> Tuple[np.ndarray, np.ndarray]:
+    """Percentile bootstrap interval of each row's mean; NaN for rows without scores."""
+    if scores.size == 0:
+        empty = np.full(scores.shape[0], np.nan)
+        return empty, empty.copy()
+    alpha = (1.0 - confidence) / 2.0
+    means = bootstrap_means(scores, resamples, seed)
+    low = np.full(scores.shape[0], np.nan)
+    high = np.full(scores.shape[0], np.nan)
+    scored = ~np.all(np.isnan(means), axis=1)
+    if scored.any():
+        low[scored], high[scored] = np.nanquantile(means[scored], [alpha, 1.0 - alpha], axis=1)
+    return low, high
+
+
+class ScoreIntervals:
+    """Bootstrap confidence intervals of every model's mean score over one task selection."""
+
+    __slots__ = ('data_version', 'task_group', 'confidence', 'model_index', 'mean', 'low', 'high', 'n_tasks')
+
+    def __init__(self, data_version: int, task_group: Optional[str], confidence: float,
+                 model_keys: Iterable[str], mean: np.ndarray, low: np.ndarray, high: np.ndarray,
+                 n_tasks: np.ndarray):
+        self.data_version = data_version
+        self.task_group = task_group
+        self.confidence = confidence
+        self.model_index = {key: i for i, key in enumerate(model_keys)}
+        self.mean = mean
+        self.low = low
+        self.high = high
+        self.n_tasks = n_tasks
+
+    def get(self, model_key: str) -> Tuple[Optional[float], Optional[float]]:
+        """(low, high) for one model; (None, None) if it has no scores."""
+        i = self.model_index.get(model_key)
+        if i is None or np.isnan(self.low[i]):
+            return None, None
+        return float(self.low[i]), float(self.high[i])
+
+
+# Keyed by user-supplied task selections, so bounded
+_intervals = VersionedCache('score_intervals', max_entries=BOOTSTRAP_CONFIG['cached_selections'])
+
+
+def _score_intervals(matrix: ScoreMatrix, task_group: Optional[str],
+                     exclude_tasks: Iterable[str]) -> ScoreIntervals:
+    """Bootstrap intervals of every model's mean over one task selection of a matrix."""
+    mask = matrix.selection_mask(task_group, exclude_tasks)
+    scores = matrix.scores[:, mask]
+    low, high = confidence_intervals(scores, BOOTSTRAP_CONFIG['confidence'],
+                                     BOOTSTRAP_CONFIG['resamples'], BOOTSTRAP_CONFIG['seed'])
+    return ScoreIntervals(
+        data_version=matrix.data_version,
+        task_group=task_group,
+        confidence=BOOTSTRAP_CONFIG['confidence'],
+        model_keys=matrix.model_keys,
+        mean=matrix.model_means(mask),
+        low=low,
+        high=high,
+        n_tasks=np.sum(~np.isnan(scores), axis=1)
+    )
+
+
+def get_score_intervals(db_manager, task_group: Optional[str] = None,
+                        exclude_tasks: Iterable[str] = (),
+                        matrix: Optional[ScoreMatrix] = None) -> ScoreIntervals:
+    """
+    Return quality score intervals for the current data version, computing them on first use.
+
+    Tasks are resampled within the selection (one task group, or all tasks),
+    leaving out exclude_tasks so the intervals match the leaderboard averages.
+    A given matrix (e.g. a past state, see eval/history.py) is used instead of
+    the current one, without caching.
+    """
+    if matrix is not None:
+        return _score_intervals(matrix, task_group, exclude_tasks)
+    matrix = get_score_matrix(db_manager, 'quality_score')
+    exclude_tasks = tuple(sorted(exclude_tasks))
+    key = (os.path.abspath(db_manager.db_path), task_group, exclude_tasks)
+    return _intervals.get_or_build(key, matrix.data_version,
+                                   lambda: _score_intervals(matrix, task_group, exclude_tasks))
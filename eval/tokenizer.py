@@ -0,0 +1,112 @@
+"""
+Pluggable token counters used to fill in missing token counts at import time.
+The built-in regex counter needs no dependencies; the BPE counter loads a
+vocabulary file once per process and reuses it for every import.
+"""
+
+import json
+import re
+from abc import ABC, abstractmethod
+from functools import lru_cache
+from typing import Dict, Iterable, Optional
+
+import numpy as np
+
+from config import TOKENIZER_CONFIG
+
+
+class TokenCounter(ABC):
+    """Base class for token counters."""
+
+    name = 'base'
+
+    @abstractmethod
+    def count(self, text: str) -> int:
+        """Count tokens in a single text."""
+
+    def count_many(self, texts: Iterable[str]) -> np.ndarray:
+        """Count tokens for a batch of texts."""
+        return np.fromiter((self.count(text) for text in texts), dtype=np.int64)
+
+
+class RegexTokenCounter(TokenCounter):
+    """Counts words and punctuation marks as tokens (fast, dependency-free)."""
+
+    name = 'regex'
+
+    def __init__(self, pattern: str = r'\w+|[^\w\s]'):
+        self.pattern = re.compile(pattern)
+
+    def count(self, text: str) -> int:
+        return sum(1 for _ in self.pattern.finditer(text or ''))
+
+    def count_many(self, texts: Iterable[str]) -> np.ndarray:
+        # pandas Series are counted with the vectorized string accessor
+        if hasattr(texts, 'str'):
+            return texts.fillna('').astype(str).str.count(self.pattern.pattern).to_numpy(dtype=np.int64)
+        return super().count_many(texts)
+
+
+@lru_cache(maxsize=4)
+def _load_bpe_vocab(vocab_file: str) -> Dict[str, int]:
+    """Load a BPE vocabulary once per process (vocab.json or tokenizer.json format)."""
+    with open(vocab_file, 'r', encoding='utf-8') as f:
+        data = json.load(f)
+    if isinstance(data, dict) and 'model' in data and 'vocab' in data['model']:
+        data = data['model']['vocab']
+    return data
+
+
+class BPETokenCounter(TokenCounter):
+    """
+    Approximates BPE token counts from a vocabulary file.
+
+    Text is pre-tokenized GPT-2 style and each piece is split greedily into the
+    longest vocabulary entries. Counts for repeated pieces are memoized.
+    """
+
+    name = 'bpe'
+    _pretokenize = re.compile(r"""'s|'t|'re|'ve|'m|'ll|'d| ?\w+| ?[^\s\w]+|\s+""")
+
+    def __init__(self, vocab_file: str, space_marker: str = 'Ġ'):
+        self.vocab = _load_bpe_vocab(vocab_file)
+        self.space_marker = space_marker
+        self.max_token_len = max((len(token) for token in self.vocab), default=1)
+        self._piece_counts: Dict[str, int] = {}
+
+    def _count_piece(self, piece: str) -> int:
+        cached = self._piece_counts.get(piece)
+        if cached is not None:
+            return cached
+
+        piece_text = piece.replace(' ', self.space_marker)
+        count = 0
+        i = 0
+        while i < len(piece_text):
+            for j in range(min(len(piece_text), i + self.max_token_len), i, -1):
+                if piece_text[i:j] in self.vocab:
+                    break
+            else:
+                j = i + 1  # Unknown character falls back to a single token
+            count += 1
+            i = j
+
+        self._piece_counts[piece] = count
+        return count
+
+    def count(self, text: str) -> int:
+        return sum(self._count_piece(piece) for piece in self._pretokenize.findall(text or ''))
+
+
+@lru_cache(maxsize=1)
+def get_token_counter(counter: Optional[str] = None, vocab_file: Optional[str] = None) -> TokenCounter:
+    """Return the configured token counter (built once per process)."""
+    counter = counter or TOKENIZER_CONFIG.get('counter', 'regex')
+    vocab_file = vocab_file or TOKENIZER_CONFIG.get('bpe_vocab_file')
+
+    if counter == 'bpe':
+        if not vocab_file:
+            raise ValueError("BPE token counter requires TOKENIZER_CONFIG['bpe_vocab_file']")
+        return BPETokenCounter(vocab_file)
+
+    return RegexTokenCounter()
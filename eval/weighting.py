@@ -0,0 +1,93 @@
+"""
+Leaderboard averages under custom task weights.
+A leaderboard variant (task-group weights, an explicit task subset) is a
+weight vector over the tasks of the score matrix. Each metric keeps one
+stacked matrix per data version, [scores with missing cells as 0; coverage],
+so the weighted mean of every model is a single matrix-vector product:
+the top half gives the weighted sums, the bottom half the weight each model
+actually covered.
+"""
+
+import os
+from typing import Iterable, Mapping, Optional, Tuple
+
+import numpy as np
+
+from cache import VersionedCache
+from eval.score_matrix import ScoreMatrix, get_score_matrix
+
+
+class TaskSelection:
+    """
+    A leaderboard variant: which tasks count and how much.
+
+    group_weights maps task groups to weights (groups not listed weigh 1);
+    include_tasks, if given, limits the tasks to that list; exclude_tasks
+    never count; task_group limits the tasks to one group.
+    """
+
+    __slots__ = ('group_weights', 'include_tasks', 'exclude_tasks', 'task_group')
+
+    def __init__(self, group_weights: Optional[Mapping[str, float]] = None,
+                 include_tasks: Optional[Iterable[str]] = None, exclude_tasks: Iterable[str] = (),
+                 task_group: Optional[str] = None):
+        self.group_weights = dict(group_weights or {})
+        self.include_tasks = frozenset(include_tasks) if include_tasks is not None else None
+        self.exclude_tasks = frozenset(exclude_tasks)
+        self.task_group = task_group
+
+    def weights(self, matrix: ScoreMatrix) -> np.ndarray:
+        """(tasks,) array of non-negative weights for the tasks of a score matrix."""
+        weights = np.array([self.group_weights.get(group, 1.0) for group in matrix.task_groups],
+                           dtype=np.float64)
+        if self.task_group is not None:
+            weights[~matrix.group_mask(self.task_group)] = 0.0
+        if self.include_tasks is not None:
+            weights[[task_id not in self.include_tasks for task_id in matrix.task_ids]] = 0.0
+        weights[[task_id in self.exclude_tasks for task_id in matrix.task_ids]] = 0.0
+        return weights
+
+
+def _stack(values: np.ndarray) -> np.ndarray:
+    """[values with missing cells as 0; coverage] as one (2 * models, tasks) matrix."""
+    observed = ~np.isnan(values)
+    return np.vstack([np.where(observed, values, 0.0), observed.astype(np.float64)])
+
+
+_stacked = VersionedCache('stacked_scores', max_entries=16)
+
+
+def _stacked_values(db_manager, matrix: ScoreMatrix, field: str) -> np.ndarray:
+    """(2 * models, tasks) matrix of values (0 where missing) over their coverage, cached per data version."""
+    def build() -> np.ndarray:
+        stacked = _stack(getattr(matrix, field))
+        stacked.setflags(write=False)
+        return stacked
+
+    key = (os.path.abspath(db_manager.db_path), matrix.metric, field)
+    return _stacked.get_or_build(key, matrix.data_version, build)
+
+
+def weighted_means(db_manager, selection: TaskSelection, metric: str = 'quality_score',
+                   field: str = 'scores', matrix: Optional[ScoreMatrix] = None) -> Tuple[ScoreMatrix, np.ndarray]:
+    """
+    Weighted mean per model of one metric over the selected tasks, ignoring missing cells.
+
+    Args:
+        field: 'scores' for the metric, 'tokens' for the output token counts
+        matrix: use this matrix (e.g. a past state, see eval/history.py)
+            instead of the current one; its stacked form is not cached
+
+    Returns:
+        (matrix, means): the score matrix used and one mean per model (NaN
+        where a model has no value on any weighted task)
+    """
+    if matrix is None:
+        matrix = get_score_matrix(db_manager, metric)
+        stacked = _stacked_values(db_manager, matrix, field)
+    else:
+        stacked = _stack(getattr(matrix, field))
+    weights = selection.weights(matrix)
+    totals, covered = np.split(stacked @ weights, 2)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        return matrix, np.where(covered > 0, totals / covered, np.nan)
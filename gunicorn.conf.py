@@ -0,0 +1,14 @@
+"""
+Gunicorn settings for production.
+
+    gunicorn -c gunicorn.conf.py wsgi:app
+"""
+
+import os
+
+bind = f"0.0.0.0:{os.environ.get('PORT', '5000')}"
+workers = int(os.environ.get('WEB_CONCURRENCY', '2'))
+
+# Import the app (and run the warmup in wsgi.py) once in the master, then fork
+# the workers so they share the preloaded data copy-on-write
+preload_app = True
@@ -0,0 +1,163 @@
+"""
+HTTP caching helpers for the Flask application.
+Stored results only change at import time, so responses are validated with
+ETags derived from the database data version plus the normalized request.
+"""
+
+import gzip
+import hashlib
+import os
+from datetime import datetime, timezone
+from typing import Optional
+
+from flask import Flask, g, request, session
+from werkzeug.http import is_resource_modified
+
+from cache import LRUCache
+from config import COMPRESSION_CONFIG
+
+try:
+    import brotli
+except ImportError:  # brotli is optional; gzip is always available
+    brotli = None
+
+# Endpoints whose responses depend only on stored data, the query string and
+# (for HTML pages) the session settings
+CONDITIONAL_ENDPOINTS = {
+    'index', 'side_by_side', 'compare_model', 'model_detail',
+    'api_models', 'api_leaderboard', 'api_tasks', 'api_task_outputs',
+    'api_model_detail', 'api_model_facets', 'api_duplicates', 'api_stats', 'api_export', 'api_scores',
+    'api_costs', 'api_significance', 'api_correlations', 'api_exclusions',
+}
+
+COMPRESSIBLE_MIMETYPES = {
+    'text/html', 'text/plain', 'text/css', 'text/csv', 'application/json',
+    'application/javascript', 'application/x-ndjson', 'image/svg+xml',
+}
+
+
+def code_fingerprint(app: Flask) -> str:
+    """Fingerprint templates and application code so a deploy invalidates ETags."""
+    latest = 0.0
+    roots = [app.root_path, os.path.join(app.root_path, app.template_folder or 'templates')]
+    for root in roots:
+        try:
+            for entry in os.scandir(root):
+                if entry.is_file() and entry.name.endswith(('.py', '.html')):
+                    latest = max(latest, entry.stat().st_mtime)
+        except OSError:
+            continue
+    return str(int(latest))
+
+
+def _parse_timestamp(value: Optional[str]) -> Optional[datetime]:
+    """Parse an SQLite CURRENT_TIMESTAMP value (UTC)."""
+    if not value:
+        return None
+    try:
+        return datetime.strptime(value[:19], '%Y-%m-%d %H:%M:%S').replace(tzinfo=timezone.utc)
+    except ValueError:
+        return None
+
+
+def make_etag(build_id: str, data_version: int) -> str:
+    """Build an ETag from the data version and the normalized current request."""
+    args = sorted(request.args.items(multi=True))
+    parts = [build_id, str(data_version), request.path, repr(args)]
+    if not request.path.startswith('/api/'):
+        # HTML pages also depend on the session's column/filter settings
+        parts.append(repr(sorted(session.items())))
+    return hashlib.sha1('|'.join(parts).encode('utf-8')).hexdigest()
+
+
+def register_conditional_requests(app: Flask, db) -> None:
+    """Answer If-None-Match / If-Modified-Since with 304 before the view runs."""
+    build_id = code_fingerprint(app)
+
+    @app.before_request
+    def check_not_modified():
+        if request.method not in ('GET', 'HEAD') or request.endpoint not in CONDITIONAL_ENDPOINTS:
+            return None
+        if not request.path.startswith('/api/') and '_flashes' in session:
+            return None
+
+        data_version, last_modified = db.get_data_state()
+        g.cache_etag = make_etag(build_id, data_version)
+        g.cache_last_modified = _parse_timestamp(last_modified)
+
+        if not is_resource_modified(request.environ, etag=g.cache_etag,
+                                    last_modified=g.cache_last_modified):
+            response = app.response_class(status=304)
+            _set_validators(response)
+            return response
+        return None
+
+    @app.after_request
+    def add_validators(response):
+        if getattr(g, 'cache_etag', None) and response.status_code == 200:
+            _set_validators(response)
+        return response
+
+
+def _set_validators(response) -> None:
+    """Attach ETag/Last-Modified and require revalidation on every use."""
+    response.set_etag(g.cache_etag)
+    if g.cache_last_modified:
+        response.last_modified = g.cache_last_modified
+    response.cache_control.no_cache = True
+
+
+def _compress(data: bytes, encoding: str) -> bytes:
+    """Compress a response body with the negotiated encoding."""
+    if encoding == 'br':
+        return brotli.compress(data, quality=COMPRESSION_CONFIG['brotli_quality'])
+    return gzip.compress(data, compresslevel=COMPRESSION_CONFIG['gzip_level'], mtime=0)
+
+
+def register_compression(app: Flask) -> LRUCache:
+    """
+    Compress large text responses (brotli when available, otherwise gzip).
+
+    Compressed bodies of responses carrying a data-version ETag are cached, so
+    repeated hits on the same view are not compressed again. Register this
+    before register_conditional_requests so it runs after the ETag is set.
+    """
+    encodings = ['br', 'gzip'] if brotli else ['gzip']
+    compressed_cache = LRUCache('compressed_responses',
+                                max_entries=COMPRESSION_CONFIG['cache_entries'],
+                                max_bytes=COMPRESSION_CONFIG['cache_bytes'])
+
+    @app.after_request
+    def compress_response(response):
+        if response.mimetype not in COMPRESSIBLE_MIMETYPES:
+            return response
+        response.vary.add('Accept-Encoding')
+
+        if (response.status_code != 200 or response.direct_passthrough
+                or response.is_streamed or 'Content-Encoding' in response.headers):
+            return response
+
+        encoding = request.accept_encodings.best_match(encodings)
+        if not encoding:
+            return response
+
+        etag = getattr(g, 'cache_etag', None)
+        key = (etag, encoding) if etag else None
+        compressed = compressed_cache.get(key) if key else None
+
+        if compressed is None:
+            data = response.get_data()
+            if len(data) < COMPRESSION_CONFIG['min_size']:
+                return response
+            compressed = _compress(data, encoding)
+            if key:
+                compressed_cache.set(key, compressed)
+
+        response.set_data(compressed)
+        response.headers['Content-Encoding'] = encoding
+        if etag:
+            # Same convention as nginx: encoded variants carry a weak validator
+            response.set_etag(etag, weak=True)
+        return response
+
+    return compressed_cache
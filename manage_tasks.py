@@ -70,6 +70,7 @@ def delete_task(task_id: str):
             cursor.execute("DELETE FROM outputs WHERE task_id = ?", (task_id,))
             cursor.execute("DELETE FROM tasks WHERE task_id = ?", (task_id,))
             
+            db.bump_data_version(cursor)
             conn.commit()
             print(f"✅ Task '{task_id}' törölve!")
         else:
@@ -109,6 +110,7 @@ def delete_task_group(group_name: str):
                 cursor.execute("DELETE FROM outputs WHERE task_id = ?", (task['task_id'],))
                 cursor.execute("DELETE FROM tasks WHERE task_id = ?", (task['task_id'],))
             
+            db.bump_data_version(cursor)
             conn.commit()
             print(f"✅ '{group_name}' csoport törölve!")
         else:
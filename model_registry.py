@@ -0,0 +1,187 @@
+"""
+In-memory registry of model metadata.
+The models.meta JSON is parsed once per data version into slotted records with
+numeric fields (parameters, context size in tokens, release date, price tiers)
+and precomputed facet lists, instead of being json.loads'd for every row.
+"""
+
+import json
+import os
+import re
+from datetime import date
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from cache import VersionedCache
+
+_PRICE_PATTERN = re.compile(r'[-+]?\d+(?:\.\d+)?')
+_THRESHOLD_PATTERN = re.compile(r'^\s*(≤|<=|<|>=|>|≥)?\s*(\d+(?:\.\d+)?)\s*([KkMm]?)\s*$')
+_UNIT = {'': 1, 'k': 1000, 'm': 1000000}
+
+
+def parse_price(value: Any) -> Optional[float]:
+    """Parse a display price such as '$1.20' or 'Free' (USD per 1M tokens); None if unknown."""
+    if isinstance(value, (int, float)):
+        return float(value)
+    if not isinstance(value, str):
+        return None
+    if value.strip().lower() == 'free':
+        return 0.0
+    match = _PRICE_PATTERN.search(value.replace(',', ''))
+    return float(match.group()) if match else None
+
+
+def parse_threshold(value: Any) -> Tuple[int, Optional[int]]:
+    """
+    Parse a tier threshold such as '≤128K', '>128K' or 'all'.
+
+    Returns:
+        (min_tokens, max_tokens): the tier applies to prompts with more than
+        min_tokens and at most max_tokens tokens (None = unbounded)
+    """
+    if not isinstance(value, str) or value.strip().lower() in ('all', ''):
+        return 0, None
+    match = _THRESHOLD_PATTERN.match(value)
+    if not match:
+        return 0, None
+    operator, number, unit = match.groups()
+    tokens = int(float(number) * _UNIT[unit.lower()])
+    if operator in ('>', '>=', '≥'):
+        return tokens, None
+    return 0, tokens
+
+
+def parse_int(value: Any) -> Optional[int]:
+    """Parse numbers stored as int or as strings like '1000B' / '128K'."""
+    if isinstance(value, bool):
+        return None
+    if isinstance(value, (int, float)):
+        return int(value)
+    if isinstance(value, str):
+        match = _PRICE_PATTERN.search(value)
+        return int(float(match.group())) if match else None
+    return None
+
+
+def parse_date(value: Any) -> Optional[date]:
+    """Parse an ISO release date; None if missing or malformed."""
+    try:
+        return date.fromisoformat(value) if value else None
+    except (TypeError, ValueError):
+        return None
+
+
+class PriceTier:
+    """One tier of a model's input or output price (USD per 1M tokens)."""
+
+    __slots__ = ('label', 'min_tokens', 'max_tokens', 'price', 'display')
+
+    def __init__(self, threshold: Any, price: Any):
+        self.label = threshold
+        self.min_tokens, self.max_tokens = parse_threshold(threshold)
+        self.price = parse_price(price)
+        self.display = price
+
+    def applies_to(self, prompt_tokens: int) -> bool:
+        return prompt_tokens > self.min_tokens and (self.max_tokens is None or prompt_tokens <= self.max_tokens)
+
+    def __repr__(self) -> str:
+        return f"PriceTier({self.label!r}, {self.price!r})"
+
+
+def _parse_tiers(tiers: Any) -> Tuple[PriceTier, ...]:
+    if not isinstance(tiers, list):
+        return ()
+    return tuple(PriceTier(tier.get('threshold', 'all'), tier.get('price')) for tier in tiers
+                 if isinstance(tier, dict))
+
+
+class ModelRecord:
+    """Parsed metadata of one model."""
+
+    __slots__ = ('model_key', 'name', 'meta', 'provider', 'open_source', 'reasoning', 'image_input',
+                 'tags', 'languages', 'parameters', 'context_tokens', 'release_date',
+                 'input_price', 'output_price')
+
+    def __init__(self, model_key: str, name: str, meta: Dict[str, Any]):
+        self.model_key = model_key
+        self.name = name
+        # The raw metadata as stored (shared by all callers: treat as read-only)
+        self.meta = meta
+        self.provider = meta.get('provider')
+        self.open_source = meta.get('open_source')
+        self.reasoning = meta.get('reasoning')
+        self.image_input = meta.get('image_input')
+        self.tags = frozenset(meta.get('tags') or ())
+        self.languages = frozenset(meta.get('languages') or ())
+        # Billions of parameters (0 = not published)
+        self.parameters = parse_int(meta.get('parameters'))
+        # The config stores the context window in thousands of tokens
+        context = parse_int(meta.get('context_window'))
+        self.context_tokens = context * 1000 if context is not None else None
+        self.release_date = parse_date(meta.get('release_date'))
+        self.input_price = _parse_tiers(meta.get('input_price'))
+        self.output_price = _parse_tiers(meta.get('output_price'))
+
+    def __repr__(self) -> str:
+        return f"ModelRecord({self.model_key!r}, {self.name!r})"
+
+
+class ModelRegistry:
+    """All models of one data version with O(1) lookup by key and facet lists."""
+
+    __slots__ = ('data_version', '_records', 'providers', 'tags', 'languages')
+
+    def __init__(self, records: List[ModelRecord], data_version: int = 0):
+        self.data_version = data_version
+        self._records = {record.model_key: record for record in records}
+        self.providers = tuple(sorted({r.provider for r in records if r.provider}))
+        self.tags = tuple(sorted({tag for r in records for tag in r.tags}))
+        self.languages = tuple(sorted({lang for r in records for lang in r.languages}))
+
+    @classmethod
+    def from_database(cls, db_manager, data_version: int = 0) -> 'ModelRegistry':
+        """Parse every row of the models table."""
+        with db_manager.get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute("SELECT model_key, name, meta FROM models ORDER BY model_key")
+            records = [ModelRecord(row['model_key'], row['name'], json.loads(row['meta'])) for row in cursor]
+        return cls(records, data_version)
+
+    def get(self, model_key: str) -> Optional[ModelRecord]:
+        return self._records.get(model_key)
+
+    def __getitem__(self, model_key: str) -> ModelRecord:
+        return self._records[model_key]
+
+    def __contains__(self, model_key: str) -> bool:
+        return model_key in self._records
+
+    def __iter__(self) -> Iterator[ModelRecord]:
+        return iter(self._records.values())
+
+    def __len__(self) -> int:
+        return len(self._records)
+
+    def facets(self) -> Dict[str, Any]:
+        """Filter options and numeric ranges across all models."""
+        parameters = [r.parameters for r in self if r.parameters]
+        contexts = [r.context_tokens for r in self if r.context_tokens]
+        dates = [r.release_date for r in self if r.release_date]
+        return {
+            'providers': list(self.providers),
+            'tags': list(self.tags),
+            'languages': list(self.languages),
+            'parameters': [min(parameters), max(parameters)] if parameters else None,
+            'context_tokens': [min(contexts), max(contexts)] if contexts else None,
+            'release_date': [min(dates).isoformat(), max(dates).isoformat()] if dates else None,
+        }
+
+
+_registries = VersionedCache('model_registry', max_entries=8)
+
+
+def get_model_registry(db_manager) -> ModelRegistry:
+    """Return the registry for the current data version, parsing the models table on first use."""
+    data_version, _ = db_manager.get_data_state()
+    return _registries.get_or_build(os.path.abspath(db_manager.db_path), data_version,
+                                    lambda: ModelRegistry.from_database(db_manager, data_version))
@@ -0,0 +1,122 @@
+"""
+Numeric price tables for cost calculations.
+The tiered display prices of every model ('$1.20' for prompts '≤128K', ...)
+are parsed once per data version (see model_registry.PriceTier) and laid out
+as padded numpy arrays, so the applicable tier and the cost of an output are
+computed for all models at once instead of string-matching each row.
+"""
+
+import os
+from typing import Optional, Sequence, Tuple
+
+import numpy as np
+
+from cache import VersionedCache
+from model_registry import ModelRegistry, PriceTier, get_model_registry
+
+# Prices are quoted in USD per 1M tokens
+TOKENS_PER_PRICE_UNIT = 1_000_000
+
+
+class TierArrays:
+    """One price side (input or output) of all models as (models x tiers) arrays."""
+
+    __slots__ = ('min_tokens', 'max_tokens', 'prices')
+
+    def __init__(self, tiers: Sequence[Tuple[PriceTier, ...]]):
+        width = max((len(t) for t in tiers), default=0) or 1
+        shape = (len(tiers), width)
+        self.min_tokens = np.zeros(shape)
+        self.max_tokens = np.full(shape, np.inf)
+        # NaN marks padding and prices that could not be parsed
+        self.prices = np.full(shape, np.nan)
+        for i, model_tiers in enumerate(tiers):
+            for j, tier in enumerate(model_tiers):
+                self.min_tokens[i, j] = tier.min_tokens
+                if tier.max_tokens is not None:
+                    self.max_tokens[i, j] = tier.max_tokens
+                if tier.price is not None:
+                    self.prices[i, j] = tier.price
+        for array in (self.min_tokens, self.max_tokens, self.prices):
+            array.setflags(write=False)
+
+    def price_at(self, rows: np.ndarray, prompt_tokens: np.ndarray) -> np.ndarray:
+        """
+        Price per 1M tokens of the tier each row bills at for the given prompt size.
+
+        Args:
+            rows: table rows (models), may repeat
+            prompt_tokens: prompt length for each entry of rows
+
+        Returns:
+            Array of prices; NaN where the model has no price for that size
+        """
+        prompt = np.asarray(prompt_tokens, dtype=np.float64)[:, None]
+        min_tokens = self.min_tokens[rows]
+        # Tier thresholds are exclusive below and inclusive above; an empty
+        # prompt is billed at the lowest tier
+        applies = ((prompt > min_tokens) | (min_tokens == 0)) & (prompt <= self.max_tokens[rows])
+        prices = self.prices[rows]
+        applies &= ~np.isnan(prices)
+        first = np.argmax(applies, axis=1)
+        return np.where(applies.any(axis=1), prices[np.arange(len(first)), first], np.nan)
+
+
+class PriceTable:
+    """Input and output price tiers of all models of one data version."""
+
+    __slots__ = ('data_version', 'model_keys', 'model_index', 'input', 'output')
+
+    def __init__(self, registry: ModelRegistry):
+        records = list(registry)
+        self.data_version = registry.data_version
+        self.model_keys = tuple(r.model_key for r in records)
+        self.model_index = {key: i for i, key in enumerate(self.model_keys)}
+        self.input = TierArrays([r.input_price for r in records])
+        self.output = TierArrays([r.output_price for r in records])
+
+    def rows(self, model_keys: Sequence[str]) -> np.ndarray:
+        """Table row of each model key (-1 for models without metadata)."""
+        return np.array([self.model_index.get(key, -1) for key in model_keys], dtype=np.intp)
+
+    def costs(self, model_keys: Sequence[str], prompt_tokens: Sequence[Optional[float]],
+              output_tokens: Sequence[Optional[float]]) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        USD input and output cost of many (model, prompt, output) entries at once.
+
+        Both tiers are chosen by the prompt size. NaN where tokens or prices
+        are unknown.
+        """
+        rows = self.rows(model_keys)
+        prompt = np.array(prompt_tokens, dtype=np.float64).reshape(-1)
+        output = np.array(output_tokens, dtype=np.float64).reshape(-1)
+        known = rows >= 0
+        input_prices = np.full(len(rows), np.nan)
+        output_prices = np.full(len(rows), np.nan)
+        # Unknown prompt sizes are billed at the lowest tier
+        billed_prompt = np.where(np.isnan(prompt), 0, prompt)[known]
+        input_prices[known] = self.input.price_at(rows[known], billed_prompt)
+        output_prices[known] = self.output.price_at(rows[known], billed_prompt)
+        return (prompt * input_prices / TOKENS_PER_PRICE_UNIT,
+                output * output_prices / TOKENS_PER_PRICE_UNIT)
+
+
+def quality_per_dollar(cost: np.ndarray, quality: Sequence[Optional[float]]) -> np.ndarray:
+    """
+    Average quality score points per USD for each model.
+
+    NaN for free models and where the cost or the quality is unknown.
+    """
+    quality = np.array(quality, dtype=np.float64).reshape(-1)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        return np.where(cost > 0, quality / cost, np.nan)
+
+
+_tables = VersionedCache('price_tables', max_entries=8)
+
+
+def get_price_table(db_manager) -> PriceTable:
+    """Return the price table for the current data version, built from the model registry."""
+    registry = get_model_registry(db_manager)
+    return _tables.get_or_build(os.path.abspath(db_manager.db_path), registry.data_version,
+                                lambda: PriceTable(registry))
@@ -0,0 +1,337 @@
+"""
+Opt-in request profiling (set PROFILING=true).
+
+Every SQL statement issued through DatabaseManager connections is timed along
+with the rows it returned and the DatabaseManager method that ran it.
+Statements slower than PROFILING_CONFIG['slow_query_ms'] get an EXPLAIN QUERY
+PLAN and are written to a rotating slow-query log. Template rendering is timed
+through Flask's template signals.
+
+Each response then carries a Server-Timing header that splits the request into
+SQL time, DatabaseManager time (SQL plus row and JSON decoding), template time
+and the rest of the view.
+"""
+
+import logging
+import os
+import re
+import sqlite3
+import sys
+import threading
+import time
+from logging.handlers import RotatingFileHandler
+from typing import Any, Dict, List, Optional
+
+from flask import Flask, before_render_template, request, template_rendered
+
+from config import PROFILING_CONFIG
+
+_local = threading.local()
+_slow_log: Optional[logging.Logger] = None
+_slow_log_lock = threading.Lock()
+
+_THIS_FILE = os.path.abspath(__file__)
+_DATABASE_FILE = os.path.join(os.path.dirname(_THIS_FILE), 'database.py')
+_EXPLAINABLE = re.compile(r'^\s*(SELECT|WITH|INSERT|UPDATE|DELETE|REPLACE)\b', re.IGNORECASE)
+
+
+class QueryRecord:
+    """Timing of one executed statement, including the time spent fetching its rows."""
+
+    __slots__ = ('sql', 'parameters', 'caller', 'many', 'duration', 'rows', 'finished')
+
+    def __init__(self, sql: str, parameters: Any, caller: str, many: bool = False):
+        self.sql = sql
+        self.parameters = parameters
+        self.caller = caller
+        self.many = many
+        self.duration = 0.0
+        self.rows = 0
+        self.finished = False
+
+    @property
+    def statement(self) -> str:
+        return ' '.join(self.sql.split())
+
+
+class RequestProfile:
+    """Everything measured while handling one request."""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.queries: List[QueryRecord] = []
+        self.db_calls: Dict[str, List[float]] = {}
+        # Only outermost calls count towards db_time; methods call each other
+        self.db_depth = 0
+        self.db_outer_time = 0.0
+        self.templates: List[tuple] = []
+        self._template_starts: List[float] = []
+
+    @property
+    def sql_time(self) -> float:
+        return sum(q.duration for q in self.queries)
+
+    @property
+    def db_time(self) -> float:
+        return self.db_outer_time
+
+    @property
+    def template_time(self) -> float:
+        return sum(duration for _, duration in self.templates)
+
+    def server_timing(self, total: float) -> str:
+        """Format the breakdown as a Server-Timing header value (milliseconds)."""
+        rows = sum(q.rows for q in self.queries)
+        other = max(total - self.db_time - self.template_time, 0.0)
+        return ', '.join([
+            f'sql;dur={self.sql_time * 1000:.2f};desc="{len(self.queries)} queries, {rows} rows"',
+            f'db;dur={self.db_time * 1000:.2f};desc="DatabaseManager calls"',
+            f'tpl;dur={self.template_time * 1000:.2f};desc="{len(self.templates)} templates"',
+            f'app;dur={other * 1000:.2f}',
+            f'total;dur={total * 1000:.2f}',
+        ])
+
+
+def current_profile() -> Optional[RequestProfile]:
+    """Return the profile of the request being handled on this thread, if any."""
+    return getattr(_local, 'profile', None)
+
+
+def start_db_call() -> None:
+    """Mark the start of a DatabaseManager call; pair with record_db_call()."""
+    profile = getattr(_local, 'profile', None)
+    if profile is not None:
+        profile.db_depth += 1
+
+
+def record_db_call(method: str, duration: float) -> None:
+    """Add a DatabaseManager call to the current request profile."""
+    profile = getattr(_local, 'profile', None)
+    if profile is not None:
+        entry = profile.db_calls.setdefault(method, [0, 0.0])
+        entry[0] += 1
+        entry[1] += duration
+        profile.db_depth = max(profile.db_depth - 1, 0)
+        if profile.db_depth == 0:
+            profile.db_outer_time += duration
+
+
+def _slow_query_logger() -> logging.Logger:
+    """Create the rotating slow-query log on first use."""
+    global _slow_log
+    with _slow_log_lock:
+        if _slow_log is None:
+            path = PROFILING_CONFIG['slow_query_log']
+            if os.path.dirname(path):
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+            handler = RotatingFileHandler(path, maxBytes=PROFILING_CONFIG['log_max_bytes'],
+                                          backupCount=PROFILING_CONFIG['log_backup_count'],
+                                          encoding='utf-8')
+            handler.setFormatter(logging.Formatter('%(asctime)s %(message)s'))
+            logger = logging.getLogger('leaderboard.slow_queries')
+            logger.setLevel(logging.INFO)
+            logger.propagate = False
+            logger.addHandler(handler)
+            _slow_log = logger
+    return _slow_log
+
+
+def _caller() -> str:
+    """Name the DatabaseManager method (or other function) that issued a statement."""
+    frame = sys._getframe(2)
+    fallback = None
+    while frame is not None:
+        filename = frame.f_code.co_filename
+        if filename == _DATABASE_FILE:
+            return frame.f_code.co_name
+        if fallback is None and filename != _THIS_FILE:
+            fallback = f"{os.path.basename(filename)}:{frame.f_code.co_name}"
+        frame = frame.f_back
+    return fallback or 'unknown'
+
+
+class ProfilingCursor(sqlite3.Cursor):
+    """Cursor that times execution and row fetching of each statement."""
+
+    _record: Optional[QueryRecord] = None
+
+    def _start(self, sql: str, parameters: Any, many: bool = False) -> QueryRecord:
+        self._finish()
+        record = self._record = QueryRecord(sql, parameters, _caller(), many)
+        profile = current_profile()
+        if profile is not None:
+            profile.queries.append(record)
+        return record
+
+    def _finish(self) -> None:
+        record = self._record
+        if record is None or record.finished:
+            return
+        record.finished = True
+        if record.duration * 1000 >= PROFILING_CONFIG['slow_query_ms']:
+            self._log_slow_query(record)
+
+    def _log_slow_query(self, record: QueryRecord) -> None:
+        plan = ''
+        if _EXPLAINABLE.match(record.sql) and not record.many:
+            try:
+                explain = sqlite3.Cursor(self.connection)
+                explain.execute('EXPLAIN QUERY PLAN ' + record.sql, record.parameters)
+                plan = ' | '.join(str(row[-1]) for row in explain.fetchall())
+            except sqlite3.Error:
+                plan = 'unavailable'
+        params = f"<{len(record.parameters)} rows>" if record.many else repr(record.parameters)
+        _slow_query_logger().info(
+            f"{record.duration * 1000:.1f}ms rows={record.rows} caller={record.caller} "
+            f"sql={record.statement} params={params[:200]} plan={plan or '-'}"
+        )
+
+    def _timed(self, record: QueryRecord, func, *args):
+        start = time.perf_counter()
+        try:
+            return func(*args)
+        finally:
+            record.duration += time.perf_counter() - start
+
+    def execute(self, sql, parameters=()):
+        record = self._start(sql, parameters)
+        result = self._timed(record, super().execute, sql, parameters)
+        if self.description is None:
+            record.rows = max(self.rowcount, 0)
+            self._finish()
+        return result
+
+    def executemany(self, sql, seq_of_parameters):
+        seq_of_parameters = list(seq_of_parameters)
+        record = self._start(sql, seq_of_parameters, many=True)
+        result = self._timed(record, super().executemany, sql, seq_of_parameters)
+        record.rows = max(self.rowcount, 0)
+        self._finish()
+        return result
+
+    def fetchone(self):
+        record = self._record
+        if record is None:
+            return super().fetchone()
+        row = self._timed(record, super().fetchone)
+        if row is None:
+            self._finish()
+        else:
+            record.rows += 1
+        return row
+
+    def fetchmany(self, size=None):
+        record = self._record
+        if record is None:
+            return super().fetchmany(size or self.arraysize)
+        rows = self._timed(record, super().fetchmany, size or self.arraysize)
+        record.rows += len(rows)
+        if not rows:
+            self._finish()
+        return rows
+
+    def fetchall(self):
+        record = self._record
+        if record is None:
+            return super().fetchall()
+        rows = self._timed(record, super().fetchall)
+        record.rows += len(rows)
+        self._finish()
+        return rows
+
+    def __next__(self):
+        record = self._record
+        if record is None:
+            return super().__next__()
+        start = time.perf_counter()
+        try:
+            row = super().__next__()
+        except StopIteration:
+            record.duration += time.perf_counter() - start
+            self._finish()
+            raise
+        record.duration += time.perf_counter() - start
+        record.rows += 1
+        return row
+
+    def close(self):
+        self._finish()
+        super().close()
+
+    def __del__(self):
+        try:
+            self._finish()
+        except Exception:
+            pass
+
+
+class ProfilingConnection(sqlite3.Connection):
+    """Connection whose cursors (including the execute() shortcuts) are profiled."""
+
+    def cursor(self, factory=ProfilingCursor):
+        return super().cursor(factory)
+
+    def execute(self, sql, parameters=()):
+        return self.cursor().execute(sql, parameters)
+
+    def executemany(self, sql, seq_of_parameters):
+        return self.cursor().executemany(sql, seq_of_parameters)
+
+
+def connection_factory():
+    """sqlite3.connect() factory: profiled connections when profiling is enabled."""
+    return ProfilingConnection if PROFILING_CONFIG['enabled'] else sqlite3.Connection
+
+
+def _template_started(sender, template, context, **extra):
+    profile = current_profile()
+    if profile is not None:
+        profile._template_starts.append(time.perf_counter())
+
+
+def _template_finished(sender, template, context, **extra):
+    profile = current_profile()
+    if profile is not None and profile._template_starts:
+        started = profile._template_starts.pop()
+        profile.templates.append((template.name, time.perf_counter() - started))
+
+
+def register_profiling(app: Flask) -> None:
+    """
+    Profile every request: SQL, DatabaseManager calls and template rendering.
+
+    Adds a Server-Timing header to each response and, if configured, prints the
+    breakdown with the slowest statements.
+    """
+    before_render_template.connect(_template_started, app)
+    template_rendered.connect(_template_finished, app)
+
+    @app.before_request
+    def start_profile():
+        _local.profile = RequestProfile()
+
+    @app.after_request
+    def finish_profile(response):
+        profile = current_profile()
+        if profile is None:
+            return response
+        total = time.perf_counter() - profile.started
+        response.headers['Server-Timing'] = profile.server_timing(total)
+
+        if PROFILING_CONFIG['log_requests']:
+            print(f"[profile] {request.method} {request.full_path.rstrip('?')} {response.status_code} "
+                  f"total={total * 1000:.1f}ms sql={profile.sql_time * 1000:.1f}ms "
+                  f"({len(profile.queries)} queries) db={profile.db_time * 1000:.1f}ms "
+                  f"templates={profile.template_time * 1000:.1f}ms")
+            for method, (count, duration) in sorted(profile.db_calls.items(), key=lambda item: -item[1][1]):
+                print(f"    db  {duration * 1000:8.2f}ms  {method} x{count}")
+            for name, duration in profile.templates:
+                print(f"    tpl {duration * 1000:8.2f}ms  {name}")
+            for query in sorted(profile.queries, key=lambda q: -q.duration)[:5]:
+                print(f"    sql {query.duration * 1000:8.2f}ms  rows={query.rows}  {query.caller}: "
+                      f"{query.statement[:120]}")
+        return response
+
+    @app.teardown_request
+    def clear_profile(exc):
+        _local.profile = None
@@ -52,6 +52,7 @@ def reset_tasks_only():
             cursor.execute("DELETE FROM imports")
             print("  ✓ Import history törölve")
             
+            db.bump_data_version(cursor)
             conn.commit()
             
         print("\n✅ Tasks reset kész!")
@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+"""
+Startup benchmark for the WSGI application.
+Imports `wsgi:app` in fresh interpreters (as a gunicorn worker would) and
+reports import time, resident memory and whether the heavy import stack
+(pandas, openpyxl, metrics) was loaded. Results can be appended to a JSONL
+file to track startup cost over time.
+"""
+
+import os
+import sys
+import json
+import argparse
+import subprocess
+import statistics
+from datetime import datetime
+from typing import Dict, List, Any
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+HEAVY_MODULES = ['pandas', 'openpyxl', 'eval.compute_metrics', 'scripts.import_excel']
+
+# Runs inside the child interpreter; prints one JSON line
+_PROBE = """
+import json, sys, time
+start = time.perf_counter()
+import {module}
+elapsed = time.perf_counter() - start
+rss_kb = None
+try:
+    with open('/proc/self/status') as f:
+        for line in f:
+            if line.startswith('VmRSS:'):
+                rss_kb = int(line.split()[1])
+except OSError:
+    try:
+        import resource
+        rss_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        if sys.platform == 'darwin':
+            rss_kb //= 1024
+    except ImportError:
+        pass
+print(json.dumps({{
+    'import_seconds': elapsed,
+    'rss_kb': rss_kb,
+    'modules': len(sys.modules),
+    'heavy_loaded': [m for m in {heavy!r} if m in sys.modules],
+}}))
+"""
+
+
+def run_probe(module: str, env: Dict[str, str]) -> Dict[str, Any]:
+    """Import the module in a fresh interpreter and return its measurements."""
+    code = _PROBE.format(module=module, heavy=HEAVY_MODULES)
+    result = subprocess.run([sys.executable, '-c', code], cwd=PROJECT_ROOT, env=env,
+                            capture_output=True, text=True, check=True)
+    # The application may print its own startup lines; the probe output is last
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def benchmark(module: str = 'wsgi', runs: int = 5, imports_enabled: bool = True) -> Dict[str, Any]:
+    """Run the startup probe several times and summarize the results."""
+    env = dict(os.environ, IMPORTS_ENABLED='true' if imports_enabled else 'false')
+    samples: List[Dict[str, Any]] = [run_probe(module, env) for _ in range(runs)]
+
+    times = [s['import_seconds'] for s in samples]
+    rss = [s['rss_kb'] for s in samples if s['rss_kb'] is not None]
+
+    return {
+        'timestamp': datetime.now().isoformat(timespec='seconds'),
+        'module': module,
+        'runs': runs,
+        'imports_enabled': imports_enabled,
+        'import_seconds_median': statistics.median(times),
+        'import_seconds_min': min(times),
+        'rss_kb_median': statistics.median(rss) if rss else None,
+        'modules': samples[-1]['modules'],
+        'heavy_loaded': samples[-1]['heavy_loaded'],
+    }
+
+
+def main():
+    """CLI interface for the startup benchmark."""
+    parser = argparse.ArgumentParser(description='Measure import time and memory of the WSGI app at startup')
+    parser.add_argument('--module', default='wsgi', help='Module to import (default: wsgi)')
+    parser.add_argument('--runs', type=int, default=5, help='Fresh interpreters to start (default: 5)')
+    parser.add_argument('--imports-disabled', action='store_true', help='Benchmark with IMPORTS_ENABLED=false')
+    parser.add_argument('--history', help='Append the result as one JSON line to this file')
+
+    args = parser.parse_args()
+
+    try:
+        result = benchmark(args.module, args.runs, imports_enabled=not args.imports_disabled)
+    except subprocess.CalledProcessError as e:
+        print(f"Startup probe failed:\n{e.stderr}")
+        sys.exit(1)
+
+    print("\n=== STARTUP BENCHMARK ===")
+    print(f"Module: {result['module']} (IMPORTS_ENABLED={str(result['imports_enabled']).lower()})")
+    print(f"Import time: {result['import_seconds_median'] * 1000:.1f} ms median, "
+          f"{result['import_seconds_min'] * 1000:.1f} ms min over {result['runs']} runs")
+    if result['rss_kb_median'] is not None:
+        print(f"Resident memory: {result['rss_kb_median'] / 1024:.1f} MB")
+    print(f"Modules loaded: {result['modules']}")
+    print(f"Heavy modules loaded: {', '.join(result['heavy_loaded']) or 'none'}")
+
+    if args.history:
+        with open(args.history, 'a', encoding='utf-8') as f:
+            f.write(json.dumps(result) + '\n')
+        print(f"Result appended to {args.history}")
+
+
+if __name__ == "__main__":
+    main()
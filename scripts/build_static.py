@@ -0,0 +1,266 @@
+#!/usr/bin/env python3
+"""
+Static site build.
+Renders the leaderboard, model pages, comparison views and JSON API responses
+to a directory of HTML/JSON files that can be served without Flask or SQLite.
+
+Builds are incremental: every page records a fingerprint of the data it is
+rendered from, and only pages whose fingerprint changed are rendered again.
+Rendering runs in parallel worker processes.
+"""
+
+import os
+import sys
+import json
+import hashlib
+import argparse
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Any, Tuple
+
+# Add parent directory to path for imports
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from database import DatabaseManager
+
+MANIFEST_FILE = '.build-manifest.json'
+
+_worker_client = None
+_worker_output_dir = None
+
+
+def _init_worker(output_dir: str):
+    """Create one read-only app and test client per worker process."""
+    global _worker_client, _worker_output_dir
+    os.environ['IMPORTS_ENABLED'] = 'false'
+    from app import create_app
+    _worker_client = create_app().test_client()
+    _worker_output_dir = output_dir
+
+
+def _render_batch(pages: List[Tuple[str, str]]) -> List[Tuple[str, int]]:
+    """Render a batch of (url, file) pages and write them to the output directory."""
+    results = []
+    for url, filename in pages:
+        response = _worker_client.get(url)
+        if response.status_code == 200:
+            path = os.path.join(_worker_output_dir, filename)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            tmp_path = f"{path}.tmp"
+            with open(tmp_path, 'wb') as f:
+                f.write(response.get_data())
+            os.replace(tmp_path, path)
+        results.append((filename, response.status_code))
+    return results
+
+
+def _digest(*parts: Any) -> str:
+    """Hash a sequence of values into a short fingerprint."""
+    digest = hashlib.sha1()
+    for part in parts:
+        digest.update(repr(part).encode('utf-8'))
+        digest.update(b'\0')
+    return digest.hexdigest()
+
+
+class StaticSiteBuilder:
+    """Builds the static copy of the site, re-rendering only pages whose data changed."""
+
+    def __init__(self, output_dir: str, db_manager: DatabaseManager = None):
+        self.output_dir = os.path.abspath(output_dir)
+        self.db = db_manager or DatabaseManager()
+
+    def _data_fingerprints(self) -> Tuple[Dict[str, str], Dict[str, str], str]:
+        """
+        Fingerprint the stored data per model and per task in one pass over the outputs.
+
+        Returns:
+            (model fingerprints, task fingerprints, catalog fingerprint of the model/task
+            lists); all of them include the tasks excluded from the averages
+        """
+        model_hashes = {}
+        task_hashes = {}
+        catalog = hashlib.sha1()
+
+        with self.db.get_connection() as conn:
+            cursor = conn.cursor()
+
+            # Excluded tasks change the averages, rankings and task flags on
+            # every page, so they are part of every fingerprint
+            cursor.execute("SELECT task_id FROM excluded_tasks ORDER BY task_id")
+            excluded = repr([row['task_id'] for row in cursor]).encode('utf-8')
+            catalog.update(excluded)
+
+            cursor.execute("SELECT model_key, name, meta FROM models ORDER BY model_key")
+            for row in cursor:
+                model_hashes[row['model_key']] = hashlib.sha1(excluded + repr(tuple(row)).encode('utf-8'))
+                catalog.update(repr(tuple(row)).encode('utf-8'))
+
+            cursor.execute("SELECT task_id, task_name, prompt_text, task_group FROM tasks ORDER BY task_id")
+            for row in cursor:
+                task_hashes[row['task_id']] = hashlib.sha1(excluded + repr(tuple(row)).encode('utf-8'))
+                catalog.update(repr(tuple(row)).encode('utf-8'))
+
+            cursor.execute("""
+                SELECT o.id, o.task_id, o.model_key, o.tokens, o.length, o.output_text,
+                       GROUP_CONCAT(met.metric_name || ':' || met.metric_value) AS metrics
+                FROM outputs o
+                LEFT JOIN metrics met ON o.id = met.output_id
+                GROUP BY o.id
+                ORDER BY o.id
+            """)
+            for row in cursor:
+                metrics = sorted(row['metrics'].split(',')) if row['metrics'] else []
+                encoded = repr((tuple(row)[:-1], metrics)).encode('utf-8')
+                if row['model_key'] in model_hashes:
+                    model_hashes[row['model_key']].update(encoded)
+                if row['task_id'] in task_hashes:
+                    task_hashes[row['task_id']].update(encoded)
+
+        return (
+            {key: h.hexdigest() for key, h in model_hashes.items()},
+            {key: h.hexdigest() for key, h in task_hashes.items()},
+            catalog.hexdigest()
+        )
+
+    def collect_pages(self) -> Dict[str, Tuple[str, str]]:
+        """
+        List every page of the static site.
+
+        Returns:
+            Mapping of output file -> (url, fingerprint of the data it depends on)
+        """
+        model_fps, task_fps, catalog_fp = self._data_fingerprints()
+        global_fp = _digest(catalog_fp, sorted(model_fps.items()), sorted(task_fps.items()))
+
+        pages = {
+            'index.html': ('/', global_fp),
+            'compare-model/index.html': ('/compare-model', catalog_fp),
+            'side-by-side/index.html': ('/side-by-side', catalog_fp),
+            'api/models.json': ('/api/models', catalog_fp),
+            'api/tasks.json': ('/api/tasks', catalog_fp),
+            'api/leaderboard.json': ('/api/leaderboard', global_fp),
+            'api/stats.json': ('/api/stats', global_fp),
+        }
+
+        for model_key, model_fp in model_fps.items():
+            # The model page ranks the model within its task groups, so it also
+            # depends on those rankings, not only on the model's own results
+            rankings = self.db.get_task_group_performance(model_key=model_key, limit_groups=5)
+            pages[f'model/{model_key}/index.html'] = (f'/model/{model_key}', _digest(model_fp, rankings))
+            pages[f'api/model/{model_key}.json'] = (f'/api/model/{model_key}', model_fp)
+
+        for task_id, task_fp in task_fps.items():
+            pages[f'side-by-side/{task_id}/index.html'] = (f'/side-by-side?task_id={task_id}',
+                                                           _digest(task_fp, catalog_fp))
+            pages[f'api/task/{task_id}/outputs.json'] = (f'/api/task/{task_id}/outputs', task_fp)
+
+        return pages
+
+    def _load_manifest(self) -> Dict[str, Any]:
+        """Load the fingerprints recorded by the previous build."""
+        try:
+            with open(os.path.join(self.output_dir, MANIFEST_FILE), 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def _save_manifest(self, manifest: Dict[str, Any]) -> None:
+        path = os.path.join(self.output_dir, MANIFEST_FILE)
+        with open(f"{path}.tmp", 'w', encoding='utf-8') as f:
+            json.dump(manifest, f, indent=2, sort_keys=True)
+        os.replace(f"{path}.tmp", path)
+
+    def build(self, workers: int = None, force: bool = False) -> Dict[str, Any]:
+        """Render all pages whose data (or the application code) changed since the last build."""
+        from app import create_app
+        from http_cache import code_fingerprint
+
+        os.makedirs(self.output_dir, exist_ok=True)
+        os.environ['IMPORTS_ENABLED'] = 'false'
+        build_id = code_fingerprint(create_app())
+
+        pages = self.collect_pages()
+        previous = self._load_manifest()
+        previous_pages = previous.get('pages', {}) if previous.get('build_id') == build_id else {}
+
+        stale = [
+            (url, filename)
+            for filename, (url, fingerprint) in sorted(pages.items())
+            if force
+            or previous_pages.get(filename) != fingerprint
+            or not os.path.exists(os.path.join(self.output_dir, filename))
+        ]
+
+        # Pages of models or tasks that no longer exist
+        removed = [filename for filename in previous.get('pages', {}) if filename not in pages]
+        for filename in removed:
+            try:
+                os.remove(os.path.join(self.output_dir, filename))
+            except OSError:
+                pass
+
+        results = []
+        if stale:
+            workers = workers or min(len(stale), os.cpu_count() or 1)
+            batches = [stale[i::workers * 4] for i in range(min(len(stale), workers * 4))]
+
+            if workers > 1:
+                with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                         initargs=(self.output_dir,)) as executor:
+                    for batch_results in executor.map(_render_batch, batches):
+                        results.extend(batch_results)
+            else:
+                _init_worker(self.output_dir)
+                for batch in batches:
+                    results.extend(_render_batch(batch))
+
+        failed = {filename: status for filename, status in results if status != 200}
+        self._save_manifest({
+            'build_id': build_id,
+            'pages': {
+                filename: fingerprint
+                for filename, (_, fingerprint) in pages.items()
+                if filename not in failed
+            }
+        })
+
+        return {
+            'success': not failed,
+            'total_pages': len(pages),
+            'rendered': len(results) - len(failed),
+            'unchanged': len(pages) - len(stale),
+            'removed': len(removed),
+            'failed': failed
+        }
+
+
+def main():
+    """CLI interface for building the static site."""
+    parser = argparse.ArgumentParser(description='Render the leaderboard to static HTML/JSON files')
+    parser.add_argument('--output', '-o', default='static_site', help='Output directory (default: static_site)')
+    parser.add_argument('--workers', type=int, help='Worker processes (default: CPU count)')
+    parser.add_argument('--force', action='store_true', help='Re-render every page, not only changed ones')
+
+    args = parser.parse_args()
+
+    try:
+        result = StaticSiteBuilder(args.output).build(workers=args.workers, force=args.force)
+    except Exception as e:
+        print(f"Static build failed: {e}")
+        sys.exit(1)
+
+    print("\n=== STATIC BUILD COMPLETED ===")
+    print(f"Output directory: {os.path.abspath(args.output)}")
+    print(f"Pages: {result['total_pages']}")
+    print(f"Rendered: {result['rendered']}")
+    print(f"Unchanged: {result['unchanged']}")
+    print(f"Removed: {result['removed']}")
+    for filename, status in result['failed'].items():
+        print(f"  Failed: {filename} (HTTP {status})")
+
+    if not result['success']:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,62 @@
+#!/usr/bin/env python3
+"""
+Report the estimated cost of running the task suite per model.
+Aggregates are kept up to date at import time; use --recompute after editing
+prices or switching the token counter.
+"""
+
+import os
+import sys
+import argparse
+
+# Add parent directory to path for imports
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from database import DatabaseManager
+from eval.costs import CostEngine
+
+
+def main():
+    """CLI interface for cost estimation."""
+    parser = argparse.ArgumentParser(description='Estimate the cost of the task suite per model')
+    parser.add_argument('--model', action='append', dest='models', help='Only this model (repeatable)')
+    parser.add_argument('--task-group', help='Only this task group')
+    parser.add_argument('--recompute', action='store_true',
+                       help='Recompute the aggregates (and, for all models, the prompt token estimates) first')
+
+    args = parser.parse_args()
+
+    db = DatabaseManager()
+    db.init_database(verbose=False)
+
+    if args.recompute:
+        try:
+            with db.get_connection() as conn:
+                cursor = conn.cursor()
+                if not args.models:
+                    # Prompt estimates are shared by all models
+                    cursor.execute("UPDATE tasks SET prompt_tokens = NULL")
+                rows = CostEngine(db).refresh(cursor, args.models)
+                db.bump_data_version(cursor)
+                conn.commit()
+            print(f"Recomputed {rows} cost aggregates")
+        except Exception as e:
+            print(f"Cost computation failed: {e}")
+            sys.exit(1)
+
+    costs = db.get_cost_summary(args.models, args.task_group)
+    if not costs:
+        print("No cost data found")
+        return
+
+    print("\n=== ESTIMATED COST ===")
+    print(f"{'Model':<40} {'Outputs':>8} {'Input tok':>11} {'Output tok':>11} {'Total $':>10} {'$/output':>10}")
+    for summary in sorted(costs, key=lambda s: s['total_cost'], reverse=True):
+        per_output = f"{summary['cost_per_output']:.6f}" if summary['cost_per_output'] is not None else 'N/A'
+        print(f"{summary['name'][:40]:<40} {summary['priced_outputs']:>8} {summary['input_tokens']:>11,} "
+              f"{summary['output_tokens']:>11,} {summary['total_cost']:>10.4f} {per_output:>10}")
+    print(f"\nTotal: ${sum(s['total_cost'] for s in costs):.4f} over {len(costs)} models")
+
+
+if __name__ == "__main__":
+    main()
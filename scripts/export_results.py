@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+"""
+Streaming export of stored results.
+Writes one row per output (task x model) with its metrics as NDJSON or CSV.
+Rows are streamed from the database cursor, so full dumps run in constant memory.
+"""
+
+import os
+import io
+import sys
+import csv
+import json
+import argparse
+from typing import Iterator, List, Optional
+
+# Add parent directory to path for imports
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from database import DatabaseManager
+
+EXPORT_FORMATS = ('ndjson', 'csv')
+
+BASE_COLUMNS = [
+    'output_id', 'task_id', 'task_name', 'task_group', 'model_key', 'model_name',
+    'import_id', 'tokens', 'length'
+]
+
+
+class ResultExporter:
+    """Streams outputs and their metrics as NDJSON or CSV text chunks."""
+
+    def __init__(self, db_manager: DatabaseManager = None):
+        self.db = db_manager or DatabaseManager()
+
+    def iter_chunks(self, fmt: str = 'ndjson', model_keys: Optional[List[str]] = None,
+                    task_group: Optional[str] = None, import_id: Optional[int] = None,
+                    include_output_text: bool = True) -> Iterator[str]:
+        """Yield the export one row at a time."""
+        if fmt not in EXPORT_FORMATS:
+            raise ValueError(f"Unknown export format: {fmt}")
+
+        rows = self.db.iter_export_rows(
+            model_keys=model_keys,
+            task_group=task_group,
+            import_id=import_id,
+            include_output_text=include_output_text
+        )
+
+        if fmt == 'ndjson':
+            for row in rows:
+                yield json.dumps(row, ensure_ascii=False) + '\n'
+            return
+
+        # CSV needs a fixed header, so metric columns are looked up up front
+        columns = BASE_COLUMNS + (['output_text'] if include_output_text else []) + self.db.get_metric_names()
+        buffer = io.StringIO()
+        writer = csv.DictWriter(buffer, fieldnames=columns, extrasaction='ignore')
+
+        writer.writeheader()
+        yield buffer.getvalue()
+
+        for row in rows:
+            buffer.seek(0)
+            buffer.truncate()
+            writer.writerow(row)
+            yield buffer.getvalue()
+
+
+def main():
+    """CLI interface for exporting results."""
+    parser = argparse.ArgumentParser(description='Export outputs and metrics as NDJSON or CSV')
+    parser.add_argument('--format', choices=EXPORT_FORMATS, default='ndjson', help='Export format (default: ndjson)')
+    parser.add_argument('--model', action='append', dest='models', help='Model key to include (repeatable)')
+    parser.add_argument('--task-group', help='Only export tasks in this group')
+    parser.add_argument('--import-id', type=int, help='Only export outputs from this import')
+    parser.add_argument('--no-text', action='store_true', help='Leave out the output text')
+    parser.add_argument('--output', '-o', help='Output file (default: stdout)')
+
+    args = parser.parse_args()
+
+    exporter = ResultExporter()
+    chunks = exporter.iter_chunks(
+        fmt=args.format,
+        model_keys=args.models,
+        task_group=args.task_group,
+        import_id=args.import_id,
+        include_output_text=not args.no_text
+    )
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8', newline='') as f:
+            f.writelines(chunks)
+        print(f"Export written to {args.output}", file=sys.stderr)
+    else:
+        sys.stdout.writelines(chunks)
+
+
+if __name__ == "__main__":
+    main()
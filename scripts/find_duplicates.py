@@ -0,0 +1,56 @@
+#!/usr/bin/env python3
+"""
+List clusters of near-duplicate model outputs per task.
+Uses the MinHash/LSH index that is maintained incrementally at import time.
+"""
+
+import os
+import sys
+import argparse
+
+# Add parent directory to path for imports
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from database import DatabaseManager
+from eval.near_duplicates import NearDuplicateIndex
+
+
+def main():
+    """CLI interface for near-duplicate detection."""
+    parser = argparse.ArgumentParser(description='List clusters of near-duplicate outputs per task')
+    parser.add_argument('--task', help='Only report clusters for this task ID')
+    parser.add_argument('--threshold', type=float, help='Minimum estimated Jaccard similarity (default from config)')
+    parser.add_argument('--rebuild', action='store_true',
+                       help='Rebuild the index from all stored outputs before listing')
+
+    args = parser.parse_args()
+
+    db = DatabaseManager()
+    db.init_database(verbose=False)
+    index = NearDuplicateIndex(db)
+
+    try:
+        if args.rebuild:
+            indexed = index.rebuild(args.task)
+            print(f"Indexed {indexed} outputs")
+
+        tasks = index.find_clusters(args.task, args.threshold)
+    except Exception as e:
+        print(f"Near-duplicate detection failed: {e}")
+        sys.exit(1)
+
+    if not tasks:
+        print("No near-duplicate outputs found.")
+        return
+
+    for task in tasks:
+        print(f"\n{task['task_id']}: {len(task['clusters'])} cluster(s)")
+        for i, cluster in enumerate(task['clusters'], 1):
+            print(f"  [{i}] {cluster['size']} outputs, similarity "
+                  f"{cluster['min_similarity']:.2f}-{cluster['avg_similarity']:.2f} (min-avg)")
+            for output in cluster['outputs']:
+                print(f"      - {output['model_key']}: {output['model_name']}")
+
+
+if __name__ == "__main__":
+    main()
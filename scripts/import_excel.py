@@ -8,6 +8,7 @@ import json
 import os
 import sys
 import argparse
+import time
 from typing import Dict, List, Any, Tuple, Optional
 from datetime import datetime
 
@@ -17,6 +18,12 @@ sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 from database import DatabaseManager
 from config import ALLOWED_EXTENSIONS, DEFAULT_COLUMN_MAPPING, MODELS
 from eval.compute_metrics import MetricsCalculator
+from eval.near_duplicates import NearDuplicateIndex
+from eval.tokenizer import get_token_counter
+from eval.score_matrix import refresh_snapshot
+from eval.costs import CostEngine
+from eval.history import ScoreHistory
+from telemetry import record_import
 
 
 class ExcelImporter:
@@ -25,6 +32,8 @@ class ExcelImporter:
     def __init__(self, db_manager: DatabaseManager = None):
         self.db = db_manager or DatabaseManager()
         self.metrics_calc = MetricsCalculator()
+        self.near_duplicates = NearDuplicateIndex(self.db)
+        self.token_counter = get_token_counter()
         
     def load_column_mapping(self, mapping_file: str) -> Dict[str, str]:
         """Load column mapping from JSON file."""
@@ -133,8 +142,20 @@ class ExcelImporter:
         tasks_data = []
         outputs_data = []
         
+        # Compute length and token counts for the whole batch up front; they are
+        # used whenever the sheet does not provide a value. Empty cells are read
+        # as NaN: store them as '' and leave their length and tokens unknown
+        output_col = mapping.get('output_text', '')
+        if output_col in df.columns:
+            texts = df[output_col].fillna('').map(str)
+        else:
+            texts = pd.Series('', index=df.index)
+        has_text = (texts.str.strip() != '').to_numpy()
+        computed_lengths = texts.str.len().to_numpy()
+        computed_tokens = self.token_counter.count_many(texts)
+        
         # Process each row
-        for _, row in df.iterrows():
+        for position, (_, row) in enumerate(df.iterrows()):
             # Prepare task data (all required fields)
             task_data = {
                 'task_id': str(row[mapping['task_id']]),
@@ -151,10 +172,17 @@ class ExcelImporter:
             output_data = {
                 'task_id': task_data['task_id'],
                 'model_key': str(row[mapping['model_key']]),
-                'output_text': str(row.get(mapping.get('output_text', ''), '')),  # Optional now
+                'output_text': texts.iloc[position],  # Optional now
                 'tokens': self._safe_int_convert(row.get(mapping.get('tokens', ''), None)),
+                'length': self._safe_int_convert(row.get(mapping.get('length', ''), None)),
                 'quality_score': self._safe_float_convert(row[mapping['quality_score']])  # Required
             }
+            
+            # Fill in missing length/token counts from the batch computation
+            if output_data['length'] is None and has_text[position]:
+                output_data['length'] = int(computed_lengths[position])
+            if output_data['tokens'] is None and has_text[position]:
+                output_data['tokens'] = int(computed_tokens[position])
             outputs_data.append(output_data)
         
         return tasks_data, outputs_data
@@ -224,10 +252,24 @@ class ExcelImporter:
         """Execute the actual database import with better transaction handling."""
         
         print(f"Starting import: {len(tasks_data)} tasks, {len(outputs_data)} outputs")
+        started = time.perf_counter()
         
         with self.db.get_connection() as conn:
             cursor = conn.cursor()
             
+            # Tasks whose prompt or group changes invalidate the costs of every model that ran them
+            task_ids = [task['task_id'] for task in tasks_data]
+            previous_tasks = {}
+            if task_ids:
+                cursor.execute(f"""
+                    SELECT task_id, prompt_text, task_group FROM tasks
+                    WHERE task_id IN ({','.join('?' * len(task_ids))})
+                """, task_ids)
+                previous_tasks = {row[0]: (row[1], row[2]) for row in cursor.fetchall()}
+            changed_task_ids = [task['task_id'] for task in tasks_data
+                                if task['task_id'] in previous_tasks
+                                and previous_tasks[task['task_id']] != (task['prompt_text'], task['task_group'])]
+            
             # Insert tasks in batch
             tasks_inserted = 0
             print("Importing tasks...")
@@ -248,6 +290,7 @@ class ExcelImporter:
             # Insert outputs in batch
             outputs_inserted = 0
             output_ids = []
+            replaced_output_ids = []
             print("Importing outputs...")
             
             for i, output in enumerate(outputs_data):
@@ -263,12 +306,13 @@ class ExcelImporter:
                         cursor.execute("""
                             DELETE FROM metrics WHERE output_id = ?
                         """, (existing_output[0],))
+                        replaced_output_ids.append(existing_output[0])
                     
                     cursor.execute("""
-                        INSERT OR REPLACE INTO outputs (task_id, model_key, output_text, tokens)
-                        VALUES (?, ?, ?, ?)
+                        INSERT OR REPLACE INTO outputs (task_id, model_key, output_text, tokens, length)
+                        VALUES (?, ?, ?, ?, ?)
                     """, (output['task_id'], output['model_key'], output['output_text'], 
-                         output['tokens']))
+                         output['tokens'], output.get('length')))
                     
                     # Get the output ID for metrics computation
                     cursor.execute("""
@@ -289,6 +333,18 @@ class ExcelImporter:
             conn.commit()
             print(f"Outputs committed: {outputs_inserted}")
             
+            # Update near-duplicate index incrementally for the imported outputs
+            try:
+                self.near_duplicates.remove_outputs(cursor, replaced_output_ids)
+                indexed = self.near_duplicates.index_outputs(cursor, [
+                    (output_id, output['task_id'], output['model_key'], output['output_text'])
+                    for output_id, output in output_ids
+                ])
+                conn.commit()
+                print(f"Near-duplicate index updated: {indexed} outputs")
+            except Exception as e:
+                print(f"Error updating near-duplicate index: {e}")
+            
             # Compute and insert metrics with batching
             metrics_inserted = 0
             if compute_metrics:
@@ -313,9 +369,10 @@ class ExcelImporter:
                         for metric_name, metric_value in metrics.items():
                             if metric_value is not None:
                                 cursor.execute("""
-                                    INSERT OR REPLACE INTO metrics (output_id, metric_name, metric_value)
-                                    VALUES (?, ?, ?)
-                                """, (output_id, metric_name, metric_value))
+                                    INSERT OR REPLACE INTO metrics (output_id, metric_name, metric_value, metric_version)
+                                    VALUES (?, ?, ?, ?)
+                                """, (output_id, metric_name, metric_value,
+                                     self.metrics_calc.get_metric_version(metric_name)))
                                 metrics_inserted += 1
                         
                         # Commit every batch_size outputs to prevent long locks
@@ -336,8 +393,42 @@ class ExcelImporter:
                 f"Imported {tasks_inserted} tasks, {outputs_inserted} outputs, {metrics_inserted} metrics"
             )
             
+            # Tag the imported outputs with the import they came from
+            cursor.executemany("UPDATE outputs SET import_id = ? WHERE id = ?",
+                               [(import_id, output_id) for output_id, _ in output_ids])
+            
+            # Record the cells this import changed (leaderboard as_of=<import_id>)
+            try:
+                changed_cells = ScoreHistory(self.db).record(cursor, import_id)
+                print(f"Score history recorded: {changed_cells} changed cells")
+            except Exception as e:
+                print(f"Error recording score history: {e}")
+            
+            # Reprice only the models this import touched
+            touched_models = {output['model_key'] for _, output in output_ids}
+            if changed_task_ids:
+                cursor.execute(f"""
+                    SELECT DISTINCT model_key FROM outputs
+                    WHERE task_id IN ({','.join('?' * len(changed_task_ids))})
+                """, changed_task_ids)
+                touched_models.update(row[0] for row in cursor.fetchall())
+            try:
+                CostEngine(self.db, self.token_counter).refresh(cursor, touched_models)
+                print(f"Cost aggregates updated for {len(touched_models)} models")
+            except Exception as e:
+                print(f"Error updating cost aggregates: {e}")
+            
+            self.db.bump_data_version(cursor)
             conn.commit()
         
+        # Workers memory-map this file instead of each rebuilding the score matrix;
+        # the import is committed, so a failure here only costs them a rebuild
+        try:
+            refresh_snapshot(self.db)
+        except Exception as e:
+            print(f"Error refreshing score snapshot: {e}")
+        record_import(time.perf_counter() - started, tasks_inserted, outputs_inserted, metrics_inserted)
+        
         return {
             'success': True,
             'import_id': import_id,
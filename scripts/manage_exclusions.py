@@ -0,0 +1,66 @@
+#!/usr/bin/env python3
+"""
+Manage the tasks excluded from quality score averages.
+A rule excludes one task or a whole task group; all leaderboard averages,
+charts and statistics pick up a change on the next request.
+"""
+
+import os
+import sys
+import argparse
+
+# Add parent directory to path for imports
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from database import DatabaseManager
+from eval.score_matrix import refresh_snapshot
+
+
+def main():
+    """CLI interface for task exclusion rules."""
+    parser = argparse.ArgumentParser(description='Manage tasks excluded from quality score averages')
+    subparsers = parser.add_subparsers(dest='command')
+
+    subparsers.add_parser('list', help='List the rules and the tasks they exclude')
+    for command, help_text in [('add', 'Add an exclusion rule'), ('remove', 'Remove an exclusion rule')]:
+        subparser = subparsers.add_parser(command, help=help_text)
+        target = subparser.add_mutually_exclusive_group(required=True)
+        target.add_argument('--task', help='Task id')
+        target.add_argument('--task-group', help='Task group')
+        if command == 'add':
+            subparser.add_argument('--reason', help='Why the task is excluded')
+
+    args = parser.parse_args()
+
+    db = DatabaseManager()
+    db.init_database(verbose=False)
+
+    if args.command in ('add', 'remove'):
+        scope, value = ('task', args.task) if args.task else ('task_group', args.task_group)
+        if args.command == 'add':
+            try:
+                added = db.add_task_exclusion(scope, value, args.reason)
+            except ValueError as e:
+                print(f"Error: {e}")
+                sys.exit(1)
+            print(f"{'Added' if added else 'Updated'} rule: {scope} {value}")
+        elif db.remove_task_exclusion(scope, value):
+            print(f"Removed rule: {scope} {value}")
+        else:
+            print(f"No rule for {scope} {value}")
+            sys.exit(1)
+        # Keep the shared score snapshot at the new data version
+        refresh_snapshot(db)
+
+    rules = db.get_task_exclusion_rules()
+    print("\n=== TASK EXCLUSIONS ===")
+    if not rules:
+        print("No exclusion rules")
+    for rule in rules:
+        print(f"{rule['scope']:<11} {rule['value']:<30} {rule['reason'] or ''}")
+    excluded = db.get_excluded_tasks()
+    print(f"\nExcluded tasks ({len(excluded)}): {', '.join(excluded) if excluded else 'none'}")
+
+
+if __name__ == "__main__":
+    main()
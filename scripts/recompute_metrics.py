@@ -0,0 +1,187 @@
+#!/usr/bin/env python3
+"""
+Incremental metric recomputation.
+Finds outputs whose stored metrics were computed with an older metric
+definition (see MetricsCalculator.METRIC_VERSIONS) and recomputes only those,
+in parallel batches, writing the results back in bulk.
+"""
+
+import os
+import sys
+import argparse
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Any, Tuple
+
+# Add parent directory to path for imports
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from database import DatabaseManager
+from eval.compute_metrics import MetricsCalculator
+from eval.history import ScoreHistory
+from eval.score_matrix import refresh_snapshot
+
+_worker_calc = None
+
+
+def _init_worker():
+    """Create one MetricsCalculator per worker process."""
+    global _worker_calc
+    _worker_calc = MetricsCalculator()
+
+
+def _compute_batch(batch: List[Tuple[int, str, str, float]]) -> List[Tuple[int, Dict[str, float]]]:
+    """Compute metrics for a batch of (output_id, prompt_text, output_text, quality_score)."""
+    calc = _worker_calc or MetricsCalculator()
+    return [
+        (output_id, calc.compute_all_metrics_with_quality(prompt_text or '', output_text or '', quality_score))
+        for output_id, prompt_text, output_text, quality_score in batch
+    ]
+
+
+class MetricsRecomputer:
+    """Recomputes metrics whose stored version is older than the current definition."""
+
+    def __init__(self, db_manager: DatabaseManager = None):
+        self.db = db_manager or DatabaseManager()
+        self.metrics_calc = MetricsCalculator()
+
+    def find_stale_outputs(self) -> List[int]:
+        """Return IDs of outputs with at least one metric stored under an outdated version."""
+        versions = self.metrics_calc.METRIC_VERSIONS
+        if not versions:
+            return []
+
+        conditions = []
+        params = []
+        for metric_name, version in versions.items():
+            conditions.append("(metric_name = ? AND (metric_version IS NULL OR metric_version != ?))")
+            params.extend([metric_name, version])
+
+        with self.db.get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute(f"""
+                SELECT DISTINCT output_id FROM metrics
+                WHERE {' OR '.join(conditions)}
+                ORDER BY output_id
+            """, params)
+            return [row[0] for row in cursor.fetchall()]
+
+    def _load_batch(self, cursor, output_ids: List[int]) -> List[Tuple[int, str, str, float]]:
+        """Load the inputs needed to recompute metrics for a batch of outputs."""
+        placeholders = ','.join('?' * len(output_ids))
+        cursor.execute(f"""
+            SELECT
+                o.id,
+                t.prompt_text,
+                o.output_text,
+                (SELECT metric_value FROM metrics
+                 WHERE output_id = o.id AND metric_name = 'quality_score') AS quality_score
+            FROM outputs o
+            LEFT JOIN tasks t ON o.task_id = t.task_id
+            WHERE o.id IN ({placeholders})
+        """, output_ids)
+        return [tuple(row) for row in cursor.fetchall()]
+
+    def _write_results(self, cursor, results: List[Tuple[int, Dict[str, float]]]) -> int:
+        """Write recomputed metrics in bulk, stamping each with its current version."""
+        rows = [
+            (output_id, metric_name, metric_value, self.metrics_calc.get_metric_version(metric_name))
+            for output_id, metrics in results
+            for metric_name, metric_value in metrics.items()
+            if metric_value is not None
+        ]
+        cursor.executemany("""
+            INSERT OR REPLACE INTO metrics (output_id, metric_name, metric_value, metric_version)
+            VALUES (?, ?, ?, ?)
+        """, rows)
+        return len(rows)
+
+    def recompute(self, batch_size: int = 200, workers: int = None,
+                  dry_run: bool = False) -> Dict[str, Any]:
+        """Recompute stale metrics in parallel batches."""
+        stale_ids = self.find_stale_outputs()
+        print(f"Found {len(stale_ids)} outputs with stale metrics")
+
+        if dry_run or not stale_ids:
+            return {
+                'success': True,
+                'dry_run': dry_run,
+                'stale_outputs': len(stale_ids),
+                'metrics_written': 0
+            }
+
+        batches = [stale_ids[i:i + batch_size] for i in range(0, len(stale_ids), batch_size)]
+        workers = workers or min(len(batches), os.cpu_count() or 1)
+        metrics_written = 0
+
+        with self.db.get_connection() as conn:
+            cursor = conn.cursor()
+            inputs = [self._load_batch(cursor, batch) for batch in batches]
+
+            if workers > 1:
+                with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker) as executor:
+                    results_iter = executor.map(_compute_batch, inputs)
+                    for i, results in enumerate(results_iter, 1):
+                        metrics_written += self._write_results(cursor, results)
+                        conn.commit()
+                        print(f"  Batch {i}/{len(batches)} written")
+            else:
+                for i, batch in enumerate(inputs, 1):
+                    metrics_written += self._write_results(cursor, _compute_batch(batch))
+                    conn.commit()
+                    print(f"  Batch {i}/{len(batches)} written")
+
+            # Record the recompute like an import, so the score history (leaderboard
+            # as_of) attributes the changed values to it rather than to the next import
+            import_id = self.db.insert_import_record(
+                'recompute_metrics',
+                f"Recomputed {metrics_written} metrics for {len(stale_ids)} outputs"
+            )
+            changed_cells = ScoreHistory(self.db).record(cursor, import_id)
+            print(f"Score history recorded: {changed_cells} changed cells")
+
+            self.db.bump_data_version(cursor)
+            conn.commit()
+
+        refresh_snapshot(self.db)
+
+        return {
+            'success': True,
+            'dry_run': False,
+            'stale_outputs': len(stale_ids),
+            'metrics_written': metrics_written,
+            'import_id': import_id
+        }
+
+
+def main():
+    """CLI interface for incremental metric recomputation."""
+    parser = argparse.ArgumentParser(description='Recompute metrics stored under an outdated metric version')
+    parser.add_argument('--batch-size', type=int, default=200, help='Outputs per batch (default: 200)')
+    parser.add_argument('--workers', type=int, help='Worker processes (default: CPU count)')
+    parser.add_argument('--dry-run', action='store_true', help='Only report how many outputs are stale')
+
+    args = parser.parse_args()
+
+    db = DatabaseManager()
+    db.init_database(verbose=False)
+
+    try:
+        result = MetricsRecomputer(db).recompute(
+            batch_size=args.batch_size,
+            workers=args.workers,
+            dry_run=args.dry_run
+        )
+    except Exception as e:
+        print(f"Recomputation failed: {e}")
+        sys.exit(1)
+
+    print("\n=== RECOMPUTE COMPLETED ===")
+    print(f"Stale outputs: {result['stale_outputs']}")
+    print(f"Metrics written: {result['metrics_written']}")
+    if result.get('import_id'):
+        print(f"Recorded as import: {result['import_id']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,51 @@
+"""
+Registry of tasks left out of quality score averages.
+Exclusion rules are stored in the task_exclusions table; a rule names either
+one task ('task') or a whole task group ('task_group'). The excluded_tasks
+view resolves them against the tasks table for SQL aggregates, and the
+resolved set is loaded once per data version for the score-matrix analytics,
+so every page and endpoint averages over the same tasks.
+"""
+
+import os
+from typing import Any, Dict, FrozenSet, List, Tuple
+
+from cache import VersionedCache
+
+EXCLUSION_SCOPES = ('task', 'task_group')
+
+
+class TaskExclusions:
+    """Exclusion rules and the task ids they resolve to, for one data version."""
+
+    __slots__ = ('data_version', 'rules', 'task_ids', '_task_set')
+
+    def __init__(self, data_version: int, rules: List[Dict[str, Any]], task_ids: Tuple[str, ...]):
+        self.data_version = data_version
+        self.rules = rules
+        self.task_ids = task_ids
+        self._task_set: FrozenSet[str] = frozenset(task_ids)
+
+    def __contains__(self, task_id: str) -> bool:
+        return task_id in self._task_set
+
+    @classmethod
+    def from_database(cls, db_manager, data_version: int) -> 'TaskExclusions':
+        """Load the rules and resolve them to the task ids that exist."""
+        with db_manager.get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute("SELECT scope, value, reason, created_at FROM task_exclusions ORDER BY scope, value")
+            rules = [dict(row) for row in cursor.fetchall()]
+            cursor.execute("SELECT task_id FROM excluded_tasks ORDER BY task_id")
+            task_ids = tuple(row[0] for row in cursor.fetchall())
+        return cls(data_version, rules, task_ids)
+
+
+_exclusions = VersionedCache('task_exclusions', max_entries=8)
+
+
+def get_task_exclusions(db_manager) -> TaskExclusions:
+    """Return the exclusions for the current data version, loading them on first use."""
+    data_version, _ = db_manager.get_data_state()
+    return _exclusions.get_or_build(os.path.abspath(db_manager.db_path), data_version,
+                                    lambda: TaskExclusions.from_database(db_manager, data_version))
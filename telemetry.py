@@ -0,0 +1,291 @@
+"""
+In-process telemetry exposed in the Prometheus text format at /metrics.
+
+Counters and histograms are recorded into per-thread shards, so the hot path
+never takes a lock; shards are only summed when /metrics is scraped. Values
+are per process: with several gunicorn workers each worker reports its own.
+"""
+
+import functools
+import inspect
+import threading
+import time
+import weakref
+from bisect import bisect_left
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+from flask import Flask, g, request
+
+from profiling import record_db_call, start_db_call
+
+REQUEST_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+DB_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 1.0, 5.0)
+IMPORT_BUCKETS = (0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0, 300.0, 600.0)
+
+Labels = Tuple[Tuple[str, str], ...]
+
+
+def _labels(**labels: Any) -> Labels:
+    return tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+
+def _format_labels(labels: Labels, extra: Optional[Tuple[str, str]] = None) -> str:
+    pairs = list(labels) + ([extra] if extra else [])
+    if not pairs:
+        return ''
+    escaped = (
+        f'{k}="' + v.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n') + '"'
+        for k, v in pairs
+    )
+    return '{' + ','.join(escaped) + '}'
+
+
+def _format_value(value: float) -> str:
+    if value == float('inf'):
+        return '+Inf'
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Telemetry:
+    """Registry of counters, histograms and gauges."""
+
+    def __init__(self):
+        self._definitions: Dict[str, Tuple[str, str, Tuple[float, ...]]] = {}
+        self._local = threading.local()
+        self._shards: List[Tuple[weakref.ref, Dict]] = []
+        self._retired: Dict[Tuple[str, Labels], Any] = {}
+        self._shards_lock = threading.Lock()
+        self._gauges: Dict[Tuple[str, Labels], float] = {}
+        self._collectors: List[Callable[[], Iterable[Tuple[str, Labels, float]]]] = []
+
+    # Definitions -----------------------------------------------------------
+
+    def counter(self, name: str, help_text: str) -> None:
+        self._definitions[name] = ('counter', help_text, ())
+
+    def histogram(self, name: str, help_text: str, buckets: Tuple[float, ...] = REQUEST_BUCKETS) -> None:
+        self._definitions[name] = ('histogram', help_text, tuple(buckets))
+
+    def gauge(self, name: str, help_text: str) -> None:
+        self._definitions[name] = ('gauge', help_text, ())
+
+    def add_collector(self, collector: Callable[[], Iterable[Tuple[str, Labels, float]]]) -> None:
+        """Register a callable returning (name, labels, value) samples read at scrape time."""
+        self._collectors.append(collector)
+
+    # Recording (lock-free) -------------------------------------------------
+
+    def _shard(self) -> Dict:
+        shard = getattr(self._local, 'shard', None)
+        if shard is None:
+            shard = self._local.shard = {}
+            with self._shards_lock:
+                self._shards.append((weakref.ref(threading.current_thread()), shard))
+        return shard
+
+    def inc(self, name: str, value: float = 1, **labels: Any) -> None:
+        """Increment a counter."""
+        shard = self._shard()
+        key = (name, _labels(**labels))
+        shard[key] = shard.get(key, 0) + value
+
+    def observe(self, name: str, value: float, **labels: Any) -> None:
+        """Record one observation in a histogram."""
+        buckets = self._definitions[name][2]
+        shard = self._shard()
+        key = (name, _labels(**labels))
+        entry = shard.get(key)
+        if entry is None:
+            # One slot per bucket, one for +Inf, then the running sum
+            entry = shard[key] = [0] * (len(buckets) + 1) + [0.0]
+        entry[bisect_left(buckets, value)] += 1
+        entry[-1] += value
+
+    def set(self, name: str, value: float, **labels: Any) -> None:
+        """Set a gauge (last write wins)."""
+        self._gauges[(name, _labels(**labels))] = value
+
+    def reset(self) -> None:
+        """Drop all recorded values (e.g. warmup traffic before gunicorn forks)."""
+        with self._shards_lock:
+            for _, shard in self._shards:
+                shard.clear()
+            self._retired.clear()
+            self._gauges.clear()
+
+    # Exposition -------------------------------------------------------------
+
+    @staticmethod
+    def _merge(target: Dict, source: Iterable) -> None:
+        for key, value in source:
+            if isinstance(value, list):
+                current = target.get(key)
+                target[key] = [a + b for a, b in zip(current, value)] if current else list(value)
+            else:
+                target[key] = target.get(key, 0) + value
+
+    def _collect(self) -> Dict[Tuple[str, Labels], Any]:
+        """Sum all shards, folding shards of finished threads into the retired totals."""
+        with self._shards_lock:
+            live = []
+            for thread_ref, shard in self._shards:
+                thread = thread_ref()
+                if thread is None or not thread.is_alive():
+                    self._merge(self._retired, list(shard.items()))
+                else:
+                    live.append((thread_ref, shard))
+            self._shards = live
+            totals = {key: list(value) if isinstance(value, list) else value
+                      for key, value in self._retired.items()}
+            for _, shard in live:
+                self._merge(totals, list(shard.items()))
+        return totals
+
+    def render(self) -> str:
+        """Render all metrics in the Prometheus text exposition format."""
+        samples: Dict[str, List[Tuple[Labels, Any]]] = {}
+        for (name, labels), value in self._collect().items():
+            samples.setdefault(name, []).append((labels, value))
+        for (name, labels), value in list(self._gauges.items()):
+            samples.setdefault(name, []).append((labels, value))
+        for collector in self._collectors:
+            for name, labels, value in collector():
+                samples.setdefault(name, []).append((labels, value))
+
+        lines = []
+        for name in sorted(self._definitions):
+            kind, help_text, buckets = self._definitions[name]
+            lines.append(f'# HELP {name} {help_text}')
+            lines.append(f'# TYPE {name} {kind}')
+            for labels, value in sorted(samples.get(name, [])):
+                if kind == 'histogram':
+                    cumulative = 0
+                    for bound, count in zip(buckets + (float('inf'),), value[:-1]):
+                        cumulative += count
+                        lines.append(f'{name}_bucket{_format_labels(labels, ("le", _format_value(bound)))} {cumulative}')
+                    lines.append(f'{name}_sum{_format_labels(labels)} {_format_value(value[-1])}')
+                    lines.append(f'{name}_count{_format_labels(labels)} {cumulative}')
+                else:
+                    lines.append(f'{name}{_format_labels(labels)} {_format_value(value)}')
+        return '\n'.join(lines) + '\n'
+
+
+telemetry = Telemetry()
+
+telemetry.counter('http_requests_total', 'HTTP requests by endpoint, method and status.')
+telemetry.histogram('http_request_duration_seconds', 'HTTP request latency by endpoint.', REQUEST_BUCKETS)
+telemetry.histogram('db_call_duration_seconds', 'DatabaseManager call latency by method.', DB_BUCKETS)
+telemetry.counter('db_call_errors_total', 'DatabaseManager calls that raised, by method.')
+telemetry.counter('cache_hits_total', 'In-process cache hits.')
+telemetry.counter('cache_misses_total', 'In-process cache misses.')
+telemetry.gauge('cache_entries', 'Entries held by an in-process cache.')
+telemetry.gauge('cache_bytes', 'Approximate bytes held by an in-process cache.')
+telemetry.histogram('import_duration_seconds', 'Duration of import jobs.', IMPORT_BUCKETS)
+telemetry.counter('import_rows_total', 'Rows written by import jobs, by kind.')
+telemetry.gauge('import_last_rows_per_second', 'Output rows per second of the most recent import.')
+
+# Caches are looked up by name so an app rebuilt in the same process replaces its old caches
+_caches: 'weakref.WeakValueDictionary[str, Any]' = weakref.WeakValueDictionary()
+
+
+def _cache_samples():
+    for cache in list(_caches.values()):
+        stats = cache.stats()
+        labels = _labels(cache=stats['name'])
+        yield 'cache_hits_total', labels, stats['hits']
+        yield 'cache_misses_total', labels, stats['misses']
+        yield 'cache_entries', labels, stats['entries']
+        yield 'cache_bytes', labels, stats['bytes']
+
+
+telemetry.add_collector(_cache_samples)
+
+
+def register_cache(cache) -> None:
+    """Expose an LRUCache's hit/miss counters and size."""
+    _caches[cache.name] = cache
+
+
+def record_import(duration: float, tasks: int, outputs: int, metrics: int) -> None:
+    """Record the duration and row counts of a finished import job."""
+    telemetry.observe('import_duration_seconds', duration)
+    telemetry.inc('import_rows_total', tasks, kind='tasks')
+    telemetry.inc('import_rows_total', outputs, kind='outputs')
+    telemetry.inc('import_rows_total', metrics, kind='metrics')
+    if duration > 0:
+        telemetry.set('import_last_rows_per_second', outputs / duration)
+
+
+def instrument_methods(skip: Iterable[str] = ()):
+    """
+    Class decorator timing every public method into db_call_duration_seconds.
+
+    Generator methods are timed until the generator is exhausted or closed.
+    """
+    skip = set(skip)
+
+    def wrap(func):
+        name = func.__name__
+
+        if inspect.isgeneratorfunction(func):
+            @functools.wraps(func)
+            def generator_wrapper(*args, **kwargs):
+                start_db_call()
+                start = time.perf_counter()
+                try:
+                    yield from func(*args, **kwargs)
+                except Exception:
+                    telemetry.inc('db_call_errors_total', method=name)
+                    raise
+                finally:
+                    elapsed = time.perf_counter() - start
+                    telemetry.observe('db_call_duration_seconds', elapsed, method=name)
+                    record_db_call(name, elapsed)
+            return generator_wrapper
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            start_db_call()
+            start = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            except Exception:
+                telemetry.inc('db_call_errors_total', method=name)
+                raise
+            finally:
+                elapsed = time.perf_counter() - start
+                telemetry.observe('db_call_duration_seconds', elapsed, method=name)
+                record_db_call(name, elapsed)
+        return wrapper
+
+    def decorate(cls):
+        for attr, value in list(vars(cls).items()):
+            if attr.startswith('_') or attr in skip or not inspect.isfunction(value):
+                continue
+            setattr(cls, attr, wrap(value))
+        return cls
+
+    return decorate
+
+
+def register_request_metrics(app: Flask) -> None:
+    """
+    Count requests and time them per endpoint.
+
+    Register this before the other before_request hooks so that requests they
+    answer early (e.g. 304 Not Modified) are still counted.
+    """
+    @app.before_request
+    def start_request_timer():
+        g.telemetry_start = time.perf_counter()
+
+    @app.after_request
+    def record_request(response):
+        start = g.pop('telemetry_start', None)
+        if start is not None:
+            endpoint = request.endpoint or 'unmatched'
+            telemetry.observe('http_request_duration_seconds', time.perf_counter() - start,
+                              endpoint=endpoint, method=request.method)
+            telemetry.inc('http_requests_total', endpoint=endpoint, method=request.method,
+                          status=response.status_code)
+        return response
@@ -0,0 +1,64 @@
+"""
+Shared fixtures: a throwaway database filled through the real Excel/CSV importer.
+"""
+
+import os
+import sys
+
+import pandas as pd
+import pytest
+
+# Add parent directory to path for imports
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(ROOT)
+
+from database import DatabaseManager
+from scripts.import_excel import ExcelImporter
+
+MAPPING_FILE = os.path.join(ROOT, 'data', 'mapping.json')
+TASKS = {
+    'programming_010': 'programming',
+    'programming_011': 'programming',
+    'programming_012': 'programming',
+    'svg_generation_015': 'svg_generation',
+    'svg_generation_016': 'svg_generation',
+    'research_018': 'research',
+}
+
+
+@pytest.fixture
+def db(tmp_path):
+    """Empty database with the configured models."""
+    manager = DatabaseManager(str(tmp_path / 'results.db'))
+    manager.init_database(verbose=False)
+    manager.populate_models()
+    return manager
+
+
+@pytest.fixture
+def import_scores(db, tmp_path):
+    """
+    Import {(model_key, task_id): quality_score} cells as one CSV file.
+
+    Returns the import id.
+    """
+    importer = ExcelImporter(db)
+    files = iter(range(1, 1000))
+
+    def run(cells):
+        rows = [{
+            'task_id': task_id,
+            'task_name': task_id,
+            'prompt_text': f'Prompt of {task_id}',
+            'task_group': TASKS[task_id],
+            'model_key': model_key,
+            'output_text': f'{model_key} answer to {task_id} scoring {score}',
+            'quality_score': score,
+        } for (model_key, task_id), score in cells.items()]
+        path = tmp_path / f'import_{next(files):03d}.csv'
+        pd.DataFrame(rows).to_csv(path, index=False)
+        result = importer.import_data(str(path), MAPPING_FILE)
+        assert result['success']
+        return result['import_id']
+
+    return run
@@ -0,0 +1,85 @@
+"""
+Tests for the model correlations and their clustering (eval/correlation.py).
+"""
+
+import numpy as np
+import pytest
+from scipy.cluster.hierarchy import fcluster, linkage
+from scipy.spatial.distance import squareform
+from scipy.stats import pearsonr
+
+from eval.correlation import ModelCorrelations, cluster, pairwise_correlation
+
+
+@pytest.mark.parametrize('seed', range(3))
+def test_pairwise_correlation_matches_pearsonr(seed):
+    rng = np.random.default_rng(seed)
+    scores = rng.uniform(0, 10, size=(6, 15)).round(1)
+    scores[rng.random(scores.shape) < 0.3] = np.nan
+
+    correlation, shared = pairwise_correlation(scores, min_shared=3)
+    for i in range(len(scores)):
+        for j in range(len(scores)):
+            both = ~np.isnan(scores[i]) & ~np.isnan(scores[j])
+            assert shared[i, j] == both.sum()
+            if i == j:
+                assert correlation[i, j] == 1.0
+            elif both.sum() >= 3:
+                expected = pearsonr(scores[i, both], scores[j, both]).statistic
+                assert correlation[i, j] == pytest.approx(expected, abs=1e-9)
+            else:
+                assert np.isnan(correlation[i, j])
+
+
+def test_undefined_correlations():
+    scores = np.array([
+        [1.0, 2.0, 3.0, 4.0],
+        [2.0, 4.0, 6.0, 8.0],
+        [5.0, 5.0, 5.0, 5.0],           # constant
+        [1.0, 2.0, np.nan, np.nan],     # too few tasks
+    ])
+    correlation, shared = pairwise_correlation(scores, min_shared=3)
+    assert correlation[0, 1] == pytest.approx(1.0)
+    assert np.isnan(correlation[0, 2]) and np.isnan(correlation[2, 2])
+    assert np.isnan(correlation[0, 3]) and np.isnan(correlation[3, 3])
+    assert shared[0, 3] == 2
+    np.testing.assert_array_equal(np.isnan(correlation), np.isnan(correlation.T))
+
+
+def test_cluster_matches_scipy_linkage():
+    rng = np.random.default_rng(7)
+    correlation, _ = pairwise_correlation(rng.uniform(0, 10, size=(7, 20)))
+    tree, order = cluster(correlation, 'average')
+
+    expected = linkage(squareform(1.0 - correlation, checks=False), method='average')
+    # Same merges and heights; optimal leaf ordering only swaps children
+    np.testing.assert_allclose(tree[:, 2], expected[:, 2])
+    np.testing.assert_array_equal(np.sort(tree[:, :2], axis=1), np.sort(expected[:, :2], axis=1))
+    assert sorted(order) == list(range(7))
+
+
+def test_two_groups_of_models():
+    rng = np.random.default_rng(8)
+    base = rng.uniform(0, 10, size=(2, 12))
+    # Models 0, 2, 4 follow the first pattern and 1, 3, 5 the second
+    scores = np.array([base[i % 2] + rng.normal(0, 0.3, 12) for i in range(6)])
+    keys = tuple(f'llm-{i}' for i in range(6))
+    correlations = ModelCorrelations(1, keys, keys, scores)
+
+    labels = correlations.clusters(0.5)
+    assert labels[0] == labels[2] == labels[4] != labels[1] == labels[3] == labels[5]
+    np.testing.assert_array_equal(labels, fcluster(correlations.linkage, t=0.5, criterion='distance'))
+
+    # The heatmap order keeps each group together, and a subset keeps that order
+    view = correlations.to_dict()
+    groups = [int(key[-1]) % 2 for key in view['models']]
+    assert groups in ([0, 0, 0, 1, 1, 1], [1, 1, 1, 0, 0, 0])
+    subset = correlations.to_dict(['llm-5', 'llm-0', 'llm-2'])
+    assert subset['models'] == [key for key in view['models'] if key in {'llm-5', 'llm-0', 'llm-2'}]
+    assert subset['correlation'][0][0] == 1.0
+
+
+def test_cluster_of_fewer_than_two_models():
+    tree, order = cluster(np.ones((1, 1)))
+    assert tree.shape == (0, 4)
+    assert list(order) == [0]
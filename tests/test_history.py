@@ -0,0 +1,152 @@
+"""
+Tests for the per-import score history (eval/history.py) behind leaderboard as_of.
+"""
+
+import numpy as np
+import pytest
+
+from config import HISTORY_CONFIG
+from eval.history import ScoreHistory, current_cells, get_scores_as_of
+from scripts.recompute_metrics import MetricsRecomputer
+from conftest import TASKS
+
+MODELS = ['llm-001', 'llm-002', 'llm-003', 'llm-004', 'llm-005']
+FIELDS = ['avg_quality_score', 'avg_tokens', 'task_count', 'quality_ci_low', 'quality_ci_high', 'elo']
+
+
+def random_cells(rng, models):
+    """Scores of some models on a random subset of the tasks."""
+    return {(model_key, task_id): round(float(rng.uniform(0, 10)), 1)
+            for model_key in models for task_id in TASKS if rng.random() < 0.7}
+
+
+def live_cells(db):
+    with db.get_connection() as conn:
+        return current_cells(conn.cursor())
+
+
+def state_at(db, import_id):
+    with db.get_connection() as conn:
+        return ScoreHistory(db).state_at(conn.cursor(), import_id)
+
+
+def table(db, query, params=()):
+    with db.get_connection() as conn:
+        return [tuple(row) for row in conn.execute(query, params).fetchall()]
+
+
+@pytest.fixture
+def small_interval(monkeypatch):
+    monkeypatch.setitem(HISTORY_CONFIG, 'snapshot_interval', 3)
+
+
+def test_every_import_is_reconstructed(db, import_scores, small_interval):
+    rng = np.random.default_rng(1)
+    expected = {}
+    for _ in range(8):
+        models = rng.choice(MODELS, size=2, replace=False)
+        import_id = import_scores(random_cells(rng, models))
+        expected[import_id] = live_cells(db)
+
+    # Snapshots at the first import and every third one after it
+    ids = sorted(expected)
+    snapshots = [row[0] for row in table(db, "SELECT DISTINCT import_id FROM score_snapshots ORDER BY 1")]
+    assert snapshots == [ids[0], ids[3], ids[6]]
+    for import_id, cells in expected.items():
+        assert state_at(db, import_id) == cells
+
+
+def test_only_changed_cells_are_recorded(db, import_scores, small_interval):
+    first = import_scores({('llm-001', 'programming_010'): 5.0, ('llm-002', 'programming_010'): 6.0})
+    second = import_scores({('llm-001', 'programming_010'): 7.0, ('llm-002', 'programming_010'): 6.0})
+
+    assert table(db, "SELECT COUNT(*) FROM score_snapshots WHERE import_id = ?", (first,)) == [(2,)]
+    changed = table(db, "SELECT model_key, task_id, present, quality_score FROM score_history WHERE import_id = ?",
+                    (second,))
+    assert changed == [('llm-001', 'programming_010', 1, 7.0)]
+
+
+def test_removed_cells_are_recorded(db, import_scores, small_interval):
+    first = import_scores({('llm-001', 'programming_010'): 5.0, ('llm-002', 'programming_011'): 6.0})
+    with db.get_connection() as conn:
+        conn.execute("""DELETE FROM metrics WHERE output_id IN
+                        (SELECT id FROM outputs WHERE task_id = 'programming_011')""")
+        conn.execute("DELETE FROM outputs WHERE task_id = 'programming_011'")
+        conn.commit()
+    second = import_scores({('llm-001', 'programming_012'): 4.0})
+
+    removed = table(db, "SELECT model_key, task_id FROM score_history WHERE import_id = ? AND present = 0",
+                    (second,))
+    assert removed == [('llm-002', 'programming_011')]
+    assert ('llm-002', 'programming_011') in state_at(db, first)
+    assert set(state_at(db, second)) == {('llm-001', 'programming_010'), ('llm-001', 'programming_012')}
+
+    # A model without outputs at that import is left out of the past leaderboard
+    rows = db.get_leaderboard_data({'as_of': second}, fields=['task_count'])
+    assert [(r['model_key'], r['task_count']) for r in rows] == [('llm-001', 2)]
+
+
+def test_as_of_before_the_history_starts(db, import_scores):
+    first = import_scores({('llm-001', 'programming_010'): 5.0})
+    second = import_scores({('llm-002', 'programming_010'): 6.0})
+
+    # A database upgraded after these imports starts its history at the latest one
+    with db.get_connection() as conn:
+        conn.execute("DELETE FROM score_snapshots")
+        conn.execute("DELETE FROM score_history")
+        conn.commit()
+    db.init_database(verbose=False)
+
+    assert state_at(db, first) is None
+    with pytest.raises(ValueError, match=f"history starts at import {second}"):
+        get_scores_as_of(db, first)
+    with pytest.raises(ValueError, match="Unknown import"):
+        get_scores_as_of(db, second + 1)
+    assert get_scores_as_of(db, second).import_id == second
+
+
+@pytest.mark.parametrize('filters', [
+    {},
+    {'task_group': 'programming'},
+    {'weights': (('programming', 2.0), ('svg_generation', 0.5))},
+    {'exclude_tasks': ('programming_010',)},
+])
+def test_latest_import_matches_the_live_leaderboard(db, import_scores, small_interval, filters):
+    rng = np.random.default_rng(2)
+    for _ in range(5):
+        import_id = import_scores(random_cells(rng, rng.choice(MODELS, size=3, replace=False)))
+
+    live = db.get_leaderboard_data(dict(filters), fields=FIELDS)
+    past = db.get_leaderboard_data({**filters, 'as_of': import_id}, fields=FIELDS)
+    assert past == [row for row in live if row['task_count']]
+
+
+def test_cost_fields_are_rejected_with_as_of(db, import_scores):
+    import_id = import_scores({('llm-001', 'programming_010'): 5.0})
+    with pytest.raises(ValueError, match="Cost fields"):
+        db.get_leaderboard_data({'as_of': import_id, 'sort_by': 'cost_per_output'})
+    with pytest.raises(ValueError, match="Cost fields"):
+        db.get_leaderboard_data({'as_of': import_id}, fields=['quality_per_dollar'])
+
+
+def test_recomputed_metrics_are_recorded_with_the_recompute(db, import_scores, small_interval):
+    import_scores({('llm-001', 'programming_010'): 5.0, ('llm-002', 'programming_010'): 6.0})
+    # An unrounded quality score stored under an outdated metric definition
+    with db.get_connection() as conn:
+        conn.execute("""UPDATE metrics SET metric_value = 5.4, metric_version = NULL
+                        WHERE output_id = (SELECT id FROM outputs WHERE model_key = 'llm-001')""")
+        conn.commit()
+    before = import_scores({('llm-003', 'programming_011'): 4.0})
+
+    recompute = MetricsRecomputer(db).recompute(workers=1)['import_id']
+    assert recompute > before
+
+    changed = table(db, "SELECT model_key, task_id FROM score_history WHERE import_id = ?", (recompute,))
+    assert changed == [('llm-001', 'programming_010')]
+    assert state_at(db, before)[('llm-001', 'programming_010')][0] == 5.4
+    assert live_cells(db)[('llm-001', 'programming_010')][0] == 5.0
+    assert state_at(db, recompute) == live_cells(db)
+
+    # The next import does not record the recomputed values again
+    after = import_scores({('llm-004', 'programming_012'): 3.0})
+    assert table(db, "SELECT model_key FROM score_history WHERE import_id = ?", (after,)) == [('llm-004',)]
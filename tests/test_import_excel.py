@@ -0,0 +1,41 @@
+"""
+Tests for the Excel/CSV importer (scripts/import_excel.py).
+"""
+
+import pandas as pd
+
+from conftest import MAPPING_FILE
+from scripts.import_excel import ExcelImporter
+
+
+def import_rows(db, tmp_path, rows):
+    path = tmp_path / 'sheet.csv'
+    pd.DataFrame(rows).to_csv(path, index=False)
+    result = ExcelImporter(db).import_data(str(path), MAPPING_FILE)
+    assert result['success']
+
+
+def row(model_key, output_text, tokens=None):
+    return {'task_id': 'programming_010', 'task_name': 'HTML', 'prompt_text': 'Write a page',
+            'task_group': 'programming', 'model_key': model_key, 'output_text': output_text,
+            'tokens': tokens, 'quality_score': 5.0}
+
+
+def test_empty_output_text_has_no_length_or_tokens(db, tmp_path):
+    import_rows(db, tmp_path, [
+        row('llm-001', 'Hello, world!'),
+        row('llm-002', None),
+        row('llm-003', None, tokens=1962),
+    ])
+
+    with db.get_connection() as conn:
+        outputs = {r['model_key']: (r['output_text'], r['length'], r['tokens'])
+                   for r in conn.execute("SELECT model_key, output_text, length, tokens FROM outputs")}
+        priced = dict(conn.execute("SELECT model_key, SUM(priced_outputs) FROM cost_aggregates GROUP BY model_key"))
+
+    assert outputs['llm-001'] == ('Hello, world!', 13, 4)
+    # Empty cells are stored as '' (not 'nan'); the sheet's token count is kept
+    assert outputs['llm-002'] == ('', None, None)
+    assert outputs['llm-003'] == ('', None, 1962)
+    # The output without a token count is not billed
+    assert priced['llm-002'] == 0
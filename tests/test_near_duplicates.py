@@ -0,0 +1,30 @@
+"""
+Tests for MinHash/LSH near-duplicate detection (eval/near_duplicates.py).
+"""
+
+import pandas as pd
+
+from conftest import MAPPING_FILE
+from eval.near_duplicates import NearDuplicateIndex
+from scripts.import_excel import ExcelImporter
+
+ANSWER = ('The quick brown fox jumps over the lazy dog while the farmer watches '
+          'from the porch and the cat sleeps on the warm windowsill all afternoon')
+
+
+def test_outputs_without_text_do_not_cluster(db, tmp_path):
+    rows = [{'task_id': 'programming_010', 'task_name': 'HTML', 'prompt_text': 'Write a page',
+             'task_group': 'programming', 'model_key': f'llm-00{i}', 'output_text': text,
+             'quality_score': 5.0}
+            for i, text in enumerate([ANSWER, ANSWER + ' today', None, None, '', None], start=1)]
+    path = tmp_path / 'sheet.csv'
+    pd.DataFrame(rows).to_csv(path, index=False)
+    ExcelImporter(db).import_data(str(path), MAPPING_FILE)
+
+    clusters = NearDuplicateIndex(db).find_clusters()
+    assert len(clusters) == 1
+    [cluster] = clusters[0]['clusters']
+    assert [o['model_key'] for o in cluster['outputs']] == ['llm-001', 'llm-002']
+
+    # A rebuild leaves the empty outputs out as well
+    assert NearDuplicateIndex(db).rebuild() == 2
@@ -0,0 +1,118 @@
+"""
+Tests for the incremental Bradley-Terry ranking (eval/ranking.py).
+"""
+
+import numpy as np
+import pytest
+
+from eval.ranking import build_ranking, get_ranking
+from eval.score_matrix import ScoreMatrix
+from conftest import TASKS
+
+GROUPS = ['programming', 'svg_generation', 'research']
+
+
+def make_matrix(scores, data_version=1, model_keys=None):
+    """ScoreMatrix over tasks task_000.. spread over GROUPS."""
+    n_models, n_tasks = scores.shape
+    model_keys = model_keys or [f'model_{i:02d}' for i in range(n_models)]
+    return ScoreMatrix(
+        metric='quality_score', data_version=data_version, model_keys=model_keys, model_names=model_keys,
+        task_ids=[f'task_{j:03d}' for j in range(n_tasks)],
+        task_groups=[GROUPS[j % len(GROUPS)] for j in range(n_tasks)], scores=scores)
+
+
+def random_scores(rng, n_models=12, n_tasks=30):
+    """Integer scores (so ties happen) with about a quarter of the cells missing."""
+    scores = rng.integers(0, 11, size=(n_models, n_tasks)).astype(np.float64)
+    scores[rng.random(scores.shape) < 0.25] = np.nan
+    return scores
+
+
+def assert_same_ranking(updated, full):
+    assert updated.model_keys == full.model_keys
+    assert updated.task_ids == full.task_ids
+    np.testing.assert_array_equal(updated.wins, full.wins)
+    np.testing.assert_array_equal(updated.ties, full.ties)
+    np.testing.assert_allclose(updated.elo, full.elo, atol=1e-4)
+
+
+@pytest.mark.parametrize('seed', range(5))
+def test_update_after_changed_scores_matches_full_recount(seed):
+    rng = np.random.default_rng(seed)
+    scores = random_scores(rng)
+    previous = build_ranking(make_matrix(scores))
+
+    # Re-scored models, a new cell and a removed one
+    changed = scores.copy()
+    changed[rng.choice(len(scores), size=2, replace=False)] = random_scores(rng, 2)
+    changed[0, 0], changed[1, 1] = 7.0, np.nan
+    matrix = make_matrix(changed, data_version=2)
+    assert_same_ranking(build_ranking(matrix, previous=previous), build_ranking(matrix))
+
+
+def test_update_with_new_and_removed_models_matches_full_recount():
+    rng = np.random.default_rng(10)
+    scores = random_scores(rng)
+    keys = [f'model_{i:02d}' for i in range(len(scores))]
+    previous = build_ranking(make_matrix(scores, model_keys=keys))
+
+    # Drop the first model, add two new ones
+    scores = np.vstack([scores[1:], random_scores(rng, 2)])
+    keys = keys[1:] + ['model_new_a', 'model_new_b']
+    matrix = make_matrix(scores, data_version=2, model_keys=keys)
+    assert_same_ranking(build_ranking(matrix, previous=previous), build_ranking(matrix))
+
+
+@pytest.mark.parametrize('seed', range(5))
+def test_update_across_task_selections_matches_full_recount(seed):
+    rng = np.random.default_rng(seed)
+    matrix = make_matrix(random_scores(rng))
+    before = tuple(rng.choice(matrix.task_ids, size=4, replace=False))
+    after = tuple(rng.choice(matrix.task_ids, size=6, replace=False))
+
+    for task_group in (None, 'programming'):
+        previous = build_ranking(matrix, task_group, before)
+        assert_same_ranking(build_ranking(matrix, task_group, after, previous=previous),
+                            build_ranking(matrix, task_group, after))
+
+
+def test_update_of_scores_and_selection_together_matches_full_recount():
+    rng = np.random.default_rng(20)
+    scores = random_scores(rng)
+    previous = build_ranking(make_matrix(scores), exclude_tasks=('task_001', 'task_002'))
+
+    scores = scores.copy()
+    scores[3] = random_scores(rng, 1)
+    matrix = make_matrix(scores, data_version=2)
+    exclude_tasks = ('task_002', 'task_005', 'task_006')
+    assert_same_ranking(build_ranking(matrix, exclude_tasks=exclude_tasks, previous=previous),
+                        build_ranking(matrix, exclude_tasks=exclude_tasks))
+
+
+def test_large_selection_change_is_recounted():
+    rng = np.random.default_rng(30)
+    matrix = make_matrix(random_scores(rng))
+    previous = build_ranking(matrix)
+    # Only one task left: more columns leave than remain selected
+    exclude_tasks = matrix.task_ids[1:]
+    assert_same_ranking(build_ranking(matrix, exclude_tasks=exclude_tasks, previous=previous),
+                        build_ranking(matrix, exclude_tasks=exclude_tasks))
+
+
+def test_custom_selection_keeps_the_default_ranking_cached(db, import_scores):
+    rng = np.random.default_rng(40)
+    import_scores({(f'llm-00{i}', task_id): round(float(rng.uniform(0, 10)), 1)
+                   for i in range(1, 6) for task_id in TASKS})
+    excluded = db.get_excluded_tasks()
+
+    default = get_ranking(db, None, excluded)
+    custom = get_ranking(db, None, excluded + ('programming_010',))
+    assert custom is not default
+    assert get_ranking(db, None, excluded) is default
+
+    # A new data version updates each selection from its own cached ranking
+    db.bump_data_version()
+    updated = get_ranking(db, None, excluded)
+    assert updated is not default and updated.data_version == default.data_version + 1
+    np.testing.assert_array_equal(updated.wins, default.wins)
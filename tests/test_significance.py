@@ -0,0 +1,101 @@
+"""
+Tests for the pairwise sign and permutation tests (eval/significance.py).
+"""
+
+import itertools
+
+import numpy as np
+import pytest
+from scipy.stats import binomtest
+
+from eval.significance import PairwiseSignificance, permutation_p_values, sign_test_p_values
+
+
+def exact_permutation_p(differences):
+    """Two-sided p-value of the mean difference over every sign flip of the shared tasks."""
+    values = differences[~np.isnan(differences)]
+    observed = abs(values.sum())
+    flips = np.array(list(itertools.product([-1.0, 1.0], repeat=len(values))))
+    return np.mean(np.abs(flips @ values) >= observed - 1e-9)
+
+
+def test_sign_test_matches_binomtest():
+    wins, losses = np.meshgrid(np.arange(16), np.arange(16))
+    p_values = sign_test_p_values(wins, losses)
+
+    for w, l, p in zip(wins.ravel(), losses.ravel(), p_values.ravel()):
+        if w + l == 0:
+            assert np.isnan(p)
+        else:
+            assert p == pytest.approx(binomtest(int(w), int(w + l), 0.5).pvalue, abs=1e-12)
+
+
+@pytest.mark.parametrize('seed', range(4))
+def test_permutation_test_matches_exact_enumeration(seed):
+    rng = np.random.default_rng(seed)
+    differences = rng.normal(0.5, 1.0, size=(6, 10)).round(1)
+    differences[rng.random(differences.shape) < 0.2] = np.nan
+
+    p_values = permutation_p_values(differences, permutations=20000, seed=seed)
+    expected = [exact_permutation_p(row) for row in differences]
+    # Monte Carlo error with 20000 permutations is well below this
+    np.testing.assert_allclose(p_values, expected, atol=0.015)
+
+
+def test_permutation_test_edge_cases():
+    differences = np.array([
+        [np.nan, np.nan, np.nan, np.nan],   # no shared tasks
+        [0.0, 0.0, 0.0, np.nan],            # identical scores
+        [2.0, 3.0, 1.0, 4.0],               # always better
+    ])
+    p_values = permutation_p_values(differences, permutations=2000, seed=1)
+    assert np.isnan(p_values[0])
+    assert p_values[1] == 1.0
+    # Only the observed signs and their mirror image are as extreme: 2 of 16
+    assert p_values[2] == pytest.approx(2 / 16, abs=0.03)
+
+
+def test_pairs_do_not_depend_on_the_other_pairs():
+    rng = np.random.default_rng(5)
+    differences = rng.normal(size=(600, 12))
+    differences[rng.random(differences.shape) < 0.3] = np.nan
+
+    # More pairs than one chunk; each pair alone must give the same p-value
+    together = permutation_p_values(differences, permutations=500, seed=3)
+    alone = [permutation_p_values(differences[i:i + 1], permutations=500, seed=3)[0] for i in range(0, 600, 97)]
+    np.testing.assert_array_equal(together[::97], alone)
+
+
+def test_pairwise_significance():
+    scores = np.array([
+        [9.0, 8.0, 7.0, 9.0, 8.0, 6.0],
+        [5.0, 8.0, 4.0, 3.0, np.nan, 2.0],
+        [np.nan, np.nan, np.nan, np.nan, 1.0, np.nan],
+    ])
+    keys = ('llm-a', 'llm-b', 'llm-c')
+    tests = PairwiseSignificance(1, keys, keys, tuple(f'task_{j}' for j in range(6)), scores)
+
+    pair = tests.pair('llm-a', 'llm-b')
+    assert (pair['wins'], pair['losses'], pair['ties'], pair['shared_tasks']) == (4, 0, 1, 5)
+    assert pair['mean_difference'] == pytest.approx(np.mean([4.0, 0.0, 3.0, 6.0, 4.0]))
+    assert pair['sign_p'] == pytest.approx(binomtest(4, 4, 0.5).pvalue)
+    assert 0 < pair['permutation_p'] <= 1
+
+    reverse = tests.pair('llm-b', 'llm-a')
+    assert (reverse['wins'], reverse['losses']) == (0, 4)
+    assert reverse['mean_difference'] == -pair['mean_difference']
+    assert reverse['permutation_p'] == pair['permutation_p']
+
+    # llm-b and llm-c share no task
+    unshared = tests.pair('llm-b', 'llm-c')
+    assert unshared['shared_tasks'] == 0
+    assert unshared['sign_p'] is None and unshared['permutation_p'] is None
+    assert not unshared['significant']
+    assert tests.pair('llm-a', 'llm-a') is None
+    assert tests.pair('llm-a', 'unknown') is None
+
+    matrix = tests.submatrix(['llm-b', 'llm-a', 'unknown'])
+    assert matrix['models'] == ['llm-b', 'llm-a']
+    assert matrix['permutation_p'][0][0] is None
+    assert matrix['permutation_p'][0][1] == round(pair['permutation_p'], 4)
+    assert matrix['mean_difference'][0][1] == round(-pair['mean_difference'], 3)
@@ -0,0 +1,79 @@
+"""
+Tests for the bootstrap confidence intervals (eval/statistics.py).
+"""
+
+import warnings
+
+import numpy as np
+
+from eval.statistics import bootstrap_means, confidence_intervals, resampling_matrix
+
+
+def random_scores(rng, n_models=5, n_tasks=12):
+    scores = rng.uniform(0, 10, size=(n_models, n_tasks)).round(1)
+    scores[rng.random(scores.shape) < 0.25] = np.nan
+    return scores
+
+
+def test_resampling_matrix():
+    counts = resampling_matrix(9, 200, 3)
+    assert counts.shape == (200, 9)
+    np.testing.assert_array_equal(counts.sum(axis=1), 9)
+    assert not counts.flags.writeable
+    np.testing.assert_array_equal(counts, resampling_matrix.__wrapped__(9, 200, 3))
+    assert not np.array_equal(counts, resampling_matrix.__wrapped__(9, 200, 4))
+
+
+def test_bootstrap_means_match_explicit_resamples():
+    rng = np.random.default_rng(1)
+    scores = random_scores(rng)
+    means = bootstrap_means(scores, resamples=100, seed=2)
+
+    # Draw each sample's tasks explicitly and average the scored ones
+    counts = resampling_matrix(scores.shape[1], 100, 2).astype(int)
+    for b, sample_counts in enumerate(counts):
+        drawn = scores[:, np.repeat(np.arange(scores.shape[1]), sample_counts)]
+        with warnings.catch_warnings():
+            # A sample may draw none of a model's scored tasks (mean is NaN)
+            warnings.simplefilter('ignore', RuntimeWarning)
+            expected = np.nanmean(drawn, axis=1)
+        np.testing.assert_allclose(means[:, b], expected)
+
+
+def test_confidence_intervals():
+    rng = np.random.default_rng(3)
+    scores = random_scores(rng)
+    scores[4] = np.nan          # model without scores
+    scores[3] = np.where(np.isnan(scores[3]), np.nan, 7.0)  # constant scores
+
+    low, high = confidence_intervals(scores, confidence=0.9, resamples=500, seed=4)
+    means = np.nanmean(scores[:4], axis=1)
+    assert np.all(low[:4] <= means) and np.all(means <= high[:4])
+    assert np.all(low[:3] < high[:3])
+    assert (low[3], high[3]) == (7.0, 7.0)
+    assert np.isnan(low[4]) and np.isnan(high[4])
+
+    # Percentiles of the bootstrap distribution, reproducible for a seed
+    expected = np.nanquantile(bootstrap_means(scores[:4], 500, 4), [0.05, 0.95], axis=1)
+    np.testing.assert_allclose([low[:4], high[:4]], expected)
+    np.testing.assert_array_equal(confidence_intervals(scores, 0.9, 500, 4), (low, high))
+
+
+def test_wider_confidence_gives_wider_intervals():
+    scores = random_scores(np.random.default_rng(5))
+    low_90, high_90 = confidence_intervals(scores, 0.9, 500, 6)
+    low_99, high_99 = confidence_intervals(scores, 0.99, 500, 6)
+    assert np.all(low_99 <= low_90) and np.all(high_90 <= high_99)
+
+
+def test_no_tasks_selected():
+    low, high = confidence_intervals(np.empty((3, 0)))
+    assert low.shape == high.shape == (3,)
+    assert np.all(np.isnan(low)) and np.all(np.isnan(high))
+
+
+def test_single_task():
+    scores = np.array([[4.0], [np.nan], [9.0]])
+    low, high = confidence_intervals(scores, resamples=200)
+    np.testing.assert_array_equal(low, [4.0, np.nan, 9.0])
+    np.testing.assert_array_equal(high, [4.0, np.nan, 9.0])
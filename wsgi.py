@@ -3,13 +3,54 @@ WSGI entry point for production deployment.
 Use with gunicorn, waitress, or other WSGI servers.
 
 Example usage:
+    gunicorn -c gunicorn.conf.py wsgi:app
     gunicorn --bind 0.0.0.0:5000 wsgi:app
     waitress-serve --port=5000 wsgi:app
+
+With gunicorn's preload_app (see gunicorn.conf.py) this module is imported
+once in the master process. The warmup below then runs before the workers are
+forked, so every worker starts with the score matrix and the hot leaderboard
+views already built and shares those pages with the master instead of
+building its own copies.
 """
 
+import gc
+import os
+
 from app import create_app
+from config import WARMUP_PATHS
+from database import DatabaseManager
+from eval.score_matrix import get_score_matrix
+from model_registry import get_model_registry
+from telemetry import telemetry
+
+
+def warm_up(app) -> None:
+    """Build the model registry and score matrix and render the hot views once."""
+    db = DatabaseManager()
+    get_model_registry(db)
+    get_score_matrix(db)
+
+    client = app.test_client()
+    for path in WARMUP_PATHS:
+        # Fill both the plain and the compressed response caches
+        client.get(path)
+        client.get(path, headers={'Accept-Encoding': 'gzip'})
+
+    # Warmup traffic should not show up in the workers' request metrics
+    telemetry.reset()
+
 
 app = create_app()
 
+if os.environ.get('WSGI_WARMUP', 'true').lower() == 'true':
+    warm_up(app)
+
+    # Move everything allocated so far out of the collector's reach: a GC pass
+    # in a worker would otherwise write to these objects and un-share their pages
+    gc.collect()
+    if hasattr(gc, 'freeze'):
+        gc.freeze()
+
 if __name__ == '__main__':
     app.run()